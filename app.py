@@ -2,15 +2,118 @@ import os
 import time
 import streamlit as st
 
-# Eigene Module
+# Eigene Module. Schwere Abhängigkeiten (OpenCV, NumPy, TensorFlow, gpiod) werden erst
+# bei Bedarf importiert; Objekte mit Zustand (Caches, Modell, Artefakt-Speicher, Schreib-Thread) bleiben
+# als Singletons (st.cache_resource) über alle Reruns und Sitzungen erhalten.
 import config
-from transformations import canny_edge_detection
-import camera
-from schrittmotor_TB6600 import StepperMotor
+import hardware
+from series import SeriesExecutor
 
 # Globale Konstante oder aus config-Datei
 OUTPUT_DIRECTORY = config.output_directory
 
+
+@st.cache_resource
+def get_hardware():
+    """
+    Kamera und Schrittmotor des Prozesses (hardware.HardwareManager). Beide werden nur
+    einmal erkannt bzw. angefordert; die Motorposition bleibt über alle Reruns erhalten.
+    """
+    return hardware.default_manager()
+
+
+@st.cache_resource
+def get_series_index():
+    """
+    Globaler Index aller Serien (series_index.SeriesIndex). Beim ersten Aufruf werden
+    neue oder geänderte Manifeste eingelesen, danach listet die Oberfläche die Serien
+    direkt aus dem Index. Ältere Ordner ohne Manifest werden nur über den Button
+    "Import legacy series" (bzw. series_index.py --import) übernommen.
+    """
+    from series_index import SeriesIndex
+    index = SeriesIndex()
+    index.refresh(import_missing=False)
+    return index
+
+
+@st.cache_resource
+def get_artifact_store():
+    """
+    Gemeinsamer Artefakt-Speicher (artifact_store.ArtifactStore) für Kantenbilder,
+    Vorschaubilder und Modelleingaben.
+    """
+    from artifact_store import default_store
+    return default_store()
+
+
+@st.cache_resource
+def get_preview_cache():
+    """
+    Gemeinsamer Cache für Vorschaubilder (preview.PreviewCache), auf der Platte im Artefakt-Speicher.
+    """
+    from preview import PreviewCache
+    return PreviewCache(store=get_artifact_store())
+
+
+@st.cache_resource
+def get_sweep():
+    """
+    Gemeinsamer CannySweep mit zwischengespeicherten Gradienten.
+    """
+    from transformations import CannySweep
+    return CannySweep()
+
+
+@st.cache_resource
+def get_writer():
+    """
+    Gemeinsamer Hintergrund-Thread zum Berechnen und Speichern von Ergebnisbildern.
+    """
+    from result_writer import ResultWriter
+    return ResultWriter()
+
+
+@st.cache_resource
+def get_inference_service():
+    """
+    Inferenz-Dienst mit geladenem Modell; TensorFlow bzw. TFLite wird erst hier importiert.
+    """
+    from inference import InferenceService
+    return InferenceService(store=get_artifact_store())
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def edge_preview(image_path, mtime_ns, low_threshold, high_threshold, aperture_size):
+    """
+    Canny-Kantendetektion auf dem Vorschaubild. Das Ergebnis wird pro Bild
+    (inkl. Änderungszeit) und Parametersatz zwischengespeichert, sodass ein
+    Rerun mit denselben Reglerstellungen nichts neu berechnet. Die Gradienten
+    hält der CannySweep vor, neue Schwellen rechnen nur die Hysterese neu.
+    """
+    return get_sweep().edges(
+        get_preview_cache().load(image_path), low_threshold, high_threshold, aperture_size,
+        key=(image_path, mtime_ns, "preview")
+    )
+
+
+def auto_pick_parameters(image_path):
+    """
+    Callback: wertet ein Raster von Canny-Parametern auf dem Vorschaubild aus und
+    setzt die Schieberegler auf den Parametersatz mit dem gewünschten Kantenanteil.
+    """
+    from transformations import pick_parameters
+
+    mtime_ns = os.stat(image_path).st_mtime_ns
+    results = get_sweep().grid(
+        get_preview_cache().load(image_path), range(0, 256, 10), range(10, 256, 10), (3, 5, 7),
+        key=(image_path, mtime_ns, "preview")
+    )
+    best = pick_parameters(results)
+    st.session_state["low_threshold"] = best.low_threshold
+    st.session_state["high_threshold"] = best.high_threshold
+    st.session_state["aperture_size"] = best.aperture_size
+
+
 # Streamlit-Titel
 st.title('Image Analysis')
 
@@ -25,18 +128,23 @@ with tab1:
     
     # Button zum Aufnehmen eines einzelnen Testbildes
     if st.button("Make Test Image"):
-        cam = camera.Camera()
-        # Speicherpfad für das Testbild
-        cam.set_file_path("./test_images")
-        # Ein eindeutiger Dateiname basierend auf Zeitstempel
-        cam.set_file_name(f"{int(time.time())}_captured_image.CR2")
-
-        # Bild aufnehmen
-        test_image = cam.capture_image()
+        test_image = None
+        try:
+            with get_hardware().reserve(timeout=0) as hw:
+                cam = hw.camera
+                # Speicherpfad für das Testbild
+                cam.set_file_path("./test_images")
+                # Ein eindeutiger Dateiname basierend auf Zeitstempel
+                cam.set_file_name(f"{int(time.time())}_captured_image.CR2")
+
+                # Bild aufnehmen; die Kamera-Session bleibt für weitere Aufnahmen geöffnet
+                test_image = cam.capture_image()
+        except hardware.HardwareBusy as e:
+            st.write(str(e))
 
         # Bild anzeigen, falls vorhanden
         if test_image is not None and os.path.isfile(test_image):
-            st.image(test_image)
+            st.image(get_preview_cache().load(test_image), channels="BGR")
         else:
             st.write("No test image found or file could not be loaded!")
 
@@ -52,74 +160,101 @@ with tab1:
     # Freies Textfeld für Kommentare
     comments = st.text_area("Comments")
 
+    # Optional: Fehlererkennung schon während der Aufnahme (Ergebnis nach der Serie)
+    detect_during_capture = st.checkbox("Run defect detection during capture")
+
     # Button zum Starten der Bilderfassung
     if st.button("Capture Images!"):
-        # Kamera-Objekt instanzieren
-        cam = camera.Camera()
-
-        # Motor loslassen (falls zuvor aktiviert)
-        StepperMotor.release()
-
-        # Neues StepperMotor-Objekt erzeugen und Richtung festlegen
-        stepper = StepperMotor()
-        stepper.set_direction('left')  # z.B. links herum
-
-        # Schrittgröße in Grad berechnen (volle 360° / Anzahl Bilder)
-        degree_step = 360 / number_of_images
-        current_degree = 0
-
-        # Ordner für die Bilderserie anlegen
-        image_folder = f"./captured_images/{name}"
-        if not os.path.exists(image_folder):
-            os.makedirs(image_folder)
-
-        # Für jede Position ein Bild aufnehmen
-        for _ in range(number_of_images):
-            # Motor um den berechneten Winkel bewegen
-            stepper.move_by_degree(degree_step)
-            current_degree += degree_step
-
-            # Kurze Wartezeit, damit der Motor sich stabilisiert
-            time.sleep(0.5)
-
-            # Kamera-Dateiname (mit aktuellem Zeitstempel + Gradzahl)
-            cam.set_file_path(image_folder)
-            cam.set_file_name(f"{int(time.time())}_{int(current_degree)}_captured_image.CR2")
-
-            captured_image = cam.capture_image()
-
-            if captured_image is not None and os.path.isfile(captured_image):
-                st.write(f"## Image Captured at {current_degree:.2f} degrees")
-                st.image(captured_image)
-            else:
-                st.write(f"Could not load the image at {current_degree:.2f} degrees")
-
-        # Liste der aufgenommenen Bilder anzeigen
-        st.write("## Captured Images")
-        images = [f.name for f in os.scandir(image_folder) if f.is_file()]
-        st.write(images)
-
-        # Motor wieder ausschalten
-        stepper.disable_motor()
+        try:
+            # Kamera und Motor für die ganze Serie reservieren (nur eine Sitzung gleichzeitig)
+            with get_hardware().reserve(timeout=0) as hw:
+                cam = hw.camera
+                cam.open()
+
+                # Motor einschalten und Richtung festlegen
+                stepper = hw.stepper
+                stepper.enable_motor()
+                stepper.set_direction('left')  # z.B. links herum
+
+                # Ordner für die Bilderserie; Manifest und Index halten Winkel, Zeit,
+                # Kommentar und Einstellungen fest
+                from series_index import SeriesRecorder
+                image_folder = f"./captured_images/{name}"
+                recorder = SeriesRecorder(image_folder, comments=comments, index=get_series_index(), settings={
+                    "camera": config.camera,
+                    "camera_backend": hw.camera_backend,
+                    "motor_backend": hw.motor_backend,
+                    "number_of_images": number_of_images,
+                    "degree_step": 360 / number_of_images,
+                })
+
+                # Serie im Pipeline-Betrieb aufnehmen: Während ein Bild noch heruntergeladen
+                # und angezeigt wird, fährt der Drehteller bereits den nächsten Winkel an.
+                # Schrittgröße in Grad: volle 360° / Anzahl Bilder
+                # Der Motor bremst mit Rampe ab, daher ist keine zusätzliche Wartezeit zum Beruhigen nötig.
+                executor = SeriesExecutor(cam, stepper, settle_time=0.0)
+                detections = []
+                try:
+                    for current_degree, captured_image in executor.run(number_of_images, image_folder):
+                        if captured_image is not None and os.path.isfile(captured_image):
+                            recorder.add_image(captured_image, current_degree)
+                            st.write(f"## Image Captured at {current_degree:.2f} degrees")
+                            # Verkleinertes Vorschaubild anzeigen (wird für die Edge Detection wiederverwendet)
+                            st.image(get_preview_cache().load(captured_image), channels="BGR")
+                            # Bild an den Inferenz-Dienst geben, das Ergebnis wird erst nach der Serie abgefragt
+                            if detect_during_capture:
+                                detections.append((current_degree, get_inference_service().submit(captured_image)))
+                        else:
+                            st.write(f"Could not load the image at {current_degree:.2f} degrees")
+                finally:
+                    # Motor ausschalten; Position und Kamera-Session bleiben erhalten
+                    stepper.disable_motor()
+
+            if detections:
+                st.write("## Defect Detection")
+                for current_degree, future in detections:
+                    try:
+                        st.write(f"{current_degree:.2f} degrees: defect probability {future.result():.2f}")
+                    except Exception as e:
+                        st.write(f"{current_degree:.2f} degrees: {e}")
+
+            # Liste der aufgenommenen Bilder anzeigen
+            st.write("## Captured Images")
+            st.write([image.file for image in get_series_index().images(name)])
+        except hardware.HardwareBusy as e:
+            st.write(str(e))
 
     # Steuerungs-Optionen für den Motor
     st.write("## Motor Options")
-    
+
     degree_input = st.number_input("Turn Motor by degree", value=0)
 
     if st.button("Turn motor by degree!"):
-        # Sicherstellen, dass 'stepper' existiert
         try:
-            stepper.move_by_degree(int(degree_input))
-        except NameError:
-            st.write("Stepper motor is not initialized! Please capture an image series first.")
+            with get_hardware().reserve(timeout=0) as hw:
+                hw.stepper.enable_motor()
+                try:
+                    hw.stepper.move_by_degree(int(degree_input))
+                finally:
+                    hw.stepper.disable_motor()
+        except hardware.HardwareBusy as e:
+            st.write(str(e))
 
     # Motor in die Ausgangsposition zurückfahren
     if st.button("Bring back to original position"):
         try:
-            stepper.move_to_original_position()
-        except NameError:
-            st.write("Stepper motor is not initialized! Please capture an image series first.")
+            with get_hardware().reserve(timeout=0) as hw:
+                hw.stepper.enable_motor()
+                try:
+                    hw.stepper.move_to_original_position()
+                finally:
+                    hw.stepper.disable_motor()
+        except hardware.HardwareBusy as e:
+            st.write(str(e))
+
+    # Aktuelle Position des Drehtellers (bleibt über alle Reruns erhalten)
+    if get_hardware().has_stepper:
+        st.write(f"Current position: {get_hardware().stepper.position_degree:.2f} degrees")
 
 
 ######################################
@@ -131,39 +266,85 @@ with tab2:
 
     with col1:
         st.write("## Original Image")
-        # Anzeige aller Unterordner in OUTPUT_DIRECTORY
-        subfolders = [f.name for f in os.scandir(OUTPUT_DIRECTORY) if f.is_dir()]
-
-        # Dropdown zur Auswahl eines Unterordners
-        selected_subfolder = st.selectbox("Select a subfolder", subfolders)
-
-        # Bilddateien im gewählten Unterordner
+        # Serien aus dem Index (kein Durchsuchen von OUTPUT_DIRECTORY bei jedem Rerun),
+        # optional gefiltert nach Name oder Kommentar
+        series_filter = st.text_input("Filter series (name or comment)")
+        if st.button("Refresh series index"):
+            get_series_index().refresh()
+        if st.button("Import legacy series"):
+            # Schreibt manifest.jsonl in Ordner ohne Manifest und berechnet die SHA-1 aller Bilder
+            with st.spinner("Importing folders without manifest..."):
+                imported = get_series_index().refresh(import_missing=True)
+            st.write(f"{imported} series read")
+        series_list = get_series_index().list_series(series_filter)
+
+        # Dropdown zur Auswahl einer Serie
+        selected_series = st.selectbox(
+            "Select a subfolder", series_list,
+            format_func=lambda info: f"{info.name} ({info.image_count} images)"
+        )
+        selected_subfolder = selected_series.name if selected_series else ""
+        if selected_series and selected_series.comments:
+            st.caption(selected_series.comments)
+
+        # Bilder der gewählten Serie (nach Winkel sortiert)
         images_in_subfolder = [
-            f.name for f in os.scandir(os.path.join(OUTPUT_DIRECTORY, selected_subfolder))
-            if f.is_file()
-        ]
+            image.file for image in get_series_index().images(selected_subfolder)
+        ] if selected_series else []
 
         # Dropdown zur Auswahl eines Bildes
-        selected_image = st.selectbox("Select an image", images_in_subfolder)
+        selected_image = st.selectbox("Select an image", images_in_subfolder) or ""
 
     with col2:
         st.write("## Select Parameters")
 
-        # Schieberegler für Canny-Parameter
-        low_threshold = st.slider("Low Threshold", 0, 255, 150)
-        high_threshold = st.slider("High Threshold", 0, 255, 160)
-        aperture_size = st.slider("Aperture Size", 3, 7, 3, step=2)
+        # Kompletter Pfad zum ausgewählten Bild
+        full_image_path = os.path.join(OUTPUT_DIRECTORY, selected_subfolder, selected_image)
+
+        # Schieberegler für Canny-Parameter (per Button automatisch einstellbar)
+        st.button(
+            "Auto-pick parameters",
+            on_click=auto_pick_parameters,
+            args=(full_image_path,),
+            disabled=not (selected_image and os.path.isfile(full_image_path))
+        )
+        low_threshold = st.slider("Low Threshold", 0, 255, 150, key="low_threshold")
+        high_threshold = st.slider("High Threshold", 0, 255, 160, key="high_threshold")
+        aperture_size = st.slider("Aperture Size", 3, 7, 3, step=2, key="aperture_size")
 
         transformed_image = None
         try:
-            # Kompletter Pfad zum ausgewählten Bild
-            full_image_path = os.path.join(OUTPUT_DIRECTORY, selected_subfolder, selected_image)
-            transformed_image = canny_edge_detection(
-                full_image_path, 
-                low_threshold, 
-                high_threshold, 
+            # Vorschau auf dem verkleinerten Bild (zwischengespeichert pro Parametersatz)
+            transformed_image = edge_preview(
+                full_image_path,
+                os.stat(full_image_path).st_mtime_ns,
+                low_threshold,
+                high_threshold,
                 aperture_size
             )
+
+            # Kantenbild in voller Auflösung nur auf Anforderung berechnen und im
+            # Artefakt-Speicher ablegen (gleiches Bild und gleiche Parameter nur einmal).
+            # Berechnen und Schreiben laufen im Thread des Writers, nicht im Rerun.
+            if st.button("Save full resolution result"):
+                from functools import partial
+                from transformations import canny_edge_detection, canny_store_params
+                from series_index import SeriesManifest
+                manifest = SeriesManifest(os.path.join(OUTPUT_DIRECTORY, selected_subfolder))
+                index = get_series_index()
+                source = full_image_path
+
+                def record_edges(edge_path):
+                    # Pfad des Kantenbilds im Manifest und im Index der Serie vermerken
+                    index.record(manifest, manifest.add_derived(source, "canny", edge_path))
+
+                queued = get_writer().submit_artifact(
+                    get_artifact_store(), source, "canny",
+                    canny_store_params(low_threshold, high_threshold, aperture_size),
+                    partial(canny_edge_detection, source, low_threshold, high_threshold, aperture_size),
+                    ".png", record_edges
+                )
+                st.write("Edge image is being saved in the background." if queued else "Edge image already saved.")
         except FileNotFoundError:
             st.write("The selected file was not found.")
         except Exception as e:
@@ -176,7 +357,10 @@ with tab2:
         st.write("### Original")
         original_path = os.path.join(OUTPUT_DIRECTORY, selected_subfolder, selected_image)
         if selected_image and os.path.isfile(original_path):
-            st.image(original_path)
+            try:
+                st.image(get_preview_cache().load(original_path), channels="BGR")
+            except FileNotFoundError:
+                st.write("The selected image could not be decoded.")
         else:
             st.write("No valid image selected.")
 
@@ -192,5 +376,29 @@ with tab2:
 # TAB 3: AI
 ######################################
 with tab3:
-    st.write("## Coming Soon")
-    st.write("Hier könnten zukünftig KI-Funktionen eingebunden werden.")
\ No newline at end of file
+    st.write("## Defect Detection")
+
+    # Bilderserie aus dem Index auswählen
+    ai_subfolders = [info.name for info in get_series_index().list_series()]
+    ai_subfolder = st.selectbox("Select a series", ai_subfolders, key="ai_subfolder")
+    threshold = st.slider("Defect threshold", 0.0, 1.0, 0.5, step=0.05)
+
+    if ai_subfolder and st.button("Run defect detection"):
+        folder = os.path.join(OUTPUT_DIRECTORY, ai_subfolder)
+        image_paths = [os.path.join(folder, image.file) for image in get_series_index().images(ai_subfolder)]
+        try:
+            # Alle Bilder auf einmal einstellen: der Dienst fasst sie zu Batches zusammen
+            service = get_inference_service()
+            futures = [(path, service.submit(path)) for path in image_paths]
+            for path, future in futures:
+                try:
+                    probability = future.result()
+                except Exception as e:
+                    st.write(f"{os.path.basename(path)}: {e}")
+                    continue
+                label = "Defekt erkannt" if probability > threshold else "Kein Defekt erkannt"
+                st.write(f"{os.path.basename(path)}: {label} ({probability:.2f})")
+            st.write(f"{service.images} images in {service.batches} model calls "
+                     f"(mean batch size {service.mean_batch_size:.1f})")
+        except Exception as e:
+            st.write(f"An error occurred: {e}")
\ No newline at end of file
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+
+import config
+from series_index import file_hash
+
+
+# Dateiformate der Artefakte: Endung -> (Speichern, Laden)
+FORMATS = {
+    ".png": (lambda path, image: cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, 3]),
+             lambda path: cv2.imread(path, cv2.IMREAD_UNCHANGED)),
+    ".jpg": (lambda path, image: cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 90]),
+             lambda path: cv2.imread(path, cv2.IMREAD_UNCHANGED)),
+    ".npy": (lambda path, array: np.save(path, array),
+             lambda path: np.load(path)),
+}
+
+
+class ArtifactStore:
+    """
+    Ablage für abgeleitete Ergebnisse (Kantenbilder, Vorschaubilder, Modelleingaben, ...).
+
+    Schlüssel ist der Inhalt, nicht der Dateiname: SHA-1 der Quelldatei, Name der
+    Transformation und ihre Parameter. Gleiche Dateinamen aus verschiedenen Serien
+    überschreiben sich daher nicht, und eine Transformation mit denselben Parametern
+    wird für dieselbe Quelle nur einmal berechnet (auch über Neustarts und Prozesse hinweg).
+
+    Die Gesamtgröße ist begrenzt: Wird sie überschritten, werden die am längsten nicht
+    mehr benutzten Artefakte gelöscht (LRU). Ein SQLite-Index hält Transformation,
+    Parameter, Quelle, Größe und letzten Zugriff jedes Artefakts fest.
+
+    Beispiel:
+        store = ArtifactStore()
+        edges = store.cached("bild.CR2", "canny", {"low": 150, "high": 160},
+                             lambda: cv2.Canny(...), ".png")
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifacts (
+            digest TEXT PRIMARY KEY, transform TEXT, params TEXT, source_sha1 TEXT,
+            file TEXT, size INTEGER, created REAL, last_access REAL
+        );
+        CREATE INDEX IF NOT EXISTS artifacts_access ON artifacts (last_access);
+        CREATE TABLE IF NOT EXISTS sources (
+            path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT
+        );
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Parameter:
+        -----------
+        directory : str
+            Verzeichnis der Artefakte und des Index. Standard: config.artifact_directory
+        max_bytes : int
+            Maximale Gesamtgröße aller Artefakte in Bytes. Standard: config.artifact_max_bytes
+        """
+        self.directory = directory or config.artifact_directory
+        self.max_bytes = config.artifact_max_bytes if max_bytes is None else max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Zähler für Treffer, Neuberechnungen und verdrängte Artefakte
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        # Mehrere Prozesse (batch_edges) teilen sich den Index: WAL + Wartezeit bei Sperren
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def source_hash(self, path):
+        """
+        SHA-1 der Quelldatei. Wird pro (Pfad, Änderungszeit, Größe) nur einmal berechnet.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT sha1 FROM sources WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (path, stat.st_mtime_ns, stat.st_size)
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        sha1 = file_hash(path)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (path, stat.st_mtime_ns, stat.st_size, sha1)
+            )
+        return sha1
+
+    def key(self, source, transform, params=None):
+        """
+        Schlüssel eines Artefakts.
+
+        Parameter:
+        -----------
+        source : str
+            Pfad der Quelldatei.
+        transform : str
+            Name der Transformation, z. B. 'canny'.
+        params : dict
+            Parameter der Transformation (Reihenfolge egal).
+
+        Rückgabewert:
+        --------------
+        digest, source_sha1, params_json : str, str, str
+        """
+        source_sha1 = self.source_hash(source)
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        digest = hashlib.sha1(f"{source_sha1}\0{transform}\0{params_json}".encode("utf-8")).hexdigest()
+        return digest, source_sha1, params_json
+
+    def _file(self, digest, extension):
+        # Zwei Ebenen, damit kein Verzeichnis zu viele Einträge bekommt
+        return os.path.join(digest[:2], digest + extension)
+
+    def path(self, source, transform, params=None):
+        """
+        Pfad des gespeicherten Artefakts oder None, falls es (noch) nicht existiert.
+        Zählt als Zugriff für die LRU-Verdrängung.
+        """
+        digest = self.key(source, transform, params)[0]
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT file FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+            path = os.path.join(self.directory, row[0])
+            if not os.path.isfile(path):
+                self._connection.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+                return None
+            self._connection.execute(
+                "UPDATE artifacts SET last_access = ? WHERE digest = ?", (time.time(), digest)
+            )
+        return path
+
+    def get(self, source, transform, params=None):
+        """
+        Lädt das Artefakt oder gibt None zurück.
+        """
+        path = self.path(source, transform, params)
+        if path is None:
+            return None
+        try:
+            value = FORMATS[os.path.splitext(path)[1]][1](path)
+        except OSError:
+            # Zwischen path() und dem Laden von einem anderen Prozess verdrängt
+            return None
+        if value is not None:
+            self.hits += 1
+        return value
+
+    def put(self, source, transform, params, value, extension=".png"):
+        """
+        Speichert ein Artefakt und verdrängt bei Bedarf alte Artefakte.
+
+        Parameter:
+        -----------
+        value : np.ndarray
+            Bild bzw. Array.
+        extension : str
+            '.png' (verlustfrei), '.jpg' oder '.npy' (beliebige Arrays).
+
+        Rückgabewert:
+        --------------
+        str
+            Pfad des gespeicherten Artefakts.
+        """
+        digest, source_sha1, params_json = self.key(source, transform, params)
+        file = self._file(digest, extension)
+        path = os.path.join(self.directory, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Erst vollständig schreiben, dann umbenennen: andere Prozesse sehen nie halbe Dateien
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp{extension}"
+        FORMATS[extension][0](tmp_path, value)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, transform, params_json, source_sha1, file, os.path.getsize(path), now, now)
+            )
+        self.evict()
+        return path
+
+    def cached(self, source, transform, params, compute, extension=".png"):
+        """
+        Gibt das gespeicherte Artefakt zurück oder berechnet es mit compute() und speichert es.
+        """
+        value = self.get(source, transform, params)
+        if value is not None:
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(source, transform, params, value, extension)
+        return value
+
+    @property
+    def total_bytes(self):
+        """
+        Gesamtgröße aller Artefakte laut Index.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """
+        Löscht die am längsten nicht benutzten Artefakte, bis die Gesamtgröße
+        höchstens max_bytes (Standard: self.max_bytes) beträgt.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock, self._connection:
+            total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            evicted = []
+            for digest, file, size in self._connection.execute(
+                "SELECT digest, file, size FROM artifacts ORDER BY last_access"
+            ):
+                if total <= max_bytes:
+                    break
+                evicted.append((digest, file))
+                total -= size
+            for digest, file in evicted:
+                try:
+                    os.remove(os.path.join(self.directory, file))
+                except FileNotFoundError:
+                    pass
+            self._connection.executemany("DELETE FROM artifacts WHERE digest = ?", [(d,) for d, _ in evicted])
+        self.evicted += len(evicted)
+        return len(evicted)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """
+    Gibt den gemeinsamen ArtifactStore des Prozesses zurück (wird beim ersten Aufruf angelegt).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore()
+        return _default_store
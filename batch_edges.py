@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from artifact_store import default_store
+from raw_image import IMAGE_EXTENSIONS
+from transformations import canny_edge_detection, edge_output_name
+
+
+def find_jobs(input_directory, output_directory, force=False):
+    """
+    Durchsucht 'input_directory' rekursiv nach Bildern und gibt die Aufträge zurück.
+    Die Ordnerstruktur wird unter 'output_directory' nachgebildet. Das
+    Ausgabeverzeichnis selbst wird übersprungen, falls es im Eingabeverzeichnis liegt.
+
+    Rückgabewert:
+    --------------
+    jobs, skipped : list, int
+        Liste von (Eingabepfad, Ausgabepfad, Dateigröße) und Anzahl der Bilder,
+        deren Kantenbild bereits aktuell ist (jünger als das Original).
+    """
+    output_directory = os.path.abspath(output_directory)
+    jobs = []
+    skipped = 0
+    for root, dirs, files in os.walk(input_directory):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != output_directory)
+        relative = os.path.relpath(root, input_directory)
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            target = os.path.normpath(os.path.join(output_directory, relative, edge_output_name(name)))
+            stat = os.stat(source)
+            if not force and os.path.isfile(target) and os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                skipped += 1
+                continue
+            jobs.append((source, target, stat.st_size))
+    return jobs, skipped
+
+
+def process(source, target, low_threshold, high_threshold, aperture_size, reduce=1, use_store=False):
+    """
+    Arbeitsprozess: Kantendetektion für ein Bild, Ergebnis nach 'target' schreiben.
+    Mit 'use_store' wird ein bereits berechnetes Kantenbild aus dem Artefakt-Speicher
+    übernommen (gleicher Inhalt und gleiche Parameter, auch aus anderen Ordnern).
+    Gibt (Eingabepfad, Fehlermeldung oder None) zurück.
+    """
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        store = default_store() if use_store else None
+        canny_edge_detection(source, low_threshold, high_threshold, aperture_size, fout=target, reduce=reduce,
+                             store=store)
+        return source, None
+    except Exception as e:
+        return source, str(e)
+
+
+def run(jobs, low_threshold, high_threshold, aperture_size, workers=None, prefetch=2, reduce=1,
+        report_interval=2.0, use_store=False):
+    """
+    Verarbeitet alle Aufträge mit einem Prozess-Pool.
+
+    Es sind höchstens 'prefetch' Bilder pro Arbeitsprozess gleichzeitig in Arbeit,
+    damit nie mehr dekodierte Bilder als nötig im Speicher liegen (20-MP-Bilder
+    belegen dekodiert ca. 60 MB).
+
+    Rückgabewert:
+    --------------
+    done, errors, duration : int, list, float
+        Anzahl erfolgreich verarbeiteter Bilder, Liste von (Pfad, Fehlermeldung), Laufzeit in s.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max(1, workers * prefetch)
+    total = len(jobs)
+    total_bytes = sum(size for _, _, size in jobs)
+    sizes = {source: size for source, _, size in jobs}
+
+    done = 0
+    done_bytes = 0
+    errors = []
+    start = time.perf_counter()
+    last_report = start
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(jobs)
+        while True:
+            # Neue Aufträge nur nachlegen, solange das Limit nicht erreicht ist
+            for source, target, _ in queue:
+                pending.add(pool.submit(
+                    process, source, target, low_threshold, high_threshold, aperture_size, reduce, use_store
+                ))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source, error = future.result()
+                if error is None:
+                    done += 1
+                    done_bytes += sizes[source]
+                else:
+                    errors.append((source, error))
+
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                last_report = now
+                elapsed = now - start
+                print(f"{done + len(errors)}/{total} Bilder, "
+                      f"{done / elapsed:.1f} Bilder/s, {done_bytes / elapsed / 1e6:.1f} MB/s "
+                      f"({done_bytes / 1e6:.0f} von {total_bytes / 1e6:.0f} MB)")
+
+    return done, errors, time.perf_counter() - start
+
+
+def main(argv=None):
+    """
+    Kommandozeile: Canny-Kantendetektion für einen ganzen Ordnerbaum.
+    """
+    parser = argparse.ArgumentParser(description="Canny-Kantendetektion für alle Bilder eines Ordnerbaums (parallel)")
+    parser.add_argument("input", help="Eingabeverzeichnis, z. B. captured_images")
+    parser.add_argument("--output", "-o", required=True, help="Ausgabeverzeichnis (Ordnerstruktur wird nachgebildet)")
+    parser.add_argument("--low", type=int, default=150, help="Untere Schwelle für Canny")
+    parser.add_argument("--high", type=int, default=160, help="Obere Schwelle für Canny")
+    parser.add_argument("--aperture", type=int, default=3, choices=(3, 5, 7), help="Aperture-Größe für Sobel")
+    parser.add_argument("--reduce", type=int, default=1, choices=(1, 2, 4, 8),
+                        help="Bilder beim Dekodieren um diesen Faktor verkleinern")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--prefetch", type=int, default=2, help="Gleichzeitige Aufträge pro Prozess")
+    parser.add_argument("--force", action="store_true", help="Auch aktuelle Kantenbilder neu berechnen")
+    parser.add_argument("--store", action="store_true",
+                        help="Kantenbilder im Artefakt-Speicher nachschlagen bzw. dort ablegen")
+    args = parser.parse_args(argv)
+
+    jobs, skipped = find_jobs(args.input, args.output, force=args.force)
+    print(f"{len(jobs)} Bilder zu verarbeiten, {skipped} bereits aktuell.")
+    if not jobs:
+        return 0
+
+    done, errors, duration = run(
+        jobs, args.low, args.high, args.aperture, workers=args.workers, prefetch=args.prefetch,
+        reduce=args.reduce, use_store=args.store
+    )
+    total_bytes = sum(size for _, _, size in jobs)
+    for source, error in errors:
+        print(f"Fehler bei {source}: {error}")
+    print(f"Fertig: {done} Bilder in {duration:.1f}s "
+          f"({done / duration:.1f} Bilder/s, {total_bytes / duration / 1e6:.1f} MB/s), {len(errors)} Fehler.")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import camera
+
+
+def run_per_shot(session, shots, directory):
+    """
+    Altes Verhalten: Für jede Aufnahme wird die Kamera neu geöffnet und wieder geschlossen.
+    """
+    start = time.perf_counter()
+    for i in range(shots):
+        session.open()
+        session.capture(os.path.join(directory, f"per_shot_{i}.CR2"))
+        session.close()
+    return time.perf_counter() - start
+
+
+def run_session(session, shots, directory):
+    """
+    Neues Verhalten: Die Kamera wird einmal pro Serie geöffnet und wiederverwendet.
+    """
+    start = time.perf_counter()
+    session.open()
+    for i in range(shots):
+        session.capture(os.path.join(directory, f"session_{i}.CR2"))
+    session.close()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durchsatz: Kamera pro Aufnahme öffnen vs. langlebige Session")
+    parser.add_argument("--shots", type=int, default=10, help="Anzahl Aufnahmen pro Durchlauf")
+    parser.add_argument("--hardware", action="store_true", help="Echte Kamera über gphoto2 statt Attrappe verwenden")
+    parser.add_argument("--open-delay", type=float, default=2.0, help="Simulierte Öffnungszeit der Attrappe (s)")
+    parser.add_argument("--exposure-delay", type=float, default=0.2, help="Simulierte Belichtungszeit (s)")
+    parser.add_argument("--download-delay", type=float, default=1.0, help="Simulierte Download-Zeit (s)")
+    args = parser.parse_args()
+
+    if args.hardware:
+        session = camera.GPhoto2Session()
+    else:
+        session = camera.FakeCameraSession(
+            open_delay=args.open_delay,
+            exposure_delay=args.exposure_delay,
+            download_delay=args.download_delay
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        per_shot = run_per_shot(session, args.shots, directory)
+        persistent = run_session(session, args.shots, directory)
+
+    print(f"Aufnahmen:            {args.shots}")
+    print(f"Pro Aufnahme öffnen:  {per_shot:.2f} s ({args.shots / per_shot:.2f} Bilder/s)")
+    print(f"Langlebige Session:   {persistent:.2f} s ({args.shots / persistent:.2f} Bilder/s)")
+    print(f"Beschleunigung:       {per_shot / persistent:.2f}x")
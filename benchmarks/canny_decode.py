@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+
+import cv2
+import numpy as np
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformations import canny_edge_detection, load_gray
+
+MODES = ("baseline", "legacy", "gray", "reduced_2", "reduced_4", "reduced_8", "array")
+
+
+def legacy(path):
+    """
+    Bisheriger Ablauf: Farbbild dekodieren, in Graustufen umwandeln, Canny.
+    """
+    image = cv2.imread(path)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.Canny(gray, 150, 160, apertureSize=3)
+
+
+def peak_rss_mb():
+    """
+    Spitzen-RSS des eigenen Prozesses in MB (VmHWM, Linux). Anders als
+    ru_maxrss wird der Wert bei execve zurückgesetzt und enthält daher nicht
+    den Speicher des Elternprozesses.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_mode(mode, path, repeat):
+    """
+    Läuft in einem eigenen Prozess, damit die Spitzen-RSS jedes Modus getrennt messbar ist.
+    Gibt die mittlere Laufzeit in ms zurück.
+    """
+    if mode == "baseline":
+        # Nur Importe: Grundlast des Prozesses
+        return 0.0
+    if mode == "array":
+        # Einmal dekodiertes Graustufenbild als Memory-Map, wie bei Parameter-Sweeps
+        gray = load_gray(path)
+        mapped = np.lib.format.open_memmap(path + ".npy", mode="w+", dtype=np.uint8, shape=gray.shape)
+        mapped[:] = gray
+        del gray
+        function = lambda: canny_edge_detection(mapped, 150, 160, 3)
+    elif mode == "legacy":
+        function = lambda: legacy(path)
+    else:
+        # Ergebnis in den temporären Ordner schreiben (wie canny_edge_detection im Normalbetrieb)
+        fout = os.path.join(os.path.dirname(path), "edges.png")
+        reduce = 1 if mode == "gray" else int(mode.split("_")[1])
+        function = lambda: canny_edge_detection(path, 150, 160, 3, fout=fout, reduce=reduce)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Canny: Farbbild + cvtColor vs. Graustufen / reduziert dekodieren")
+    parser.add_argument("--file", help="Eigenes Testbild (Standard: synthetisches 20-MP-JPEG)")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen pro Modus")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Kindprozess: einen Modus messen und Ergebnis ausgeben
+        duration = run_mode(args.mode, args.file, args.repeat)
+        print(f"{duration} {peak_rss_mb()}")
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = args.file
+        if path is None:
+            path = os.path.join(folder, "image.jpg")
+            rng = np.random.default_rng(0)
+            image = cv2.GaussianBlur(rng.integers(0, 255, (3648, 5472, 3), dtype=np.uint8), (0, 0), 3)
+            cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            del image
+        elif not os.path.isfile(path):
+            sys.exit(f"Datei nicht gefunden: {path}")
+
+        # Kopie im temporären Ordner, damit der Modus 'array' dort seine .npy ablegen kann
+        work_path = os.path.join(folder, "input" + os.path.splitext(path)[1])
+        if path != work_path:
+            with open(path, "rb") as source, open(work_path, "wb") as target:
+                target.write(source.read())
+
+        results = {}
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode,
+                 "--file", work_path, "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            results[mode] = (float(output[0]), float(output[1]))
+
+    baseline = results.pop("baseline")[1]
+    print(f"Grundlast des Prozesses (Importe): {baseline:.0f} MB")
+    print(f"{'Modus':<12} {'Latenz':>10} {'Spitzen-RSS':>13}")
+    for mode, (duration, peak) in results.items():
+        print(f"{mode:<12} {duration:>8.1f}ms {peak - baseline:>10.0f} MB")
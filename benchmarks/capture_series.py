@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import camera
+from series import SeriesExecutor
+from schrittmotor_simulator import SimulatedStepper
+
+
+def make_camera(args):
+    """
+    Kamera-Attrappe mit den Zeiten aus der Kommandozeile (bereits geöffnet).
+    """
+    session = camera.FakeCameraSession(
+        open_delay=0.0,
+        exposure_delay=args.exposure_delay,
+        download_delay=args.download_delay,
+        file_size=1024
+    )
+    cam = camera.Camera(session=session)
+    cam.open()
+    return cam
+
+
+def run_serial(cam, stepper, shots, folder, settle_time):
+    """
+    Bisheriger Ablauf aus app.py: Bewegen, Warten, Aufnehmen inkl. Download, nacheinander.
+    """
+    degree_step = 360 / shots
+    start = time.perf_counter()
+    for i in range(shots):
+        stepper.move_by_degree(degree_step, delay=0.001)
+        time.sleep(settle_time)
+        cam.set_file_path(folder)
+        cam.set_file_name(f"serial_{i}.CR2")
+        cam.capture_image()
+    return time.perf_counter() - start
+
+
+def run_pipelined(cam, stepper, shots, folder):
+    """
+    Neuer Ablauf: SeriesExecutor mit Rampen, ohne Wartezeit, Download parallel zur Bewegung.
+    """
+    start = time.perf_counter()
+    for _ in SeriesExecutor(cam, stepper, settle_time=0.0).run(shots, folder):
+        pass
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durchsatz einer Bilderserie mit Motor-Simulator und Kamera-Attrappe")
+    parser.add_argument("--shots", type=int, default=36, help="Anzahl Aufnahmen der Serie")
+    parser.add_argument("--exposure-delay", type=float, default=0.2, help="Simulierte Belichtungszeit (s)")
+    parser.add_argument("--download-delay", type=float, default=1.0, help="Simulierte Download-Zeit (s)")
+    parser.add_argument("--settle-time", type=float, default=0.5, help="Wartezeit nach jeder Bewegung im alten Ablauf (s)")
+    args = parser.parse_args()
+
+    # Ausgaben der einzelnen Bewegungen unterdrücken
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as folder, open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            serial = run_serial(make_camera(args), SimulatedStepper(), args.shots, folder, args.settle_time)
+            pipelined = run_pipelined(make_camera(args), SimulatedStepper(), args.shots, folder)
+        finally:
+            sys.stdout = stdout
+
+    print(f"Aufnahmen:          {args.shots}")
+    print(f"Seriell (bisher):   {serial:.2f} s ({serial / args.shots:.2f} s/Bild)")
+    print(f"Pipeline + Rampen:  {pipelined:.2f} s ({pipelined / args.shots:.2f} s/Bild)")
+    print(f"Beschleunigung:     {serial / pipelined:.2f}x")
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import subprocess
+
+import numpy as np
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from raw_image import IMAGE_EXTENSIONS
+
+
+def peak_rss_mb():
+    """
+    Spitzen-RSS des eigenen Prozesses in MB (VmHWM, Linux).
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_test_set(directory, limit):
+    """
+    Liest die Testbilder mit Labels wie flow_from_directory: Klassen = Unterordner in
+    alphabetischer Reihenfolge, die zweite Klasse hat das Label 1. Die Bilder werden
+    abwechselnd aus allen Klassen genommen (wie model_export.calibration_images), damit
+    auch mit --limit jede Klasse vertreten ist; dekodiert werden nur die ausgewählten.
+    """
+    from inference import preprocess
+
+    classes = sorted(d.name for d in os.scandir(directory) if d.is_dir())
+    per_class = [
+        [(os.path.join(directory, name, file_name), label)
+         for file_name in sorted(os.listdir(os.path.join(directory, name)))
+         if file_name.lower().endswith(IMAGE_EXTENSIONS)]
+        for label, name in enumerate(classes)
+    ]
+    samples = [sample for group in itertools.zip_longest(*per_class) for sample in group if sample is not None]
+    if limit:
+        samples = samples[:limit]
+    images = [preprocess(path, roi="full") for path, _ in samples]
+    return np.stack(images), np.array([label for _, label in samples])
+
+
+def measure(model_path, test_dir, limit, repeat):
+    """
+    Läuft in einem eigenen Prozess: Ladezeit, Latenz (Batch 1 und 16), Genauigkeit, Spitzen-RSS.
+    """
+    start = time.perf_counter()
+    from inference import load_model
+    predict = load_model(model_path)
+    load_time = time.perf_counter() - start
+
+    images, labels = load_test_set(test_dir, limit)
+    predict(images[:1])  # Aufwärmen
+
+    latencies = []
+    for batch_size in (1, 16):
+        batch = images[:batch_size]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            predict(batch)
+        latencies.append((time.perf_counter() - start) / repeat / len(batch) * 1000)
+
+    probabilities = np.concatenate([
+        np.asarray(predict(images[i:i + 16])).reshape(-1) for i in range(0, len(images), 16)
+    ])
+    accuracy = float(np.mean((probabilities > 0.5) == labels))
+    return load_time, latencies[0], latencies[1], accuracy, peak_rss_mb()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fehlererkennung: Keras (.h5) vs. TensorFlow Lite (float/int8)")
+    parser.add_argument("models", nargs="*", help="Modelldateien (Standard: config.model_path und exportierte .tflite-Dateien)")
+    parser.add_argument("--test-dir", default="data/test", help="Testbilder mit Klassen-Unterordnern")
+    parser.add_argument("--limit", type=int, default=0, help="Höchstens so viele Testbilder (0 = alle)")
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen für die Latenzmessung")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Kindprozess: genau ein Modell messen, damit RSS und Ladezeit nicht vermischt werden
+        print(*measure(args.models[0], args.test_dir, args.limit, args.repeat))
+        sys.exit(0)
+
+    models = args.models
+    if not models:
+        root = os.path.splitext(config.model_path)[0]
+        models = [path for path in (config.model_path, root + ".tflite", root + "_int8.tflite") if os.path.exists(path)]
+    if not models:
+        sys.exit("Kein Modell gefunden. Erst trainieren bzw. mit model_export.py exportieren.")
+
+    print(f"{'Modell':<36} {'Laden':>8} {'Batch 1':>10} {'Batch 16':>10} {'Genauigkeit':>12} {'Spitzen-RSS':>12}")
+    for model_path in models:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), model_path, "--child",
+             "--test-dir", args.test_dir, "--limit", str(args.limit), "--repeat", str(args.repeat)],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            lines = (output.stderr.strip() or output.stdout.strip()).splitlines()
+            message = lines[-1] if lines else f"Exitcode {output.returncode}"
+            print(f"{model_path:<36} Fehler: {message}")
+            continue
+        load_time, batch_1, batch_16, accuracy, rss = map(float, output.stdout.split()[-5:])
+        print(f"{os.path.basename(model_path):<36} {load_time:>7.2f}s {batch_1:>7.2f}ms/B {batch_16:>7.2f}ms/B "
+              f"{accuracy:>11.1%} {rss:>9.0f} MB")
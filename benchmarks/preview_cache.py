@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import cv2
+import numpy as np
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preview import PreviewCache
+
+
+def make_image(path, width, height):
+    """
+    Schreibt ein Testbild mit Struktur (Rauschen + Kreise), damit JPEG realistisch groß wird.
+    """
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(50):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(image, center, int(rng.integers(50, 600)), (i * 5, 255 - i * 5, 128), 20)
+    cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+
+def measure(function, repeat):
+    """
+    Mittlere Laufzeit von 'function' in Millisekunden.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vorschaubilder: Original dekodieren vs. Platten- und Speicher-Cache")
+    parser.add_argument("--images", type=int, default=5, help="Anzahl Testbilder")
+    parser.add_argument("--width", type=int, default=5472, help="Breite der Testbilder (Canon EOS 70D: 5472)")
+    parser.add_argument("--height", type=int, default=3648, help="Höhe der Testbilder (Canon EOS 70D: 3648)")
+    parser.add_argument("--size", type=int, default=1280, help="Längere Seite der Vorschau in Pixeln")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, f"image_{i}.jpg") for i in range(args.images)]
+        for path in paths:
+            make_image(path, args.width, args.height)
+        store = os.path.join(folder, "previews")
+
+        # Bisher: bei jedem Rerun volles Bild dekodieren
+        full = measure(lambda: [cv2.imread(path) for path in paths], 1) / args.images
+
+        # Erster Aufruf: dekodieren, verkleinern, auf Platte speichern
+        cache = PreviewCache(directory=store)
+        cold = measure(lambda: [cache.load(path, args.size) for path in paths], 1) / args.images
+
+        # Neuer Prozess bzw. Speicher geleert: Vorschau von der Platte
+        cache.clear_memory()
+        disk = measure(lambda: [cache.load(path, args.size) for path in paths], 1) / args.images
+
+        # Rerun: Vorschau aus dem LRU-Speicher
+        memory = measure(lambda: [cache.load(path, args.size) for path in paths], 20) / args.images
+
+        print(f"Bilder: {args.images} x {args.width}x{args.height}, Vorschau {args.size}px")
+        print(f"Original dekodieren (bisher): {full:8.2f} ms/Bild")
+        print(f"Vorschau erzeugen (einmalig): {cold:8.2f} ms/Bild")
+        print(f"Vorschau von der Platte:      {disk:8.2f} ms/Bild")
+        print(f"Vorschau aus dem Speicher:    {memory:8.3f} ms/Bild")
+        print(f"Speicherbedarf im LRU:        {cache.memory_bytes / 1e6:8.1f} MB")
@@ -0,0 +1,46 @@
+import os
+import sys
+import argparse
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pulse_engine import PulseEngine, SimulatedLine, busy_wait
+
+
+def run_mode(mode, steps, rate, realtime, pulse_width):
+    """
+    Erzeugt 'steps' Pulse mit 'rate' Schritten/s auf einer simulierten Leitung.
+    """
+    line = SimulatedLine()
+    engine = PulseEngine(mode=mode, realtime=realtime)
+    if mode == "hybrid":
+        engine.calibrate()
+
+    def pulse():
+        line.set_value(1)
+        busy_wait(pulse_width)
+        line.set_value(0)
+
+    stats = engine.run(pulse, [1.0 / rate] * steps)
+
+    # Gegenprobe über die aufgezeichneten Flanken der simulierten Leitung
+    edges = line.rising_edges()
+    periods = [(b - a) / 1000.0 for a, b in zip(edges, edges[1:])]
+    worst_period = max(periods) if periods else 0.0
+    return stats, worst_period
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timing-Genauigkeit der PulseEngine auf einer simulierten GPIO-Leitung")
+    parser.add_argument("--steps", type=int, default=2000, help="Anzahl der Pulse pro Modus")
+    parser.add_argument("--rate", type=float, default=2000.0, help="Soll-Schrittrate in Schritten/s")
+    parser.add_argument("--realtime", action="store_true", help="SCHED_FIFO-Thread verwenden (benötigt Rechte)")
+    parser.add_argument("--pulse-width", type=float, default=0.00001, help="Pulsbreite in s")
+    args = parser.parse_args()
+
+    print(f"Soll: {args.rate:.0f} Schritte/s, Periode {1e6 / args.rate:.1f}µs")
+    for mode in PulseEngine.MODES:
+        stats, worst_period = run_mode(mode, args.steps, args.rate, args.realtime, args.pulse_width)
+        print(f"{mode:>6}: {stats}")
+        print(f"        längste gemessene Periode auf der Leitung: {worst_period:.1f}µs")
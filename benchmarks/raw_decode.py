@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import cv2
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import raw_image
+from artifact_store import ArtifactStore
+
+
+def timed(label, function):
+    """
+    Führt 'function' einmal aus und gibt Laufzeit und Bildgröße aus.
+    """
+    start = time.perf_counter()
+    image = function()
+    duration = time.perf_counter() - start
+    print(f"  {label:<36} {duration * 1000:8.1f} ms  {image.shape[1]}x{image.shape[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dekodierzeit von RAW-Dateien je Modus (Vorschau-JPEG vs. Demosaicing)")
+    parser.add_argument("files", nargs="+", help="RAW-Dateien, z. B. captured_images/serie/*.CR2")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        # Eigener Artefakt-Speicher, damit der erste Analyse-Aufruf wirklich dekodiert
+        store = ArtifactStore(cache_directory)
+
+        for path in args.files:
+            print(f"{path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+            timed("Vorschau-JPEG", lambda: raw_image.read_preview(path))
+            timed("Vorschau-JPEG, 1/4 Auflösung", lambda: raw_image.read_preview(path, cv2.IMREAD_REDUCED_COLOR_4))
+            timed("Vorschau-JPEG, Graustufen", lambda: raw_image.read_preview(path, cv2.IMREAD_GRAYSCALE))
+            if raw_image.rawpy is None:
+                print("  Demosaicing übersprungen (rawpy nicht installiert)")
+                continue
+            timed("Demosaicing, halbe Auflösung", lambda: raw_image.read_linear(path, half_size=True, cache=False))
+            timed("Demosaicing, voll (erzeugt Cache)", lambda: raw_image.read_linear(path, store=store))
+            timed("Demosaicing, aus dem Cache", lambda: raw_image.read_linear(path, store=store))
+
+    print()
+    print(raw_image.latency)
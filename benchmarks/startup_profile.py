@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Projektverzeichnis (für Importe und AppTest)
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIRECTORY)
+
+# Module, die app.py direkt oder bei Bedarf importiert
+MODULES = (
+    "config", "camera", "hardware", "series", "schrittmotor", "preview", "transformations",
+    "result_writer", "inference", "streamlit", "numpy", "cv2", "gpiod", "tensorflow",
+)
+
+
+def import_profile(module):
+    """
+    Importiert 'module' in einem frischen Prozess mit 'python -X importtime'.
+
+    Rückgabewert:
+    --------------
+    total, entries : float, list
+        Gesamtzeit des Imports in ms (None, falls das Modul fehlt) und Liste von
+        (eigene Zeit in ms, Modulname) aller dabei geladenen Module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=PROJECT_DIRECTORY
+    )
+    if result.returncode != 0:
+        return None, []
+
+    total = None
+    entries = []
+    for line in result.stderr.splitlines():
+        # Format: "import time:   self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((int(self_us) / 1000, name))
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, entries
+
+
+def app_timings():
+    """
+    Misst mit streamlit.testing den ersten Lauf von app.py (Kaltstart), einen Rerun
+    ohne Änderung und einen Rerun nach Verstellen eines Schiebereglers.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(PROJECT_DIRECTORY)
+    app = AppTest.from_file("app.py", default_timeout=120)
+    timings = []
+
+    start = time.perf_counter()
+    app.run()
+    timings.append(("Kaltstart (erster Lauf)", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    app.run()
+    timings.append(("Rerun ohne Änderung", time.perf_counter() - start))
+
+    sliders = [slider for slider in app.slider if slider.key == "low_threshold"]
+    if sliders:
+        start = time.perf_counter()
+        sliders[0].set_value(sliders[0].value + 1).run()
+        timings.append(("Rerun nach Schieberegler", time.perf_counter() - start))
+
+    if app.exception:
+        print(f"Hinweis: app.py meldete einen Fehler: {app.exception[0].message}")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importzeiten der Module und Kaltstart/Rerun von app.py")
+    parser.add_argument("--top", type=int, default=10, help="Anzahl der langsamsten Einzelmodule")
+    parser.add_argument("--no-app", action="store_true", help="app.py nicht mit streamlit.testing messen")
+    args = parser.parse_args()
+
+    print("Importzeit je Modul (frischer Prozess, inkl. aller Abhängigkeiten):")
+    slowest = {}
+    for module in MODULES:
+        total, entries = import_profile(module)
+        if total is None:
+            print(f"  {module:<16} nicht installiert")
+            continue
+        print(f"  {module:<16} {total:9.1f} ms")
+        for self_ms, name in entries:
+            slowest[name] = max(slowest.get(name, 0.0), self_ms)
+
+    print("\nLangsamste Einzelmodule (eigene Importzeit):")
+    for name, self_ms in sorted(slowest.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name.strip():<40} {self_ms:9.1f} ms")
+
+    if not args.no_app:
+        try:
+            timings = app_timings()
+        except ImportError:
+            print("\nstreamlit ist nicht installiert, app.py wird nicht gemessen.")
+        else:
+            print("\napp.py (streamlit.testing):")
+            for label, seconds in timings:
+                print(f"  {label:<28} {seconds * 1000:9.1f} ms")
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from inference import resize_for_model
+from training_data import list_images
+from decoded_cache import DecodedImageCache
+
+
+def decode_epoch(paths, batch_size, image_size):
+    """
+    Eine Epoche wie bisher: jedes Bild wird dekodiert und skaliert.
+    """
+    order = np.random.default_rng(0).permutation(len(paths))
+    for start in range(0, len(order), batch_size):
+        np.stack([resize_for_model(paths[i], image_size, "full") for i in order[start:start + batch_size]])
+
+
+def cache_epoch(cache, batch_size):
+    """
+    Eine Epoche aus dem memory-mapped Cache.
+    """
+    for images, labels in cache.batches(batch_size, seed=0):
+        images.sum()  # Daten tatsächlich lesen
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Epochenzeit: Dekodieren pro Epoche vs. memory-mapped Cache")
+    parser.add_argument("directory", nargs="?", default="data/train", help="Bilder mit Klassen-Unterordnern")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=3)
+    args = parser.parse_args()
+
+    image_size = tuple(config.model_input_size)
+    paths, _, _ = list_images(args.directory)
+    if not paths:
+        sys.exit(f"Keine Bilder in den Unterordnern von '{args.directory}' gefunden.")
+    print(f"{len(paths)} Bilder, Zielgröße {image_size[0]}x{image_size[1]}, {args.epochs} Epochen\n")
+
+    decode_time = min(timed(decode_epoch, paths, args.batch_size, image_size)[0] for _ in range(args.epochs))
+    print(f"{'Dekodieren pro Epoche':<40} {decode_time:8.2f}s pro Epoche")
+
+    cache_directory = tempfile.mkdtemp(prefix="training_cache_")
+    try:
+        build_time, cache = timed(DecodedImageCache, args.directory, image_size, "full", cache_directory)
+        print(f"{'Cache aufbauen (einmalig, parallel)':<40} {build_time:8.2f}s ({cache.decoded} dekodiert)")
+
+        open_time, cache = timed(DecodedImageCache, args.directory, image_size, "full", cache_directory)
+        print(f"{'Cache öffnen (nächster Trainingslauf)':<40} {open_time:8.2f}s ({cache.decoded} dekodiert)")
+
+        epoch_time = min(timed(cache_epoch, cache, args.batch_size)[0] for _ in range(args.epochs))
+        print(f"{'Epoche aus dem Cache':<40} {epoch_time:8.2f}s pro Epoche")
+        print(f"\nEpochenzeit {decode_time / epoch_time:.0f}x kürzer, "
+              f"Cache: {cache.images.nbytes / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(cache_directory)
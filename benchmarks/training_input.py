@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import argparse
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from training_data import image_dataset
+
+
+def image_data_generator(directory, image_size, batch_size):
+    """
+    Bisherige Eingabe-Pipeline aus examples/train_model.py.
+    """
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    datagen = ImageDataGenerator(rescale=1. / 255, shear_range=0.2, zoom_range=0.2, horizontal_flip=True)
+    generator = datagen.flow_from_directory(
+        directory, target_size=image_size, batch_size=batch_size, class_mode='binary'
+    )
+    return generator, generator.samples
+
+
+def epoch_generator(generator):
+    """
+    Eine Epoche aus dem ImageDataGenerator (der Iterator selbst endet nie).
+    """
+    for i in range(len(generator)):
+        yield generator[i]
+
+
+def measure(batches, samples):
+    """
+    Liest alle Batches einer Epoche und gibt die Bilder pro Sekunde zurück.
+    """
+    start = time.perf_counter()
+    count = 0
+    for images, labels in batches:
+        count += len(images)
+    elapsed = time.perf_counter() - start
+    assert count == samples, f"{count} statt {samples} Bilder gelesen"
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eingabe-Pipeline für das Training: ImageDataGenerator vs. tf.data")
+    parser.add_argument("directory", nargs="?", default="data/train", help="Bilder mit Klassen-Unterordnern")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=3, help="Anzahl gemessener Epochen je Pipeline")
+    args = parser.parse_args()
+
+    image_size = tuple(config.model_input_size)
+
+    print(f"{'Pipeline':<34} " + " ".join(f"{'Epoche ' + str(e + 1):>12}" for e in range(args.epochs)))
+
+    generator, samples = image_data_generator(args.directory, image_size, args.batch_size)
+    rates = [measure(epoch_generator(generator), samples) for _ in range(args.epochs)]
+    print(f"{'ImageDataGenerator':<34} " + " ".join(f"{rate:>8.0f} B/s" for rate in rates))
+
+    for label, cache in (("tf.data (ohne Cache)", False), ("tf.data (Cache im Speicher)", True)):
+        data = image_dataset(args.directory, image_size, args.batch_size, augment=True, cache=cache)
+        rates = [measure(data.dataset, data.samples) for _ in range(args.epochs)]
+        print(f"{label:<34} " + " ".join(f"{rate:>8.0f} B/s" for rate in rates))
+
+    print("\nB/s = Bilder pro Sekunde (inkl. Dekodieren, Skalieren und Augmentation, ohne Modell).")
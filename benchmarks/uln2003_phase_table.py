@@ -0,0 +1,121 @@
+import io
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import contextlib
+
+# Module aus dem Projektverzeichnis importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gpiod.line import Value
+
+from pulse_engine import PulseEngine
+from schrittmotor import StepperBase
+from schrittmotor_ULN2003_rp5 import StepperMotor
+
+
+class MockLines:
+    """
+    Ersatz für das LineRequest-Objekt von gpiod: zählt nur die Aufrufe.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def set_values(self, values):
+        self.calls += 1
+
+
+def make_stepper(lines):
+    """
+    Erzeugt einen StepperMotor ohne GPIO-Chip, der auf 'lines' schreibt. Die
+    PulseEngine wartet nicht (Modus 'spin', Periode 0), gemessen wird also nur
+    der Aufwand pro Schritt.
+    """
+    stepper = StepperMotor.__new__(StepperMotor)
+    StepperBase.__init__(stepper, 4096, PulseEngine(mode="spin"))
+    stepper.lines = lines
+    stepper.motor_pins = [17, 18, 27, 22]
+    stepper.step_sequence = [
+        [1, 0, 0, 1],
+        [1, 0, 0, 0],
+        [1, 1, 0, 0],
+        [0, 1, 0, 0],
+        [0, 1, 1, 0],
+        [0, 0, 1, 0],
+        [0, 0, 1, 1],
+        [0, 0, 0, 1]
+    ]
+    stepper.motor_step_counter = 0
+    stepper.direction = 'left'
+    stepper._build_phase_table()
+    return stepper
+
+
+def legacy_loop(stepper, steps):
+    """
+    Bisherige innere Schleife: pro Halbschritt ein neues Dictionary mit neuen Values.
+    """
+    for _ in range(steps):
+        values = {
+            pin: Value(val)
+            for pin, val in zip(stepper.motor_pins, stepper.step_sequence[stepper.motor_step_counter])
+        }
+        stepper.lines.set_values(values)
+        stepper.motor_step_counter = (stepper.motor_step_counter + 1) % 8
+
+
+def phase_table_loop(stepper, steps):
+    """
+    Neue innere Schleife: die Schrittfunktion, die StepperMotor an die PulseEngine übergibt.
+    """
+    step = stepper._step_function()
+    for _ in range(steps):
+        step()
+
+
+def move_loop(stepper, steps):
+    """
+    Ganze Bewegung über stepper.move(): Schrittfunktion und PulseEngine inkl.
+    Zeitstempel und Jitter-Statistik.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        stepper.move(steps, delay=0)
+
+
+def measure(loop, steps):
+    """
+    Misst Schritte/s und die Allokation pro Schritt (über tracemalloc).
+    """
+    stepper = make_stepper(MockLines())
+
+    start = time.perf_counter()
+    loop(stepper, steps)
+    rate = steps / (time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    loop(stepper, steps)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return rate, peak - before, (current - before) / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ULN2003: Dictionary pro Schritt vs. vorberechnete Phasentabelle")
+    parser.add_argument("--steps", type=int, default=200000, help="Anzahl Halbschritte pro Messung")
+    args = parser.parse_args()
+
+    loops = (
+        ("bisher (dict pro Schritt)", legacy_loop),
+        ("Phasentabelle", phase_table_loop),
+        ("stepper.move()", move_loop),
+    )
+    for name, loop in loops:
+        rate, peak, per_step = measure(loop, args.steps)
+        print(f"{name:>26}: {rate:>10.0f} Schritte/s, "
+              f"Spitzen-Allokation {peak} Bytes, verbleibend {per_step:.2f} Bytes/Schritt")
@@ -1,43 +1,407 @@
 import subprocess
 import os
+import re
+import shutil
+import queue
+import threading
 import time
 
+import config
+
+
+class CameraError(RuntimeError):
+    """
+    Fehler bei der Kommunikation mit der Kamera (bzw. mit der Kamera-Session).
+    """
+
+
+class GPhoto2Session:
+    """
+    Langlebige Kamera-Session über einen residenten `gphoto2 --shell`-Prozess.
+
+    Die Kamera wird beim Öffnen genau einmal über USB beansprucht und danach für
+    alle Aufnahmen wiederverwendet. Dadurch entfallen die Neuinitialisierung der
+    Kamera und das `pkill` vor jeder Aufnahme.
+
+    Die Bilder werden zunächst in ein Spool-Verzeichnis heruntergeladen und danach
+    an den gewünschten Zielpfad verschoben, da gphoto2 den Dateinamen im
+    Shell-Modus nicht pro Aufnahme ändern kann.
+
+    Sind mehrere Kameras angeschlossen, bedient jede Session über 'port' genau eine
+    davon und hat ein eigenes Spool-Verzeichnis (gleiche Dateinamen auf den Kameras).
+    """
+
+    # Muster in der Ausgabe von gphoto2
+    EXPOSED_PATTERN = re.compile(r"New file is in location (\S+) on the camera")
+    SAVED_PATTERN = re.compile(r"Saving file as (.+?)\s*$")
+    # Antwort auf 'lcd' (Sentinel-Kommando): erst danach hat gphoto2 die Datei fertig geschrieben
+    LCD_PATTERN = re.compile(r"Local directory now")
+    ERROR_PATTERN = re.compile(r"\*\*\* Error")
+
+    def __init__(self, spool_directory=None, timeout=60.0, port=None):
+        """
+        Parameter:
+        -----------
+        spool_directory : str
+            Verzeichnis, in das gphoto2 die Bilder zunächst herunterlädt.
+            Standard: config.camera_spool_directory
+        timeout : float
+            Maximale Wartezeit in Sekunden für eine Aufnahme inkl. Download.
+        port : str
+            gphoto2-Port der Kamera, z. B. 'usb:001,005' (siehe detect_cameras()).
+            None: die einzige angeschlossene Kamera.
+        """
+        self.spool_directory = os.path.abspath(spool_directory or config.camera_spool_directory)
+        if port is not None:
+            self.spool_directory = os.path.join(self.spool_directory, re.sub(r"\W+", "_", port))
+        self.port = port
+        self.timeout = timeout
+        self.process = None
+        self._output = queue.Queue()
+        self._reader = None
+
+    def is_open(self):
+        """
+        Gibt True zurück, solange der gphoto2-Shell-Prozess läuft.
+        """
+        return self.process is not None and self.process.poll() is None
+
+    def open(self):
+        """
+        Startet den gphoto2-Shell-Prozess (falls noch nicht geschehen).
+        """
+        if self.is_open():
+            return
+
+        os.makedirs(self.spool_directory, exist_ok=True)
+
+        cmd = [
+            "gphoto2",
+            "--shell",
+            "--force-overwrite",
+            "--filename", os.path.join(self.spool_directory, "%f.%C")
+        ]
+        if self.port is not None:
+            cmd += ["--port", self.port]
+        # gphoto2 puffert stdout, wenn es nicht an ein Terminal geht.
+        # Mit stdbuf wird zeilenweise ausgegeben, sodass wir das Ende eines Downloads sofort sehen.
+        if shutil.which("stdbuf"):
+            cmd = ["stdbuf", "-oL", "-eL"] + cmd
+
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        self._output = queue.Queue()
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        """
+        Liest die Ausgabe des Shell-Prozesses in einem Hintergrund-Thread in eine Queue.
+        """
+        for line in self.process.stdout:
+            self._output.put(line)
+        # None signalisiert das Ende des Prozesses
+        self._output.put(None)
+
+    def _drain_output(self):
+        """
+        Verwirft alte, noch nicht gelesene Ausgabezeilen (z. B. Prompts).
+        """
+        while True:
+            try:
+                self._output.get_nowait()
+            except queue.Empty:
+                return
+
+    def _send(self, command):
+        """
+        Schickt ein Kommando an die gphoto2-Shell.
+        """
+        self._drain_output()
+        self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+
+    def _wait_for(self, *patterns):
+        """
+        Wartet, bis eine Ausgabezeile auf eines der 'patterns' passt, und gibt
+        das passende Muster und den Match zurück.
+        Bei Fehlermeldungen, Prozessende oder Timeout wird ein CameraError ausgelöst.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CameraError("Zeitüberschreitung beim Warten auf gphoto2.")
+            try:
+                line = self._output.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise CameraError("Der gphoto2-Prozess wurde unerwartet beendet.")
+            if self.ERROR_PATTERN.search(line):
+                raise CameraError(f"gphoto2 meldet einen Fehler: {line.strip()}")
+            for pattern in patterns:
+                match = pattern.search(line)
+                if match:
+                    return pattern, match
+
+    def capture(self, target_path, on_exposed=None):
+        """
+        Löst die Kamera aus, lädt das Bild herunter und legt es unter 'target_path' ab.
+
+        Parameter:
+        -----------
+        target_path : str
+            Vollständiger Zielpfad der Bilddatei.
+        on_exposed : callable
+            Optional. Wird aufgerufen, sobald die Belichtung abgeschlossen ist und
+            der Download beginnt (z. B. um den Drehteller schon weiterzufahren).
+
+        Rückgabewert:
+        --------------
+        str
+            Der Zielpfad der gespeicherten Bilddatei.
+        """
+        if not self.is_open():
+            raise CameraError("Die Kamera-Session ist nicht geöffnet.")
+
+        self._send("capture-image-and-download")
+        pattern, match = self._wait_for(self.EXPOSED_PATTERN, self.SAVED_PATTERN)
+        if pattern is self.EXPOSED_PATTERN:
+            if on_exposed is not None:
+                on_exposed()
+            pattern, match = self._wait_for(self.SAVED_PATTERN)
+        elif on_exposed is not None:
+            # Keine Meldung zur Belichtung erhalten => spätestens jetzt melden
+            on_exposed()
+        spooled = match.group(1)
+
+        # "Saving file as" erscheint, bevor gphoto2 die Datei schreibt. Die Shell arbeitet
+        # die Kommandos nacheinander ab: Sobald sie auf ein weiteres Kommando antwortet,
+        # ist der Download vollständig.
+        self._send(f"lcd {self.spool_directory}")
+        self._wait_for(self.LCD_PATTERN)
+        if not os.path.isfile(spooled):
+            raise CameraError(f"gphoto2 hat die Datei nicht gespeichert: {spooled}")
+
+        # Aus dem Spool-Verzeichnis an den endgültigen Ort verschieben
+        shutil.move(spooled, target_path)
+        return target_path
+
+    def close(self):
+        """
+        Beendet die gphoto2-Shell und gibt damit die Kamera wieder frei.
+        """
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("exit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+class FakeCameraSession:
+    """
+    Kamera-Attrappe ohne Hardware. Bildet die Zeiten für das Öffnen der Kamera
+    (USB-Claim + Initialisierung), die Belichtung und den Download nach, sodass
+    sich der Durchsatz unterschiedlicher Aufnahme-Strategien messen lässt.
+    """
+
+    def __init__(self, open_delay=2.0, exposure_delay=0.2, download_delay=1.0,
+                 source_image=None, file_size=1024 * 1024, port=None):
+        """
+        Parameter:
+        -----------
+        open_delay : float
+            Simulierte Zeit in Sekunden für das Öffnen der Kamera.
+        exposure_delay : float
+            Simulierte Belichtungszeit in Sekunden.
+        download_delay : float
+            Simulierte Download-Zeit in Sekunden.
+        source_image : str
+            Optionales Bild, das bei jeder Aufnahme an den Zielpfad kopiert wird.
+        file_size : int
+            Größe der Platzhalter-Datei in Bytes, falls kein source_image angegeben ist.
+        port : str
+            Wird nur gespeichert (wie bei GPhoto2Session, ohne Bedeutung für die Attrappe).
+        """
+        self.open_delay = open_delay
+        self.exposure_delay = exposure_delay
+        self.download_delay = download_delay
+        self.source_image = source_image
+        self.file_size = file_size
+        self.port = port
+        self._open = False
+        self.captures = 0
+
+    def is_open(self):
+        """
+        Gibt True zurück, solange die simulierte Kamera geöffnet ist.
+        """
+        return self._open
+
+    def open(self):
+        """
+        Simuliert das Öffnen der Kamera (USB-Claim + Initialisierung).
+        """
+        if self._open:
+            return
+        time.sleep(self.open_delay)
+        self._open = True
+
+    def capture(self, target_path, on_exposed=None):
+        """
+        Simuliert Belichtung und Download und schreibt eine Bilddatei nach 'target_path'.
+        'on_exposed' wird wie bei GPhoto2Session nach der Belichtung aufgerufen.
+        """
+        if not self._open:
+            raise CameraError("Die Kamera-Session ist nicht geöffnet.")
+
+        time.sleep(self.exposure_delay)
+        if on_exposed is not None:
+            on_exposed()
+        time.sleep(self.download_delay)
+
+        if self.source_image is not None:
+            shutil.copyfile(self.source_image, target_path)
+        else:
+            with open(target_path, "wb") as f:
+                f.write(b"\0" * self.file_size)
+
+        self.captures += 1
+        return target_path
+
+    def close(self):
+        """
+        Schließt die simulierte Kamera.
+        """
+        self._open = False
+
+
+def create_session(backend="gphoto2", **kwargs):
+    """
+    Erzeugt eine Kamera-Session für das angegebene Backend.
+
+    Parameter:
+    -----------
+    backend : str
+        'gphoto2' für die echte Kamera, 'fake' für die Kamera-Attrappe.
+    kwargs :
+        Weitere Parameter für den Konstruktor der Session.
+    """
+    if backend == "gphoto2":
+        return GPhoto2Session(**kwargs)
+    if backend == "fake":
+        return FakeCameraSession(**kwargs)
+    raise ValueError("Backend muss entweder 'gphoto2' oder 'fake' sein.")
+
+
+def detect_cameras():
+    """
+    Listet die angeschlossenen Kameras (`gphoto2 --auto-detect`).
+    Löst FileNotFoundError aus, wenn gphoto2 nicht installiert ist.
+
+    Rückgabewert:
+    --------------
+    list
+        (Modell, Port) je Kamera, z. B. [("Canon EOS 70D", "usb:001,005")].
+    """
+    result = subprocess.run(["gphoto2", "--auto-detect"], capture_output=True, text=True)
+    cameras = []
+    for line in result.stdout.splitlines():
+        # Kopfzeile "Model  Port" und Trennlinie überspringen; Ports enthalten immer ':'
+        parts = line.rstrip().rsplit(None, 1)
+        if len(parts) == 2 and ":" in parts[1] and not line.startswith("-"):
+            cameras.append((parts[0].strip(), parts[1]))
+    return cameras
+
 
 class Camera:
     """
     Klasse für die Steuerung einer Kamera (Canon EOS 70D) über gphoto2.
+
+    Die Verbindung zur Kamera wird über eine Session gehalten, die beim ersten
+    capture_image() geöffnet und mit close() (oder am Ende eines with-Blocks)
+    wieder geschlossen wird. So wird die Kamera pro Bilderserie nur einmal geöffnet.
     """
 
-    def __init__(self):
+    def __init__(self, backend="gphoto2", session=None, port=None):
         """
-        Beim Instanzieren wird direkt geprüft, ob eine Canon EOS 70D
-        via gphoto2 erkannt wird. Gibt eine Meldung aus, wenn die
-        Kamera nicht gefunden wird.
+        Beim Instanzieren wird direkt geprüft, ob die Kamera (config.camera bzw.
+        eine Kamera am angegebenen Port) via gphoto2 erkannt wird. Gibt eine
+        Meldung aus, wenn die Kamera nicht gefunden wird.
+
+        Parameter:
+        -----------
+        backend : str
+            'gphoto2' (Standard) oder 'fake' für eine Kamera-Attrappe ohne Hardware.
+        session : object
+            Optional eine bereits erzeugte Session (überschreibt 'backend' und 'port').
+        port : str
+            gphoto2-Port, falls mehrere Kameras angeschlossen sind (siehe detect_cameras()).
         """
+        self.file_path = "."
+        self.file_name = "captured_image.CR2"
+        self.session = session if session is not None else create_session(backend, port=port)
+        self.port = getattr(self.session, "port", port)
+
+        if not isinstance(self.session, GPhoto2Session):
+            return
+
         try:
             # --auto-detect ermittelt automatisch verbundene Kameras
-            result = subprocess.run(
-                ["gphoto2", "--auto-detect"],
-                capture_output=True,
-                text=True
-            )
-            
-            # Prüfen, ob 'Canon EOS 70D' im Ausgabe-String enthalten ist
-            if "Canon EOS 70D" in result.stdout:
+            detected = detect_cameras()
+
+            # Prüfen, ob die Kamera am Port bzw. eine 'Canon EOS 70D' gefunden wurde
+            if self.port is not None:
+                found = any(port == self.port for _, port in detected)
+            else:
+                found = any(config.camera in model for model, _ in detected)
+            if found:
                 print("Kamera erfolgreich verbunden!")
             else:
                 print("Kamera nicht gefunden. Bitte überprüfen Sie die Verbindung.")
-        
+
         except FileNotFoundError:
             # Wenn gphoto2 nicht installiert ist oder nicht im PATH
             print("gphoto2 ist nicht installiert oder im Systempfad nicht verfügbar.")
         except Exception as e:
             print(f"Fehler bei der Überprüfung der Kamera-Verbindung: {e}")
 
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """
+        Öffnet die Kamera-Session. Wird von capture_image() bei Bedarf automatisch aufgerufen.
+        """
+        self.session.open()
+
+    def close(self):
+        """
+        Schließt die Kamera-Session und gibt die Kamera frei.
+        """
+        self.session.close()
+
     def set_file_name(self, file_name):
         """
         Setzt den Dateinamen für das aufgenommene Bild.
-        
+
         Parameter:
         -----------
         file_name : str
@@ -49,21 +413,28 @@ class Camera:
         """
         Setzt das Zielverzeichnis für das aufgenommene Bild und legt
         das Verzeichnis an, wenn es noch nicht existiert.
-        
+
         Parameter:
         -----------
         file_path : str
             Pfad zum gewünschten Verzeichnis, z. B. "./test_images"
         """
         self.file_path = file_path
-        
+
         # Verzeichnis erstellen, falls nicht vorhanden
         if not os.path.exists(file_path):
             os.makedirs(file_path)
 
-    def capture_image(self):
+    def capture_image(self, on_exposed=None):
         """
         Nimmt ein Bild auf und lädt es unter dem zuvor definierten Pfad und Dateinamen herunter.
+        Die Kamera-Session wird dabei wiederverwendet; ist sie abgebrochen (z. B. weil die
+        Kamera kurz getrennt war), wird sie einmal neu geöffnet.
+
+        Parameter:
+        -----------
+        on_exposed : callable
+            Optional. Wird nach der Belichtung aufgerufen, bevor der Download fertig ist.
 
         Rückgabewert:
         --------------
@@ -71,44 +442,34 @@ class Camera:
             Der komplette Pfad zur gespeicherten Bilddatei,
             falls alles erfolgreich lief. None bei Fehlern.
         """
+        target_path = f"{self.file_path}/{self.file_name}"
         try:
-            # Beende ggf. laufende gphoto2-Prozesse, um Konflikte zu vermeiden
-            subprocess.run(["pkill", "-f", "gphoto"])
-
-            # Befehl für Bildaufnahme und automatischen Download
-            cmd = [
-                "gphoto2", 
-                "--capture-image-and-download", 
-                "--filename", f"{self.file_path}/{self.file_name}"
-            ]
-
-            # Ausführen des Kommandos mit Popen, um Eingaben abzufangen
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            # Hier geben wir 'y' ein, falls gphoto2 eine Überschreibungsabfrage macht
-            stdout, stderr = process.communicate(input='y\n')
-
-            # Optional: Ausgabe von stdout/stderr zur Fehlerdiagnose
-            # print("STDOUT:", stdout)
-            # print("STDERR:", stderr)
-
-            # Return-Code prüfen, falls gewünscht
-            if process.returncode != 0:
-                print(f"Fehler beim Aufnehmen des Bildes (Returncode {process.returncode}):\n{stderr}")
-                return None
-
-            # Bild wurde erfolgreich gespeichert
-            return f"{self.file_path}/{self.file_name}"
-
+            if not self.session.is_open():
+                self.session.open()
         except FileNotFoundError:
+            # Nur beim Starten des Prozesses: das Programm gphoto2 fehlt
             print("gphoto2 ist nicht installiert oder im Systempfad nicht verfügbar.")
             return None
+        except Exception as e:
+            print(f"Fehler beim Öffnen der Kamera: {e}")
+            return None
+
+        try:
+            return self.session.capture(target_path, on_exposed)
+        except CameraError as e:
+            if self.session.is_open():
+                print(f"Fehler beim Aufnehmen des Bildes: {e}")
+                return None
+
+            # Session ist abgebrochen => einmal neu öffnen und erneut versuchen
+            print(f"Kamera-Session abgebrochen ({e}), verbinde neu...")
+            try:
+                self.session.close()
+                self.session.open()
+                return self.session.capture(target_path, on_exposed)
+            except Exception as e:
+                print(f"Fehler beim Aufnehmen des Bildes: {e}")
+                return None
         except Exception as e:
             print(f"Fehler beim Aufnehmen des Bildes: {e}")
             return None
@@ -116,17 +477,16 @@ class Camera:
 
 if __name__ == "__main__":
     # Beispielhafter Testaufruf, falls das Skript direkt ausgeführt wird
-    cam = Camera()
-
-    # Setze den Pfad und Dateinamen, hier mit Zeitstempel
-    output_path = "./test_images"
-    filename = f"{int(time.time())}_captured_image.CR2"
+    with Camera() as cam:
+        # Setze den Pfad und Dateinamen, hier mit Zeitstempel
+        output_path = "./test_images"
+        filename = f"{int(time.time())}_captured_image.CR2"
 
-    cam.set_file_path(output_path)
-    cam.set_file_name(filename)
+        cam.set_file_path(output_path)
+        cam.set_file_name(filename)
 
-    saved_file = cam.capture_image()
-    if saved_file:
-        print(f"Bild erfolgreich gespeichert unter: {saved_file}")
-    else:
-        print("Fehler bei der Bildaufnahme.")
\ No newline at end of file
+        saved_file = cam.capture_image()
+        if saved_file:
+            print(f"Bild erfolgreich gespeichert unter: {saved_file}")
+        else:
+            print("Fehler bei der Bildaufnahme.")
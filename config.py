@@ -1,4 +1,73 @@
 output_directory = "./captured_images"
+# Globaler Index aller Serien (SQLite, wird aus den Manifesten der Serien aufgebaut, siehe series_index.py)
+series_index_path = "./captured_images/.series_index.sqlite"
 number_of_images = 2
 camera = "Canon EOS 70D"
 
+# Kamera-Backend: 'gphoto2' für die echte Kamera, 'fake' für die Kamera-Attrappe ohne Hardware
+camera_backend = "gphoto2"
+
+# Zwischenablage für Downloads der gphoto2-Session (wird danach an den Zielpfad verschoben)
+camera_spool_directory = "./.camera_spool"
+
+# Schrittmotor-Backend: 'tb6600', 'uln2003' (gpiod, Raspberry Pi 5), 'uln2003_rpi' (RPi.GPIO) oder 'simulator'
+motor_backend = "tb6600"
+
+# Vorschaubilder für die Oberfläche: Verzeichnis, längere Bildseite in Pixeln und
+# maximale Größe aller Vorschaubilder im Arbeitsspeicher (Bytes)
+preview_directory = "./.preview_cache"
+preview_size = 1280
+preview_memory_budget = 256 * 1024 * 1024
+
+# Vorab dekodierte und skalierte Trainingsbilder (memory-mapped, siehe decoded_cache.py)
+training_cache_directory = "./.training_cache"
+
+# Gespeicherte Ergebnisbilder (z. B. Kantenbilder): Format 'png', 'jpg' oder 'webp' (verlustfrei),
+# PNG-Kompressionsstufe (0-9) und JPEG-Qualität (0-100)
+result_format = "png"
+result_png_compression = 3
+result_jpeg_quality = 95
+
+# Parameter-Sweep für Canny: Speicher für zwischengespeicherte Gradienten (Bytes) und
+# gewünschter Anteil der Kantenpixel für die automatische Parameterwahl
+sweep_memory_budget = 256 * 1024 * 1024
+sweep_target_density = 0.05
+
+# Bildausschnitt (ROI) für die Auswertung: None (ganzes Bild), 'auto' (Drehteller suchen)
+# oder (x, y, Breite, Höhe) in Pixeln bzw. relativ (alle Werte <= 1, mind. ein float, z. B. (0, 0.1, 1, 0.8))
+roi = None
+# Kachelgröße in Pixeln für speicherschonende Verarbeitung (None = ganzes Bild auf einmal)
+# und Rand um jede Kachel
+tile_size = None
+tile_overlap = 32
+
+# Fehlererkennung: Modell (.h5/.keras mit TensorFlow, .tflite mit TensorFlow Lite, siehe
+# model_export.py), Eingangsgröße (Höhe, Breite) und Micro-Batching (maximale Bilder pro
+# Modellaufruf, maximale Wartezeit in Sekunden bis zum Aufruf)
+model_path = "defect_detection_model.h5"
+model_input_size = (128, 128)
+inference_max_batch_size = 16
+inference_max_latency = 0.05
+# Threads zum Dekodieren und Skalieren der Bilder eines Batches
+inference_preprocess_workers = 4
+
+# Anzahl Threads für TensorFlow Lite (Raspberry Pi 5: 4 Kerne)
+tflite_threads = 4
+
+# Artefakt-Speicher für abgeleitete Ergebnisse (Kantenbilder, Vorschaubilder, Modelleingaben),
+# Schlüssel: Inhalt der Quelldatei + Transformation + Parameter, siehe artifact_store.py.
+# Maximale Gesamtgröße in Bytes (älteste ungenutzte Artefakte werden gelöscht)
+artifact_directory = "./.artifacts"
+artifact_max_bytes = 2 * 1024 ** 3
+
+# Mehrere Aufnahmeplätze an einem Rechner (rig.py): pro Drehteller Name, Schrittmotor-Backend,
+# Parameter des Treibers (z. B. GPIO-Pins, siehe schrittmotor_TB6600.py) und die Kameras als
+# {Ansicht: gphoto2-Port}. Ports mit `python rig.py --list` ermitteln, Port None: die einzige
+# angeschlossene Kamera. Beispiel für zwei Drehteller mit je zwei Kameras:
+#   {"name": "links", "motor_backend": "tb6600", "motor_options": {"DIR": 17, "PUL": 27, "ENA": 22},
+#    "cameras": {"oben": "usb:001,005", "seite": "usb:001,006"}},
+#   {"name": "rechts", "motor_backend": "tb6600", "motor_options": {"DIR": 5, "PUL": 6, "ENA": 13, "SWITCH": 19},
+#    "cameras": {"oben": "usb:001,007", "seite": "usb:001,008"}},
+rigs = [
+    {"name": "rig1", "motor_backend": motor_backend, "motor_options": {}, "cameras": {"main": None}},
+]
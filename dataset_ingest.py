@@ -0,0 +1,311 @@
+import os
+import re
+import sys
+import csv
+import json
+import time
+import random
+import zlib
+import argparse
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from inference import resize_for_model
+from raw_image import IMAGE_EXTENSIONS
+from series_index import SeriesManifest, parse_capture_name
+
+
+# Beschreibung der Shards im Ausgabeverzeichnis
+MANIFEST_NAME = "manifest.json"
+
+# Eine Aufnahme mit ihren Metadaten
+Sample = collections.namedtuple("Sample", ["source", "series", "object", "class_name", "angle", "timestamp"])
+
+
+def read_labels(path):
+    """
+    Liest die Zuordnung Serie -> Klasse (und Objekt) aus einer CSV-Datei.
+
+    Format (eine Zeile pro Serie, Kopfzeile optional):
+        series,label,object
+        schraube_01,ok,schraube_01
+        schraube_01_zweite_runde,ok,schraube_01
+        schraube_02,defekt
+
+    'object' ist optional (Standard: Name der Serie ohne Platz und Ansicht, siehe
+    base_series_name()). Serien desselben Objekts landen immer im selben Split, damit
+    das Modell im Test kein bereits gesehenes Objekt bewertet.
+
+    Rückgabewert:
+    --------------
+    dict
+        Serie -> (Klasse, Objekt oder None)
+    """
+    labels = {}
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            row = [value.strip() for value in row]
+            if not row or not row[0] or row[0].startswith("#") or row[:2] == ["series", "label"]:
+                continue
+            if len(row) < 2:
+                raise ValueError(f"{path}: Zeile {row} enthält keine Klasse.")
+            labels[row[0]] = (row[1], row[2] if len(row) > 2 and row[2] else None)
+    return labels
+
+
+def base_series_name(folder):
+    """
+    Name der Serie ohne Platz und Ansicht: Mehrere Ansichten eines Teils nimmt
+    RigScheduler als '<Serie>_<Platz>_<Ansicht>' auf (Platz und Ansicht stehen in
+    den Einstellungen des Manifests). Ohne diese Angaben der Ordnername.
+    """
+    name = os.path.basename(os.path.normpath(folder))
+    manifest = SeriesManifest(folder)
+    if not manifest.exists():
+        return name
+    settings = manifest.read()[0]["settings"]
+    suffix = f"_{settings.get('rig')}_{settings.get('view')}"
+    if "rig" in settings and "view" in settings and name.endswith(suffix) and len(name) > len(suffix):
+        return name[:-len(suffix)]
+    return name
+
+
+def find_samples(capture_directory, labels):
+    """
+    Sammelt alle Aufnahmen der gelabelten Serien (Unterordner von 'capture_directory').
+    Die Ordner der einzelnen Ansichten einer Serie ('<Serie>_<Platz>_<Ansicht>') können
+    auch über den Namen der Serie gelabelt werden und gehören ohne Angabe zum selben Objekt.
+
+    Rückgabewert:
+    --------------
+    samples, unlabeled : list, list
+        Liste von Sample und Namen der Serien ohne Eintrag in der Label-Datei.
+    """
+    samples, unlabeled = [], []
+    for entry in sorted(os.scandir(capture_directory), key=lambda e: e.name):
+        if not entry.is_dir():
+            continue
+        base_name = base_series_name(entry.path)
+        label = labels.get(entry.name) or labels.get(base_name)
+        if label is None:
+            unlabeled.append(entry.name)
+            continue
+        class_name, object_name = label
+        # Alle Ansichten eines Teils im selben Split
+        object_name = object_name or base_name
+        for file_name in sorted(os.listdir(entry.path)):
+            if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            timestamp, angle = parse_capture_name(file_name)
+            samples.append(Sample(
+                os.path.join(entry.path, file_name), entry.name, object_name, class_name, angle, timestamp
+            ))
+    return samples, unlabeled
+
+
+def split_objects(samples, test_fraction=0.2, seed=0):
+    """
+    Teilt die Objekte (nicht die einzelnen Bilder) in Trainings- und Testobjekte auf,
+    getrennt pro Klasse, damit beide Splits alle Klassen enthalten. Alle Winkel und
+    Serien eines Objekts landen im selben Split.
+
+    Die Reihenfolge der Objekte ergibt sich aus einem Hash des Namens; ein Objekt
+    bleibt daher im selben Split, solange sich die Anzahl Objekte seiner Klasse nicht ändert.
+
+    Rückgabewert:
+    --------------
+    dict
+        Objekt -> 'train' oder 'test'
+    """
+    objects_per_class = collections.defaultdict(set)
+    for sample in samples:
+        objects_per_class[sample.class_name].add(sample.object)
+
+    splits = {}
+    for objects in objects_per_class.values():
+        ordered = sorted(objects, key=lambda name: (zlib.crc32(f"{seed}:{name}".encode()), name))
+        test_count = round(len(ordered) * test_fraction)
+        if test_fraction > 0 and len(ordered) > 1:
+            test_count = min(max(test_count, 1), len(ordered) - 1)
+        for i, name in enumerate(ordered):
+            splits[name] = "test" if i < test_count else "train"
+    return splits
+
+
+def load_sample(source, image_size, roi):
+    """
+    Arbeitsprozess: dekodiert und skaliert ein Bild (uint8, RGB).
+    """
+    return resize_for_model(source, image_size, roi)
+
+
+def write_shards(samples, split, output_directory, class_names, image_size, roi, shard_size,
+                 workers=None, seed=0):
+    """
+    Schreibt die Bilder eines Splits gemischt in Shards '<split>-00000.npy'
+    (uint8, Form (N, Höhe, Breite, 3)). Die Bilder werden parallel dekodiert und
+    skaliert; es liegt immer nur ein Shard im Speicher.
+
+    Rückgabewert:
+    --------------
+    shards : list
+        Beschreibung der Shards für das Manifest (Datei und Metadaten je Bild).
+    """
+    samples = list(samples)
+    random.Random(seed).shuffle(samples)
+    height, width = image_size
+
+    shards = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for number, start in enumerate(range(0, len(samples), shard_size)):
+            chunk = samples[start:start + shard_size]
+            images = np.empty((len(chunk), height, width, 3), dtype=np.uint8)
+            results = pool.map(load_sample, [s.source for s in chunk], [image_size] * len(chunk), [roi] * len(chunk))
+            for i, image in enumerate(results):
+                images[i] = image
+
+            file_name = f"{split}-{number:05d}.npy"
+            np.save(os.path.join(output_directory, file_name), images)
+            shards.append({
+                "file": file_name,
+                "count": len(chunk),
+                "labels": [class_names.index(s.class_name) for s in chunk],
+                "angles": [s.angle for s in chunk],
+                "timestamps": [s.timestamp for s in chunk],
+                "series": [s.series for s in chunk],
+                "objects": [s.object for s in chunk],
+                "sources": [os.path.relpath(s.source, output_directory) for s in chunk],
+            })
+            print(f"{split}: {start + len(chunk)}/{len(samples)} Bilder")
+    return shards
+
+
+def ingest(capture_directory, output_directory, labels_file=None, image_size=None, roi=None,
+           test_fraction=0.2, shard_size=1024, workers=None, seed=0):
+    """
+    Wandelt Aufnahme-Serien in skalierte, gepackte Trainings- und Test-Shards um.
+
+    Parameter:
+    -----------
+    capture_directory : str
+        Verzeichnis mit einer Serie pro Unterordner (z. B. captured_images).
+    output_directory : str
+        Zielverzeichnis für Shards und manifest.json (wird ersetzt).
+    labels_file : str
+        CSV-Datei Serie -> Klasse (siehe read_labels). Standard: <capture_directory>/labels.csv
+    image_size : tuple
+        (Höhe, Breite). Standard: config.model_input_size
+    roi : None, 'full', 'auto' oder tuple
+        Bildausschnitt vor dem Skalieren (siehe roi.resolve_roi). Standard: config.roi
+    test_fraction : float
+        Anteil der Objekte pro Klasse im Test-Split.
+    shard_size : int
+        Bilder pro Shard.
+    workers : int
+        Anzahl Prozesse zum Dekodieren (Standard: alle Kerne).
+    seed : int
+        Startwert für Aufteilung und Mischen.
+
+    Rückgabewert:
+    --------------
+    manifest : dict
+        Inhalt der geschriebenen manifest.json.
+    """
+    labels_file = labels_file or os.path.join(capture_directory, "labels.csv")
+    image_size = tuple(image_size or config.model_input_size)
+    roi = config.roi if roi is None else roi
+
+    samples, unlabeled = find_samples(capture_directory, read_labels(labels_file))
+    for name in unlabeled:
+        print(f"Serie '{name}' hat keinen Eintrag in {labels_file} und wird übersprungen.")
+    if not samples:
+        raise FileNotFoundError(f"Keine gelabelten Aufnahmen in '{capture_directory}' gefunden.")
+
+    class_names = sorted({s.class_name for s in samples})
+    splits = split_objects(samples, test_fraction, seed)
+
+    os.makedirs(output_directory, exist_ok=True)
+    for file_name in os.listdir(output_directory):
+        if file_name == MANIFEST_NAME or re.match(r"^(train|test)-\d+\.npy$", file_name):
+            os.remove(os.path.join(output_directory, file_name))
+
+    manifest = {
+        "image_size": list(image_size),
+        "roi": roi if isinstance(roi, (str, type(None))) else list(roi),
+        "class_names": class_names,
+        "created": int(time.time()),
+        "splits": {},
+    }
+    for split in ("train", "test"):
+        split_samples = [s for s in samples if splits[s.object] == split]
+        manifest["splits"][split] = {
+            "objects": sorted({s.object for s in split_samples}),
+            "shards": write_shards(
+                split_samples, split, output_directory, class_names, image_size, roi,
+                shard_size, workers, seed
+            ),
+        }
+
+    # Manifest zuletzt schreiben: Es existiert nur, wenn alle Shards vollständig sind
+    with open(os.path.join(output_directory, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def read_manifest(directory):
+    """
+    Liest die manifest.json eines Shard-Verzeichnisses.
+    """
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def load_split(directory, split, mmap=True):
+    """
+    Lädt alle Shards eines Splits.
+
+    Rückgabewert (Generator):
+    --------------
+    images, labels, shard : np.ndarray, np.ndarray, dict
+        Bilder eines Shards (memory-mapped, falls 'mmap'), Labels (float32) und
+        Eintrag des Shards aus dem Manifest (Winkel, Serie, Objekt, Quelle je Bild).
+    """
+    manifest = read_manifest(directory)
+    for shard in manifest["splits"][split]["shards"]:
+        images = np.load(os.path.join(directory, shard["file"]), mmap_mode="r" if mmap else None)
+        yield images, np.asarray(shard["labels"], dtype=np.float32), shard
+
+
+def main(argv=None):
+    """
+    Kommandozeile: Aufnahme-Serien in Trainings- und Test-Shards umwandeln.
+    """
+    parser = argparse.ArgumentParser(description="Aufnahme-Serien in skalierte Trainings-/Test-Shards packen")
+    parser.add_argument("input", nargs="?", default=config.output_directory,
+                        help="Verzeichnis mit einer Serie pro Unterordner")
+    parser.add_argument("--output", "-o", default="data/shards", help="Zielverzeichnis für Shards und Manifest")
+    parser.add_argument("--labels", help="CSV 'series,label[,object]' (Standard: <input>/labels.csv)")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Anteil der Objekte im Test-Split")
+    parser.add_argument("--shard-size", type=int, default=1024, help="Bilder pro Shard")
+    parser.add_argument("--roi", choices=("full", "auto"), help="Bildausschnitt (Standard: config.roi)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    manifest = ingest(
+        args.input, args.output, args.labels, roi=args.roi, test_fraction=args.test_fraction,
+        shard_size=args.shard_size, workers=args.workers, seed=args.seed
+    )
+    for split, info in manifest["splits"].items():
+        count = sum(shard["count"] for shard in info["shards"])
+        print(f"{split}: {count} Bilder von {len(info['objects'])} Objekten in {len(info['shards'])} Shards")
+    print(f"Klassen: {manifest['class_names']}, Dauer: {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from inference import resize_for_model
+from training_data import list_images
+
+# Version des Cache-Formats (ändert sich => alle Caches werden neu aufgebaut)
+CACHE_VERSION = 1
+
+
+class DecodedImageCache:
+    """
+    Vorab dekodierte und skalierte Trainingsbilder als ein einziges uint8-Array auf
+    der Platte (N, Höhe, Breite, 3), das per np.memmap gelesen wird.
+
+    Neben dem Array liegt eine Indexdatei mit Pfad, Änderungszeit, Größe und Label
+    jedes Bildes sowie den Skalierungsparametern. Beim Öffnen werden nur neue oder
+    geänderte Bilder dekodiert, alle anderen Zeilen werden aus dem alten Array
+    übernommen. Ändern sich Bildgröße oder ROI, entsteht ein eigener Cache.
+
+    Mehrere Prozesse bzw. Threads (z. B. Data-Loader-Worker) lesen dasselbe Array
+    ohne Kopie über den Page-Cache des Betriebssystems.
+
+    Beispiel:
+        cache = DecodedImageCache("data/train")
+        batch = cache.images[indices]      # uint8, RGB
+        labels = cache.labels[indices]
+    """
+
+    def __init__(self, directory, image_size=None, roi="full", cache_directory=None, workers=None):
+        """
+        Parameter:
+        -----------
+        directory : str
+            Bilder in Klassen-Unterordnern (wie für flow_from_directory).
+        image_size : tuple
+            (Höhe, Breite). Standard: config.model_input_size
+        roi : None, 'full', 'auto' oder tuple
+            Bildausschnitt vor dem Skalieren (siehe roi.resolve_roi). Standard: 'full',
+            Trainingsbilder liegen bereits zugeschnitten vor (wie bei image_dataset()).
+        cache_directory : str
+            Ablage für Arrays und Indexdateien. Standard: config.training_cache_directory
+        workers : int
+            Anzahl Prozesse für das Dekodieren (Standard: alle Kerne).
+        """
+        self.directory = os.path.abspath(directory)
+        self.image_size = tuple(image_size or config.model_input_size)
+        self.roi = roi
+        self.cache_directory = cache_directory or config.training_cache_directory
+        self.workers = workers
+
+        # Anzahl dekodierter und übernommener Bilder beim letzten Aktualisieren
+        self.decoded = 0
+        self.reused = 0
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        params = repr((CACHE_VERSION, self.directory, self.image_size, self.roi))
+        digest = hashlib.sha1(params.encode("utf-8")).hexdigest()[:16]
+        self.array_path = os.path.join(self.cache_directory, f"{digest}.u8")
+        self.index_path = os.path.join(self.cache_directory, f"{digest}.json")
+
+        self.images = None
+        self.labels = None
+        self.paths = None
+        self.class_names = None
+        self.update()
+
+    def _read_index(self):
+        """
+        Liest die Indexdatei. Gibt None zurück, wenn sie fehlt, beschädigt ist
+        oder zu anderen Parametern gehört.
+        """
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != CACHE_VERSION or tuple(index.get("image_size", ())) != self.image_size:
+            return None
+        if not os.path.isfile(self.array_path):
+            return None
+        return index
+
+    def update(self):
+        """
+        Gleicht den Cache mit dem Verzeichnis ab und dekodiert nur neue oder geänderte
+        Bilder (erkannt an Änderungszeit und Größe). Danach sind images, labels,
+        paths und class_names aktuell.
+        """
+        paths, labels, class_names = list_images(self.directory)
+        if not paths:
+            raise FileNotFoundError(f"Keine Bilder in den Unterordnern von '{self.directory}' gefunden.")
+        entries = []
+        for path, label in zip(paths, labels):
+            stat = os.stat(path)
+            entries.append([os.path.relpath(path, self.directory), stat.st_mtime_ns, stat.st_size, label])
+
+        old_index = self._read_index()
+        if old_index is not None and old_index["entries"] == entries:
+            self.decoded, self.reused = 0, len(entries)
+            self._open(old_index)
+            return
+
+        # Zeilen unveränderter Bilder aus dem alten Array übernehmen
+        old_rows = {}
+        old_images = None
+        if old_index is not None:
+            old_rows = {tuple(entry[:3]): row for row, entry in enumerate(old_index["entries"])}
+            old_images = np.memmap(self.array_path, dtype=np.uint8, mode="r",
+                                   shape=(len(old_index["entries"]),) + self.image_size + (3,))
+
+        height, width = self.image_size
+        temp_path = self.array_path + ".tmp"
+        images = np.memmap(temp_path, dtype=np.uint8, mode="w+", shape=(len(entries), height, width, 3))
+        missing = []
+        for row, entry in enumerate(entries):
+            old_row = old_rows.get(tuple(entry[:3]))
+            if old_row is not None:
+                images[row] = old_images[old_row]
+            else:
+                missing.append(row)
+
+        if missing:
+            sources = [os.path.join(self.directory, entries[row][0]) for row in missing]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(
+                    resize_for_model, sources, [self.image_size] * len(sources), [self.roi] * len(sources),
+                    chunksize=16
+                )
+                for row, image in zip(missing, results):
+                    images[row] = image
+        images.flush()
+        del images, old_images
+
+        # Erst das Array, dann den Index ersetzen: ein Index zeigt nie auf ein unvollständiges Array
+        os.replace(temp_path, self.array_path)
+        index = {
+            "version": CACHE_VERSION,
+            "directory": self.directory,
+            "image_size": list(self.image_size),
+            "roi": self.roi if isinstance(self.roi, (str, type(None))) else list(self.roi),
+            "class_names": class_names,
+            "entries": entries,
+        }
+        with open(self.index_path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+        self.decoded, self.reused = len(missing), len(entries) - len(missing)
+        self._open(index)
+
+    def _open(self, index):
+        """
+        Öffnet das Array read-only (memory-mapped) und übernimmt Labels und Pfade aus dem Index.
+        """
+        entries = index["entries"]
+        self.images = np.memmap(self.array_path, dtype=np.uint8, mode="r",
+                                shape=(len(entries),) + self.image_size + (3,))
+        self.labels = np.array([entry[3] for entry in entries], dtype=np.float32)
+        self.paths = [os.path.join(self.directory, entry[0]) for entry in entries]
+        self.class_names = index["class_names"]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def batches(self, batch_size=32, shuffle=True, seed=None):
+        """
+        Liefert eine Epoche als (Bilder, Labels)-Batches (uint8, RGB).
+        Die Indizes eines Batches werden sortiert gelesen, damit die Zugriffe auf
+        das Array möglichst vorwärts laufen.
+        """
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            indices = np.sort(order[start:start + batch_size])
+            yield self.images[indices], self.labels[indices]
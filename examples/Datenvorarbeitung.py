@@ -1,37 +1,37 @@
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+import os
+import sys
+
+# Module aus dem Projektverzeichnis (training_data.py, config.py) importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from training_data import cached_image_dataset
 
 # Bilddimensionen und Batch-Größe definieren
 img_height, img_width = 128, 128
 batch_size = 32
 
-# Trainings-Daten-Generator mit Datenaugmentation
-train_datagen = ImageDataGenerator(
-    rescale=1./255,         # Pixelwerte von [0,255] auf [0,1] skalieren
-    shear_range=0.2,        # Zufällige affine Transformation (Scherschnitt) mit Maximalwert 0.2
-    zoom_range=0.2,         # Zufälliges Zoomen um max. 20%
-    horizontal_flip=True     # Zufälliges horizontales Spiegeln
-)
-
-# Test/Validierungs-Daten-Generator
-# Hier wird in der Regel nur rescale angewendet, 
-# da man auf Validierungs- oder Testdaten normalerweise keine Augmentation anwendet.
-test_datagen = ImageDataGenerator(
-    rescale=1./255          # Pixelwerte von [0,255] auf [0,1] skalieren
-)
-
-# Trainingsdaten-Generator, der Bilder aus einem Verzeichnis lädt
+# Trainingsdaten mit Datenaugmentation (tf.data statt ImageDataGenerator):
+# - Pixelwerte von [0,255] auf [0,1] skaliert
+# - zufällige Scherung (max. 0.2 Grad), Zoom (max. 20%) und horizontales Spiegeln
+# - Bilder werden nur einmal dekodiert und skaliert (memory-mapped Cache in .training_cache,
+#   gilt auch für spätere Trainingsläufe), dazu Prefetch
 # Struktur: ./data/train/<klasse1>/..., ./data/train/<klasse2>/..., etc.
-train_generator = train_datagen.flow_from_directory(
-    './data/train',              # Pfad zum Trainingsverzeichnis
-    target_size=(img_height, img_width),  # Alle Bilder auf diese Größe skalieren
+train_data = cached_image_dataset(
+    './data/train',                        # Pfad zum Trainingsverzeichnis
+    image_size=(img_height, img_width),    # Alle Bilder auf diese Größe skalieren
     batch_size=batch_size,                 # Anzahl der Bilder pro Batch
-    class_mode='binary'                    # Da wir von einem binären Klassifikationsproblem ausgehen
+    augment=True                           # Scherung, Zoom, Spiegeln
 )
 
-# Testdaten-Generator, analog zur Validierung
-test_generator = test_datagen.flow_from_directory(
+# Test/Validierungsdaten
+# Hier wird nur skaliert, da man auf Validierungs- oder Testdaten normalerweise keine Augmentation anwendet.
+test_data = cached_image_dataset(
     './data/test',               # Pfad zum Testverzeichnis
-    target_size=(img_height, img_width),
+    image_size=(img_height, img_width),
     batch_size=batch_size,
-    class_mode='binary'
-)
\ No newline at end of file
+    shuffle=False
+)
+
+# Binäre Labels (0/1) nach alphabetischer Reihenfolge der Klassen-Unterordner
+print(f"{train_data.samples} Trainingsbilder, {test_data.samples} Testbilder, Klassen: {train_data.class_names}")
+train_dataset = train_data.dataset
+test_dataset = test_data.dataset
\ No newline at end of file
@@ -1,10 +1,16 @@
 import os
+import sys
 import numpy as np
 import cv2
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 from matplotlib import pyplot as plt
 
+# Module aus dem Projektverzeichnis (roi.py, inference.py, config.py) importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roi as roi_module
+from inference import preprocess
+
 # Lege die Bildhöhe und -breite fest, auf die das Bild beim Lesen skaliert werden soll
 img_height = 128
 img_width = 128
@@ -16,10 +22,35 @@ if not os.path.exists(model_path):
 
 model = load_model(model_path)
 
-def predict_defect(image_path):
+def predict_tiles(img, tile_size, batch_size=16):
+    """
+    Zerlegt das Bild in Kacheln und schickt sie in kleinen Batches durch das Modell.
+    Es liegen nie mehr als 'batch_size' skalierte Kacheln gleichzeitig im Speicher.
+    Die Kacheln werden wie beim Training vorbereitet (inference.preprocess: RGB,
+    nächster Nachbar, [0, 1]).
+    Gibt die höchste Defekt-Wahrscheinlichkeit aller Kacheln zurück.
+    """
+    highest = 0.0
+    batch = []
+    for outer, _ in roi_module.iter_tiles(img.shape, tile_size):
+        batch.append(preprocess(img[outer], (img_height, img_width), roi="full"))
+        if len(batch) == batch_size:
+            highest = max(highest, float(model.predict(np.stack(batch), verbose=0).max()))
+            batch = []
+    if batch:
+        highest = max(highest, float(model.predict(np.stack(batch), verbose=0).max()))
+    return highest
+
+
+def predict_defect(image_path, roi=None, tile_size=None):
     """
     Liest ein Bild ein, verarbeitet es auf die richtige Größe und führt eine Vorhersage durch.
     Gibt den String "Defekt erkannt" oder "Kein Defekt erkannt" zurück.
+
+    Mit 'roi' wird nur der Ausschnitt mit dem Prüfteil ausgewertet (siehe roi.resolve_roi,
+    Standard: config.roi). Mit 'tile_size' wird der Ausschnitt in Kacheln dieser Größe
+    (in Pixeln) zerlegt, jede Kachel einzeln bewertet und ein Defekt gemeldet, sobald
+    eine Kachel auffällig ist. Kleine Defekte gehen so beim Verkleinern nicht verloren.
     """
     if not os.path.exists(image_path):
         return "Bild nicht gefunden"
@@ -27,21 +58,24 @@ def predict_defect(image_path):
     # Bild mit OpenCV lesen (BGR-Format)
     img = cv2.imread(image_path)
 
-    # Auf die gewünschten Abmessungen skalieren
-    img = cv2.resize(img, (img_height, img_width))
+    # Nur den Ausschnitt mit dem Prüfteil verwenden (View, keine Kopie)
+    img = roi_module.crop(img, roi_module.resolve_roi(img, roi))
 
-    # Auf [0,1]-Wertebereich normalisieren
-    img = img / 255.0
+    if tile_size:
+        probability = predict_tiles(img, tile_size)
+    else:
+        # Wie beim Training skalieren (RGB, nächster Nachbar) und auf [0,1] normalisieren
+        img = preprocess(img, (img_height, img_width), roi="full")
 
-    # Da das Modell eine Batch-Dimension erwartet, erweitern wir die Dimensionen
-    img = np.expand_dims(img, axis=0)
+        # Da das Modell eine Batch-Dimension erwartet, erweitern wir die Dimensionen
+        img = np.expand_dims(img, axis=0)
 
-    # Vorhersage durch das Modell
-    prediction = model.predict(img)
+        # Vorhersage durch das Modell
+        # Hier wird angenommen, dass prediction.shape = (1,1) (binäre Klassifikation).
+        # Falls du mehrere Klassen hast, musst du die Auswertung anpassen.
+        probability = model.predict(img)[0][0]
 
-    # Hier wird angenommen, dass prediction.shape = (1,1) (binäre Klassifikation).
-    # Falls du mehrere Klassen hast, musst du die Auswertung anpassen.
-    if prediction[0][0] > 0.5:
+    if probability > 0.5:
         return "Defekt erkannt"
     else:
         return "Kein Defekt erkannt"
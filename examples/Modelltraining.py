@@ -52,17 +52,14 @@ early_stopping = EarlyStopping(patience=3, restore_best_weights=True)
 model_checkpoint = ModelCheckpoint('defect_detection_best_model.h5', save_best_only=True)
 
 # Training des Modells
-# - train_generator und test_generator stammen in der Regel aus einem ImageDataGenerator.flow_from_directory(...)
-# - steps_per_epoch = Anzahl Trainingssamples / Batch-Größe
-# - validation_steps = Anzahl Testsamples / Batch-Größe
+# - train_dataset und test_dataset stammen aus Datenvorarbeitung.py (training_data.image_dataset(...))
+# - Jede Epoche läuft einmal über alle Bilder, steps_per_epoch ist daher nicht nötig
 model.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // batch_size,
+    train_dataset,
     epochs=10,  # Ggf. anpassen
-    validation_data=test_generator,
-    validation_steps=test_generator.samples // batch_size,
+    validation_data=test_dataset,
     callbacks=[early_stopping, model_checkpoint]
 )
 
 # Speichert das zuletzt trainierte Modell als defect_detection_model.h5
-model.save('defect_detection_model.h5')
\ No newline at end of file
+model.save('defect_detection_model.h5')
\ No newline at end of file
@@ -1,12 +1,16 @@
 import os
+import sys
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Conv2D, MaxPooling2D, Flatten
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+# Module aus dem Projektverzeichnis (training_data.py, config.py) importierbar machen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from training_data import cached_image_dataset
 
 # --------------------------------------------------
 # 1) Hyperparameter und Pfade einstellen
 # --------------------------------------------------
-# Bilddimensionen und Batch-Größe für den Generator
+# Bilddimensionen und Batch-Größe für die Eingabe-Pipeline
 img_height, img_width = 128, 128
 batch_size = 32
 
@@ -20,35 +24,26 @@ test_dir = 'data/test'
 # --------------------------------------------------
 # 2) Datenvorverarbeitung und Augmentation
 # --------------------------------------------------
-# Trainingsdatengenerator:
-# - rescale: Skalierung der Pixelwerte von [0,255] auf [0,1]
-# - shear_range, zoom_range, horizontal_flip: einfache Datenaugmentation
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True
-)
-
-# Testdatengenerator:
-# - Nur Skalierung, da man im Test meist keine Augmentation anwendet
-test_datagen = ImageDataGenerator(rescale=1./255)
-
-# Erstellen der Generatoren durch Auslesen der Verzeichnisstruktur
+# Eingabe-Pipeline mit tf.data (ersetzt ImageDataGenerator.flow_from_directory):
+# - Skalierung der Pixelwerte von [0,255] auf [0,1]
+# - Trainingsdaten: Scherung, Zoom und horizontales Spiegeln (vektorisiert pro Batch)
+# - Bilder werden nur einmal dekodiert und skaliert (memory-mapped Cache in .training_cache,
+#   gilt auch für spätere Trainingsläufe) und vorab bereitgestellt, während das Modell rechnet
 # Struktur muss sein: train_dir/class1, train_dir/class2, ...
-# class_mode='binary' => Binäre Klassifikation
-train_generator = train_datagen.flow_from_directory(
+# Labels binär (0/1) nach alphabetischer Reihenfolge der Klassen
+train_data = cached_image_dataset(
     train_dir,
-    target_size=(img_height, img_width),
+    image_size=(img_height, img_width),
     batch_size=batch_size,
-    class_mode='binary'
+    augment=True
 )
 
-test_generator = test_datagen.flow_from_directory(
+# Testdaten: Nur Skalierung, da man im Test meist keine Augmentation anwendet
+test_data = cached_image_dataset(
     test_dir,
-    target_size=(img_height, img_width),
+    image_size=(img_height, img_width),
     batch_size=batch_size,
-    class_mode='binary'
+    shuffle=False
 )
 
 # --------------------------------------------------
@@ -88,14 +83,11 @@ model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy']
 # --------------------------------------------------
 # 4) Training
 # --------------------------------------------------
-# steps_per_epoch = Anzahl Trainingssamples / Batch-Größe
-# validation_steps = Anzahl Testsamples / Batch-Größe
+# Jede Epoche läuft einmal über alle Trainingsbilder
 model.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // batch_size,
+    train_data.dataset,
     epochs=epochs,
-    validation_data=test_generator,
-    validation_steps=test_generator.samples // batch_size
+    validation_data=test_data.dataset
 )
 
 # --------------------------------------------------
@@ -103,4 +95,4 @@ model.fit(
 # --------------------------------------------------
 # Speichert das trainierte Modell (inkl. Architektur und Gewichten)
 model.save('defect_detection_model.h5')
-print("Modell wurde erfolgreich gespeichert.")
\ No newline at end of file
+print("Modell wurde erfolgreich gespeichert.")
\ No newline at end of file
@@ -0,0 +1,192 @@
+import atexit
+import threading
+import contextlib
+
+import config
+import camera
+
+
+class HardwareBusy(RuntimeError):
+    """
+    Die Hardware wird gerade von einer anderen Sitzung (bzw. einem anderen Thread) benutzt.
+    """
+
+
+class HardwareManager:
+    """
+    Verwaltet Kamera und Schrittmotor eines Prozesses.
+
+    Beide werden beim ersten Zugriff genau einmal erzeugt und danach für alle
+    Aufrufe wiederverwendet: `gphoto2 --auto-detect`, das Öffnen der Kamera-Session
+    und das Anfordern der GPIO-Leitungen fallen also nur einmal an, und die Position
+    des Drehtellers bleibt erhalten (z. B. über alle Streamlit-Reruns hinweg).
+
+    Da mehrere Sitzungen (Browser-Tabs) gleichzeitig auf dieselbe Hardware zugreifen
+    können, wird sie mit reserve() exklusiv reserviert.
+
+    Ein Aufnahmeplatz kann mehrere Kameras (Ansichten) haben, die über ihren
+    gphoto2-Port unterschieden werden; mehrere Aufnahmeplätze steuert rig.RigScheduler.
+
+    Beispiel:
+        hw = HardwareManager()
+        with hw.reserve(timeout=0):
+            hw.stepper.move_by_degree(90)
+            hw.camera.capture_image()
+        hw.close()
+    """
+
+    def __init__(self, camera_backend=None, motor_backend=None, cameras=None, motor_options=None, name=None):
+        """
+        Parameter:
+        -----------
+        camera_backend : str
+            'gphoto2' oder 'fake' (siehe camera.create_session). Standard: config.camera_backend
+        motor_backend : str
+            Schrittmotor-Backend (siehe schrittmotor.get_backend). Standard: config.motor_backend
+        cameras : dict
+            Kameras als {Ansicht: gphoto2-Port}, Port None: die einzige angeschlossene Kamera.
+            Standard: eine Kamera {"main": None}
+        motor_options : dict
+            Weitere Parameter für den Schrittmotor, z. B. GPIO-Pins eines zweiten Treibers.
+        name : str
+            Name des Aufnahmeplatzes (für Meldungen).
+        """
+        self.camera_backend = camera_backend or config.camera_backend
+        self.motor_backend = motor_backend or config.motor_backend
+        self.camera_ports = dict(cameras or {"main": None})
+        self.motor_options = dict(motor_options or {})
+        self.name = name
+
+        self._cameras = {}
+        self._stepper = None
+        self._lock = threading.Lock()
+        self._create_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def views(self):
+        """
+        Namen der Ansichten (Kameras) dieses Aufnahmeplatzes.
+        """
+        return list(self.camera_ports)
+
+    def get_camera(self, view=None):
+        """
+        Die Kamera einer Ansicht (camera.Camera, Standard: die erste). Die Session
+        wird beim ersten Aufnehmen geöffnet.
+        """
+        view = self.views[0] if view is None else view
+        with self._create_lock:
+            self._check_open()
+            if view not in self._cameras:
+                self._cameras[view] = camera.Camera(self.camera_backend, port=self.camera_ports[view])
+            return self._cameras[view]
+
+    @property
+    def camera(self):
+        """
+        Die gemeinsame Kamera (camera.Camera) der ersten Ansicht.
+        """
+        return self.get_camera()
+
+    @property
+    def cameras(self):
+        """
+        Alle Kameras als {Ansicht: camera.Camera}.
+        """
+        return {view: self.get_camera(view) for view in self.views}
+
+    @property
+    def stepper(self):
+        """
+        Der gemeinsame Schrittmotor. gpiod bzw. RPi.GPIO wird erst beim ersten Zugriff importiert.
+        """
+        with self._create_lock:
+            self._check_open()
+            if self._stepper is None:
+                import schrittmotor
+
+                StepperMotor = schrittmotor.get_backend(self.motor_backend)
+                # Evtl. von einem früheren Prozess noch belegte Ressourcen freigeben
+                StepperMotor.release()
+                self._stepper = StepperMotor(**self.motor_options)
+            return self._stepper
+
+    @property
+    def has_stepper(self):
+        """
+        True, wenn der Schrittmotor bereits erzeugt wurde (ohne ihn dafür zu erzeugen).
+        """
+        return self._stepper is not None
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("Der HardwareManager wurde bereits geschlossen.")
+
+    @contextlib.contextmanager
+    def reserve(self, timeout=None):
+        """
+        Reserviert Kamera und Motor für die Dauer eines with-Blocks.
+
+        Parameter:
+        -----------
+        timeout : float
+            Maximale Wartezeit in Sekunden. None: warten, bis die Hardware frei ist.
+            0: nicht warten.
+
+        Ist die Hardware nach 'timeout' noch belegt, wird HardwareBusy ausgelöst.
+        """
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            where = f" von '{self.name}'" if self.name else ""
+            raise HardwareBusy(f"Kamera und Motor{where} werden gerade von einer anderen Sitzung benutzt.")
+        try:
+            yield self
+        finally:
+            self._lock.release()
+
+    @property
+    def busy(self):
+        """
+        True, solange die Hardware reserviert ist.
+        """
+        return self._lock.locked()
+
+    def close(self):
+        """
+        Hält den Motor an, schaltet ihn aus und gibt GPIO-Leitungen und Kamera frei.
+        Wird beim Beenden des Prozesses automatisch aufgerufen (siehe default_manager()).
+        """
+        with self._create_lock:
+            if self._closed:
+                return
+            self._closed = True
+            stepper, self._stepper = self._stepper, None
+            cameras, self._cameras = self._cameras, {}
+
+        if stepper is not None:
+            stepper.stop(immediate=True)
+            try:
+                stepper.wait()
+            except Exception:
+                pass
+            stepper.disable_motor()
+            stepper.cleanup()
+        for cam in cameras.values():
+            cam.close()
+
+
+_default_manager = None
+_default_lock = threading.Lock()
+
+
+def default_manager():
+    """
+    Gibt den gemeinsamen HardwareManager des Prozesses zurück und sorgt dafür,
+    dass die Hardware beim Beenden des Prozesses freigegeben wird.
+    """
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            _default_manager = HardwareManager()
+            atexit.register(_default_manager.close)
+        return _default_manager
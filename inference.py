@@ -0,0 +1,328 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import config
+import raw_image
+import roi as roi_module
+
+
+def load_keras_model(model_path):
+    """
+    Lädt ein Keras-Modell (.h5/.keras) und gibt eine Funktion batch -> Wahrscheinlichkeiten zurück.
+    TensorFlow wird erst hier importiert.
+    """
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path)
+
+    def predict(batch):
+        # Direkter Aufruf statt model.predict(): kein Overhead für Callbacks und Fortschrittsanzeige
+        return np.asarray(model(batch, training=False))
+
+    return predict
+
+
+def load_tflite_model(model_path):
+    """
+    Lädt ein TensorFlow-Lite-Modell (.tflite, auch int8-quantisiert, siehe model_export.py)
+    und gibt eine Funktion batch -> Wahrscheinlichkeiten zurück.
+
+    Bevorzugt wird das schlanke Paket tflite_runtime (auf dem Raspberry Pi ohne
+    vollständiges TensorFlow installierbar), sonst tf.lite aus TensorFlow.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+
+    interpreter = Interpreter(model_path=model_path, num_threads=config.tflite_threads)
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    input_index = input_detail["index"]
+    output_index = output_detail["index"]
+    input_type = input_detail["dtype"]
+    input_scale, input_zero_point = input_detail["quantization"]
+    output_scale, output_zero_point = output_detail["quantization"]
+    batch_size = [None]
+
+    def predict(batch):
+        # Eingang auf die Batch-Größe anpassen (nur wenn sie sich ändert)
+        if batch_size[0] != len(batch):
+            interpreter.resize_tensor_input(input_index, [len(batch)] + list(batch.shape[1:]))
+            interpreter.allocate_tensors()
+            batch_size[0] = len(batch)
+
+        # Quantisiertes Modell: Eingang von [0, 1] auf int8/uint8 abbilden
+        if input_type != np.float32:
+            info = np.iinfo(input_type)
+            batch = np.clip(np.round(batch / input_scale + input_zero_point), info.min, info.max)
+        interpreter.set_tensor(input_index, batch.astype(input_type))
+        interpreter.invoke()
+
+        result = interpreter.get_tensor(output_index)
+        if result.dtype != np.float32:
+            result = (result.astype(np.float32) - output_zero_point) * output_scale
+        return result
+
+    return predict
+
+
+# Lade-Funktion je Dateiendung des Modells
+MODEL_LOADERS = {
+    ".h5": load_keras_model,
+    ".keras": load_keras_model,
+    ".tflite": load_tflite_model,
+}
+
+
+def load_model(model_path):
+    """
+    Lädt das Modell passend zur Dateiendung (siehe MODEL_LOADERS).
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Das Modell '{model_path}' wurde nicht gefunden.")
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension not in MODEL_LOADERS:
+        raise ValueError(f"Unbekanntes Modellformat '{extension}'. Möglich: {', '.join(MODEL_LOADERS)}")
+    return MODEL_LOADERS[extension](model_path)
+
+
+def resize_for_model(item, input_size=None, roi=None, store=None):
+    """
+    Liest ein Bild und skaliert es wie beim Training (keras load_img) auf die
+    Eingangsgröße des Modells: RGB, nächster Nachbar, uint8.
+
+    Parameter:
+    -----------
+    item : str oder np.ndarray
+        Pfad zum Bild (auch .CR2) oder bereits dekodiertes BGR-Bild (z. B. aus der Aufnahme).
+    input_size : tuple
+        (Höhe, Breite) des Modelleingangs. Standard: config.model_input_size
+    roi : None, 'full', 'auto', tuple oder roi.Roi
+        Nur diesen Ausschnitt auswerten (siehe roi.resolve_roi). Standard: config.roi
+    store : artifact_store.ArtifactStore
+        Optional: skaliertes Bild einer Datei aus dem Artefakt-Speicher holen bzw. dort ablegen.
+    """
+    height, width = input_size or config.model_input_size
+
+    def compute():
+        image = item
+        if not isinstance(item, np.ndarray):
+            image = raw_image.imread(item)
+            if image is None:
+                raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {item}")
+
+        image = roi_module.crop(image, roi_module.resolve_roi(image, roi))
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    if store is not None and not isinstance(item, np.ndarray):
+        params = {"input_size": [height, width], "roi": config.roi if roi is None else roi}
+        return store.cached(item, "model_input", params, compute, ".npy")
+    return compute()
+
+
+def preprocess(item, input_size=None, roi=None, store=None):
+    """
+    Bereitet ein Bild wie beim Training (ImageDataGenerator) für das Modell vor:
+    resize_for_model(), Werte in [0, 1] (float32).
+    """
+    return resize_for_model(item, input_size, roi, store).astype(np.float32) * (1.0 / 255.0)
+
+
+class InferenceService:
+    """
+    Fehlererkennung als Dienst: hält das Modell geladen ("warm") und fasst
+    eingehende Bilder zu Batches zusammen (Micro-Batching).
+
+    Ein Hintergrund-Thread wartet auf das erste Bild und sammelt dann weitere
+    Bilder, bis entweder max_batch_size erreicht ist oder seit dem ersten Bild
+    max_latency Sekunden vergangen sind. Die Bilder des Batches werden dann
+    parallel dekodiert und skaliert, danach läuft ein einziger Modellaufruf
+    für den ganzen Batch. submit() kehrt sofort zurück, sodass auch ein einzelner
+    Aufrufer, der Bild für Bild einstellt, volle Batches erzeugt.
+
+    Beispiel:
+        service = InferenceService()
+        future = service.submit("captured_images/serie/bild.CR2")
+        print(future.result())             # Defekt-Wahrscheinlichkeit 0..1
+        print(service.predict(paths))      # mehrere Bilder auf einmal
+    """
+
+    def __init__(self, model_path=None, max_batch_size=None, max_latency=None, loader=None, warm_up=True,
+                 store=None, preprocess_workers=None):
+        """
+        Parameter:
+        -----------
+        model_path : str
+            Pfad zum Modell. Standard: config.model_path
+        max_batch_size : int
+            Maximale Anzahl Bilder pro Modellaufruf. Standard: config.inference_max_batch_size
+        max_latency : float
+            Maximale Wartezeit in Sekunden, bis ein unvollständiger Batch ausgeführt wird.
+            Standard: config.inference_max_latency
+        loader : callable
+            Optional: Funktion model_path -> predict(batch). Standard: load_model()
+        warm_up : bool
+            True: nach dem Laden einen Aufruf mit einem leeren Bild ausführen, damit
+            der erste echte Aufruf nicht die Initialisierung bezahlt.
+        store : artifact_store.ArtifactStore
+            Optional: skalierte Modelleingaben von Bilddateien zwischenspeichern, damit
+            eine erneute Auswertung desselben Bildes nicht neu dekodiert.
+        preprocess_workers : int
+            Anzahl Threads zum Dekodieren und Skalieren der Bilder eines Batches.
+            Standard: config.inference_preprocess_workers
+        """
+        self.model_path = model_path or config.model_path
+        self.max_batch_size = max_batch_size or config.inference_max_batch_size
+        self.max_latency = config.inference_max_latency if max_latency is None else max_latency
+        self.input_size = tuple(config.model_input_size)
+        self.store = store
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=preprocess_workers or config.inference_preprocess_workers,
+            thread_name_prefix="inference-preprocess"
+        )
+        self._loader = loader or load_model
+        self._warm_up = warm_up
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._load_error = None
+
+        # Statistik: Anzahl Modellaufrufe, Bilder und Gesamtzeit der Modellaufrufe
+        self.batches = 0
+        self.images = 0
+        self.model_time = 0.0
+
+        self._thread = threading.Thread(target=self._work, name="inference", daemon=True)
+        self._thread.start()
+
+    def _work(self):
+        """
+        Hintergrund-Thread: lädt das Modell und führt die Batches aus.
+        """
+        try:
+            predict = self._loader(self.model_path)
+            if self._warm_up:
+                predict(np.zeros((1,) + self.input_size + (3,), dtype=np.float32))
+        except Exception as e:
+            self._load_error = e
+        self._ready.set()
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+
+            # Weitere Bilder sammeln, bis der Batch voll oder die Frist abgelaufen ist;
+            # bereits wartende Bilder kommen auch nach Ablauf der Frist noch mit
+            deadline = item[3] + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = max(deadline - time.monotonic(), 0)
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self._run_batch(predict if self._load_error is None else None, batch)
+
+    def _prepare(self, item, roi, future):
+        """
+        Dekodiert und skaliert ein Bild im Thread-Pool. Fehler landen im Future des Bildes.
+        """
+        try:
+            return preprocess(item, self.input_size, roi, self.store)
+        except Exception as e:
+            future.set_exception(e)
+            return None
+
+    def _run_batch(self, predict, batch):
+        """
+        Bereitet die Bilder des Batches parallel vor, führt einen Modellaufruf aus
+        und setzt die Ergebnisse der Futures.
+        """
+        if predict is None:
+            for _, _, future, _ in batch:
+                future.set_exception(self._load_error)
+            return
+        images = self._pool.map(lambda entry: self._prepare(*entry[:3]), batch)
+        batch = [(image, future) for image, (_, _, future, _) in zip(images, batch) if image is not None]
+        if not batch:
+            return
+        try:
+            start = time.perf_counter()
+            probabilities = predict(np.stack([image for image, _ in batch]))
+            self.model_time += time.perf_counter() - start
+            self.batches += 1
+            self.images += len(batch)
+            for (_, future), probability in zip(batch, np.asarray(probabilities).reshape(len(batch), -1)):
+                future.set_result(float(probability[0]))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def wait_ready(self, timeout=None):
+        """
+        Wartet, bis das Modell geladen ist. Löst den Ladefehler aus, falls es einen gab.
+        """
+        if not self._ready.wait(timeout):
+            return False
+        if self._load_error is not None:
+            raise self._load_error
+        return True
+
+    def submit(self, item, roi=None):
+        """
+        Stellt ein Bild zur Auswertung ein und kehrt sofort zurück.
+        Dekodiert und skaliert wird erst im Hintergrund, gemeinsam mit den übrigen
+        Bildern des Batches.
+
+        Parameter:
+        -----------
+        item : str oder np.ndarray
+            Pfad zum Bild oder bereits dekodiertes BGR-Bild.
+        roi : None, 'full', 'auto', tuple oder roi.Roi
+            Ausschnitt (siehe preprocess()).
+
+        Rückgabewert:
+        --------------
+        concurrent.futures.Future
+            Liefert die Defekt-Wahrscheinlichkeit (0..1).
+        """
+        future = Future()
+        self._queue.put((item, roi, future, time.monotonic()))
+        return future
+
+    def predict(self, items, roi=None, timeout=None):
+        """
+        Wertet mehrere Bilder aus und gibt die Wahrscheinlichkeiten in derselben Reihenfolge zurück.
+        """
+        futures = [self.submit(item, roi) for item in items]
+        return [future.result(timeout) for future in futures]
+
+    @property
+    def mean_batch_size(self):
+        """
+        Durchschnittliche Anzahl Bilder pro Modellaufruf.
+        """
+        return self.images / self.batches if self.batches else 0.0
+
+    def close(self):
+        """
+        Arbeitet ausstehende Bilder ab und beendet den Hintergrund-Thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=True)
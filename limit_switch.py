@@ -0,0 +1,124 @@
+import time
+import threading
+from datetime import timedelta
+
+import gpiod
+from gpiod.line import Direction, Value, Bias, Edge
+
+
+class LimitSwitch:
+    """
+    Endschalter (Mikroschalter gegen Masse) mit Flankenerkennung über gpiod (API ab Version 2).
+
+    Statt den Eingang bei jedem Schritt per get_value() abzufragen (ein Systemaufruf
+    pro Puls), meldet der Kernel jede Flanke als Ereignis. Ein Hintergrund-Thread
+    wartet auf diese Ereignisse und hält den Zustand in 'pressed' aktuell; die
+    Pulsschleife liest nur noch dieses Attribut.
+
+    Die Entprellung übernimmt der Kernel (debounce_period). Jedes Ereignis trägt
+    einen Zeitstempel (CLOCK_MONOTONIC, wie time.monotonic_ns()), damit lässt sich
+    die Verzögerung vom Betätigen des Schalters bis zum Stillstand messen.
+    """
+
+    def __init__(self, chip_name='/dev/gpiochip0', offset=12, debounce=0.002,
+                 consumer='limit-switch', callback=None):
+        """
+        Parameter:
+        -----------
+        chip_name : str
+            Pfad des GPIO-Chips, z. B. '/dev/gpiochip0'.
+        offset : int
+            GPIO-Offset des Schalters (nicht unbedingt identisch mit der BCM-Nummer).
+        debounce : float
+            Entprellzeit in Sekunden. Kürzere Pegelwechsel werden ignoriert.
+        consumer : str
+            Name, unter dem die Leitung belegt wird (siehe 'gpioinfo').
+        callback : callable
+            Optional: wird bei jeder Änderung mit (pressed, timestamp_ns) aufgerufen
+            (im Hintergrund-Thread, sollte also schnell zurückkehren).
+        """
+        if not chip_name.startswith('/dev/'):
+            chip_name = '/dev/' + chip_name
+        self.offset = offset
+        self.callback = callback
+
+        # Pull-Up: Ruhezustand HIGH, der Schalter zieht auf LOW. Mit active_low
+        # bedeutet Value.ACTIVE (und eine steigende Flanke) "betätigt".
+        settings = gpiod.LineSettings(
+            direction=Direction.INPUT,
+            bias=Bias.PULL_UP,
+            active_low=True,
+            edge_detection=Edge.BOTH,
+            debounce_period=timedelta(seconds=debounce)
+        )
+        self.request = gpiod.request_lines(chip_name, consumer=consumer, config={offset: settings})
+
+        # Zustand, von der Pulsschleife ohne Systemaufruf lesbar
+        self.pressed = self.request.get_value(offset) == Value.ACTIVE
+        self.last_event_ns = None
+        self.event_count = 0
+
+        self._changed = threading.Condition()
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="limit-switch", daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        """
+        Hintergrund-Thread: wartet auf Flanken und aktualisiert den Zustand.
+        """
+        request = self.request
+        while not self._closing.is_set():
+            # Mit Timeout, damit close() den Thread beenden kann
+            if not request.wait_edge_events(0.1):
+                continue
+            for event in request.read_edge_events():
+                pressed = event.event_type == event.Type.RISING_EDGE
+                with self._changed:
+                    self.pressed = pressed
+                    self.last_event_ns = event.timestamp_ns
+                    self.event_count += 1
+                    self._changed.notify_all()
+                if self.callback is not None:
+                    self.callback(pressed, event.timestamp_ns)
+
+    def is_pressed(self):
+        """
+        Gibt True zurück, wenn der Schalter betätigt ist (ohne Systemaufruf).
+        """
+        return self.pressed
+
+    def wait_for(self, pressed=True, timeout=None):
+        """
+        Wartet, bis der Schalter den Zustand 'pressed' hat.
+
+        Rückgabewert:
+        --------------
+        bool
+            False, wenn der Zustand innerhalb von 'timeout' Sekunden nicht erreicht wurde.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.pressed == pressed, timeout)
+
+    def latency_since_event(self):
+        """
+        Zeit in Sekunden seit der letzten Flanke (Kernel-Zeitstempel), None ohne Flanke.
+        Direkt nach einem Stopp aufgerufen entspricht das der Stopp-Latenz.
+        """
+        if self.last_event_ns is None:
+            return None
+        return (time.monotonic_ns() - self.last_event_ns) / 1e9
+
+    def close(self):
+        """
+        Beendet den Hintergrund-Thread und gibt die Leitung frei.
+        """
+        self._closing.set()
+        self._thread.join()
+        self.request.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
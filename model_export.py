@@ -0,0 +1,105 @@
+import os
+import sys
+import argparse
+
+import config
+from inference import preprocess
+from raw_image import IMAGE_EXTENSIONS
+
+
+def calibration_images(directory, samples):
+    """
+    Gibt bis zu 'samples' Bildpfade aus den Klassen-Unterordnern von 'directory'
+    zurück (abwechselnd aus allen Klassen, damit jede Klasse vertreten ist).
+    """
+    classes = sorted(d.path for d in os.scandir(directory) if d.is_dir())
+    per_class = [
+        sorted(f.path for f in os.scandir(folder) if f.name.lower().endswith(IMAGE_EXTENSIONS))
+        for folder in classes
+    ]
+    paths = []
+    for i in range(max((len(files) for files in per_class), default=0)):
+        for files in per_class:
+            if i < len(files):
+                paths.append(files[i])
+                if len(paths) >= samples:
+                    return paths
+    return paths
+
+
+def export_tflite(model_path, output_path, int8=False, calibration_dir="data/train", samples=200):
+    """
+    Konvertiert das Keras-Modell nach TensorFlow Lite.
+
+    Parameter:
+    -----------
+    model_path : str
+        Keras-Modell (.h5/.keras).
+    output_path : str
+        Zieldatei (.tflite).
+    int8 : bool
+        True: vollständige int8-Quantisierung (Gewichte und Aktivierungen, auch Ein-
+        und Ausgang). Die Wertebereiche werden mit Bildern aus 'calibration_dir'
+        bestimmt. Das Modell wird etwa 4x kleiner und läuft auf ARM-CPUs deutlich schneller.
+    calibration_dir : str
+        Trainingsdaten mit Klassen-Unterordnern (wie für flow_from_directory).
+    samples : int
+        Anzahl Bilder für die Kalibrierung.
+
+    Rückgabewert:
+    --------------
+    size : int
+        Größe der erzeugten Datei in Bytes.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if int8:
+        paths = calibration_images(calibration_dir, samples)
+        if not paths:
+            raise FileNotFoundError(f"Keine Bilder für die Kalibrierung in '{calibration_dir}' gefunden.")
+
+        def representative_dataset():
+            # Gleiche Vorverarbeitung wie im Betrieb; Trainingsbilder sind bereits zugeschnitten
+            for path in paths:
+                yield [preprocess(path, roi="full")[None]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    data = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def main(argv=None):
+    """
+    Kommandozeile: Export des Fehlererkennungs-Modells nach TensorFlow Lite.
+    """
+    parser = argparse.ArgumentParser(description="Keras-Modell nach TensorFlow Lite exportieren (optional int8)")
+    parser.add_argument("model", nargs="?", default=config.model_path, help="Keras-Modell (.h5)")
+    parser.add_argument("--output", "-o", help="Zieldatei (Standard: <Modell>.tflite bzw. <Modell>_int8.tflite)")
+    parser.add_argument("--int8", action="store_true", help="int8-Quantisierung mit Kalibrierung")
+    parser.add_argument("--calibration-dir", default="data/train", help="Bilder für die Kalibrierung")
+    parser.add_argument("--samples", type=int, default=200, help="Anzahl Kalibrierbilder")
+    args = parser.parse_args(argv)
+
+    output = args.output
+    if output is None:
+        root = os.path.splitext(args.model)[0]
+        output = root + ("_int8.tflite" if args.int8 else ".tflite")
+
+    size = export_tflite(args.model, output, args.int8, args.calibration_dir, args.samples)
+    print(f"Modell exportiert: {output} ({size / 1e6:.2f} MB, {os.path.getsize(args.model) / 1e6:.2f} MB als .h5)")
+    print(f"Verwenden mit config.model_path = \"{output}\"")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import numpy as np
+
+
+# Anzahl der Stützstellen für die Beschleunigungsphase
+_SAMPLES = 4096
+
+
+def _accel_phase(v_peak, v_start, acceleration, jerk):
+    """
+    Berechnet die Beschleunigungsphase von v_start auf v_peak im Zeitbereich.
+
+    Ohne jerk (None) ist die Beschleunigung konstant (Trapezprofil), sonst wird
+    die Beschleunigung mit begrenztem Ruck auf- und abgebaut (S-Kurve).
+
+    Rückgabewert:
+    --------------
+    t, pos : np.ndarray
+        Zeitpunkte (s) und zurückgelegte Strecke (Schritte) der Phase.
+    """
+    dv = v_peak - v_start
+    if dv <= 0:
+        return np.zeros(1), np.zeros(1)
+
+    if jerk is None:
+        duration = dv / acceleration
+        t = np.linspace(0.0, duration, _SAMPLES)
+        v = v_start + acceleration * t
+    else:
+        # Dauer des Ruck-Abschnitts; reicht dv nicht für die volle Beschleunigung,
+        # wird nur ein Dreieck im Beschleunigungsverlauf gefahren.
+        t_jerk = acceleration / jerk
+        if dv >= acceleration * t_jerk:
+            a_peak = acceleration
+            t_const = dv / acceleration - t_jerk
+        else:
+            t_jerk = np.sqrt(dv / jerk)
+            a_peak = jerk * t_jerk
+            t_const = 0.0
+
+        duration = 2 * t_jerk + t_const
+        t = np.linspace(0.0, duration, _SAMPLES)
+        a = np.minimum.reduce([
+            jerk * t,
+            np.full_like(t, a_peak),
+            jerk * (duration - t)
+        ])
+        # Geschwindigkeit durch Integration der Beschleunigung (Trapezregel)
+        v = v_start + np.concatenate(([0.0], np.cumsum((a[1:] + a[:-1]) * 0.5 * np.diff(t))))
+        # Rundungsfehler der Integration auf die Zielgeschwindigkeit korrigieren
+        v = v_start + (v - v_start) * (dv / (v[-1] - v_start))
+
+    pos = np.concatenate(([0.0], np.cumsum((v[1:] + v[:-1]) * 0.5 * np.diff(t))))
+    return t, pos
+
+
+def plan_move(steps, max_velocity, acceleration, jerk=None, start_velocity=0.0):
+    """
+    Plant eine Bewegung mit Rampe (Beschleunigen - Fahren - Bremsen) und gibt die
+    Wartezeiten zwischen den einzelnen Schritten zurück.
+
+    Ist die Strecke zu kurz, um max_velocity zu erreichen, wird die
+    Spitzengeschwindigkeit so weit reduziert, dass Beschleunigungs- und
+    Bremsphase direkt aufeinander folgen.
+
+    Parameter:
+    -----------
+    steps : int
+        Anzahl der Schritte.
+    max_velocity : float
+        Maximale Geschwindigkeit in Schritten/s.
+    acceleration : float
+        Maximale Beschleunigung in Schritten/s².
+    jerk : float
+        Maximaler Ruck in Schritten/s³. None => Trapezprofil, sonst S-Kurve.
+    start_velocity : float
+        Start- und Endgeschwindigkeit in Schritten/s (z. B. die Start-Stopp-Frequenz des Motors).
+
+    Rückgabewert:
+    --------------
+    periods : np.ndarray
+        Array der Länge 'steps' mit der Zeit in Sekunden vom jeweiligen Schritt zum nächsten.
+    """
+    steps = int(steps)
+    if steps <= 0:
+        return np.zeros(0)
+    if max_velocity <= 0 or acceleration <= 0:
+        raise ValueError("max_velocity und acceleration müssen größer als 0 sein.")
+    start_velocity = min(start_velocity, max_velocity)
+
+    # Spitzengeschwindigkeit bestimmen (ggf. per Bisektion reduzieren)
+    v_peak = max_velocity
+    t_acc, pos_acc = _accel_phase(v_peak, start_velocity, acceleration, jerk)
+    if 2 * pos_acc[-1] > steps:
+        low, high = start_velocity, max_velocity
+        for _ in range(40):
+            v_peak = 0.5 * (low + high)
+            t_acc, pos_acc = _accel_phase(v_peak, start_velocity, acceleration, jerk)
+            if 2 * pos_acc[-1] > steps:
+                high = v_peak
+            else:
+                low = v_peak
+        v_peak = low
+        t_acc, pos_acc = _accel_phase(v_peak, start_velocity, acceleration, jerk)
+
+    # Konstantfahrt mit v_peak
+    accel_distance = pos_acc[-1]
+    accel_time = t_acc[-1]
+    cruise_distance = max(steps - 2 * accel_distance, 0.0)
+    cruise_time = cruise_distance / v_peak if v_peak > 0 else 0.0
+
+    # Gesamtes Profil: Beschleunigen, Fahren, Bremsen (gespiegelte Beschleunigung)
+    t_profile = np.concatenate((
+        t_acc,
+        accel_time + cruise_time + (accel_time - t_acc[::-1])
+    ))
+    pos_profile = np.concatenate((
+        pos_acc,
+        accel_distance + cruise_distance + (accel_distance - pos_acc[::-1])
+    ))
+
+    # Zeitpunkte der einzelnen Schritte durch Interpolation der Strecke
+    step_times = np.interp(np.arange(steps + 1), pos_profile, t_profile)
+    periods = np.diff(step_times)
+
+    # Sicherheitsnetz für den Sonderfall start_velocity = 0 ohne Strecke
+    if not np.all(np.isfinite(periods)) or np.any(periods <= 0):
+        periods = np.where(np.isfinite(periods) & (periods > 0), periods, 1.0 / max_velocity)
+    return periods
+
+
+def plan_stop(velocity, acceleration, start_velocity=0.0):
+    """
+    Plant das Abbremsen aus der Geschwindigkeit 'velocity' mit konstanter Verzögerung
+    bis auf start_velocity (z. B. beim Abbrechen einer laufenden Bewegung).
+
+    Parameter:
+    -----------
+    velocity : float
+        Aktuelle Geschwindigkeit in Schritten/s.
+    acceleration : float
+        Maximale Verzögerung in Schritten/s².
+    start_velocity : float
+        Geschwindigkeit in Schritten/s, ab der der Motor sofort stehen bleiben kann.
+
+    Rückgabewert:
+    --------------
+    periods : np.ndarray
+        Zeit in Sekunden zwischen den Schritten der Bremsrampe (ggf. leer).
+    """
+    if velocity <= start_velocity or acceleration <= 0:
+        return np.zeros(0)
+
+    # v_k² = v² - 2 * a * k  für k = 1, 2, ... bis v_k <= start_velocity
+    steps = int((velocity ** 2 - start_velocity ** 2) / (2 * acceleration))
+    if steps <= 0:
+        return np.zeros(0)
+    v = np.sqrt(np.maximum(velocity ** 2 - 2 * acceleration * np.arange(1, steps + 1), 0.0))
+    v = np.maximum(v, max(start_velocity, 1e-3))
+    return 1.0 / v
+
+
+def degree_to_steps(degree, steps_per_revolution):
+    """
+    Rechnet einen Winkel in Grad in eine (ganzzahlige) Schrittzahl um.
+    """
+    return int((degree / 360.0) * steps_per_revolution)
+
+
+if __name__ == "__main__":
+    # Vergleich: feste Verzögerung vs. Rampe für eine halbe Umdrehung am TB6600 (1/8-Mikroschritt)
+    steps = 800
+    fixed = steps * 2 * 0.001
+    trapezoid = plan_move(steps, max_velocity=3200, acceleration=6400)
+    s_curve = plan_move(steps, max_velocity=3200, acceleration=6400, jerk=64000)
+    print(f"Feste Verzögerung (delay=0.001): {fixed:.3f}s")
+    print(f"Trapezprofil:                    {trapezoid.sum():.3f}s, "
+          f"kürzeste Periode {trapezoid.min() * 1e6:.0f}µs")
+    print(f"S-Kurve:                         {s_curve.sum():.3f}s, "
+          f"kürzeste Periode {s_curve.min() * 1e6:.0f}µs")
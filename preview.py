@@ -0,0 +1,189 @@
+import os
+import hashlib
+import threading
+import collections
+
+import cv2
+
+import config
+import raw_image
+
+
+class PreviewCache:
+    """
+    Verkleinerte Vorschaubilder für die Oberfläche (app.py).
+
+    Ein Vorschaubild wird nur einmal aus dem Originalbild (z. B. 20 MP) dekodiert und
+    verkleinert. Danach liegt es
+      - als JPEG im Vorschau-Verzeichnis (bleibt über Neustarts der App erhalten) und
+      - als Numpy-Array in einem LRU-Speicher mit Byte-Budget (für schnelle Reruns).
+
+    Schlüssel ist (Pfad, Änderungszeit, Zielgröße): Wird eine Datei überschrieben,
+    entsteht automatisch ein neues Vorschaubild.
+
+    Die Bilder werden wie bei OpenCV üblich im BGR-Format zurückgegeben
+    (Anzeige mit st.image(..., channels="BGR")).
+    """
+
+    def __init__(self, directory=None, memory_budget=None, jpeg_quality=90, store=None):
+        """
+        Parameter:
+        -----------
+        directory : str
+            Verzeichnis für die Vorschaubilder. Standard: config.preview_directory
+        memory_budget : int
+            Maximale Größe aller Vorschaubilder im Arbeitsspeicher in Bytes.
+            Standard: config.preview_memory_budget
+        jpeg_quality : int
+            JPEG-Qualität (0-100) der gespeicherten Vorschaubilder.
+        store : artifact_store.ArtifactStore
+            Optional: Vorschaubilder statt im Vorschau-Verzeichnis im Artefakt-Speicher
+            ablegen (Schlüssel ist dann der Inhalt der Datei, Größe begrenzt per LRU).
+        """
+        self.directory = directory or config.preview_directory
+        self.memory_budget = memory_budget if memory_budget is not None else config.preview_memory_budget
+        self.jpeg_quality = jpeg_quality
+        self.store = store
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        # Zähler für Treffer im Speicher, auf der Platte und Neuberechnungen
+        self.stats = collections.Counter()
+
+    def _key(self, path, max_size):
+        """
+        Schlüssel aus absolutem Pfad, Änderungszeit (ns) und Zielgröße.
+        Löst FileNotFoundError aus, wenn die Datei nicht existiert.
+        """
+        path = os.path.abspath(path)
+        return (path, os.stat(path).st_mtime_ns, int(max_size))
+
+    def _disk_path(self, key):
+        """
+        Dateiname des Vorschaubilds im Vorschau-Verzeichnis.
+        """
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.jpg")
+
+    def _decode(self, path, max_size):
+        """
+        Liest das Originalbild und verkleinert es, sodass die längere Seite
+        höchstens max_size Pixel hat.
+
+        JPEG-Dateien kann OpenCV direkt beim Dekodieren um den Faktor 2 bzw. 4
+        verkleinern (IMREAD_REDUCED_COLOR_*), das ist deutlich schneller als volles
+        Dekodieren. Bei RAW-Dateien gilt das für das eingebettete JPEG. Ist das
+        reduzierte Bild kleiner als max_size, wird mit dem kleineren Faktor bzw.
+        in voller Auflösung dekodiert.
+        """
+        image = raw_image.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+        if image is None:
+            raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {path}")
+
+        longest = max(image.shape[:2])
+        if longest < max_size:
+            # Faktor 4 ist zu klein: Faktor 2 reicht, falls das Original groß genug ist
+            flag = cv2.IMREAD_REDUCED_COLOR_2 if 2 * longest >= max_size else cv2.IMREAD_COLOR
+            image = raw_image.imread(path, flag)
+            if image is None:
+                raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {path}")
+        return resize_to_fit(image, max_size)
+
+    def _remember(self, key, image):
+        """
+        Legt ein Vorschaubild im Speicher ab und verdrängt die am längsten nicht
+        genutzten Bilder, bis das Byte-Budget eingehalten ist.
+        """
+        with self._lock:
+            if key in self._memory:
+                return
+            if image.nbytes > self.memory_budget:
+                return
+            self._memory[key] = image
+            self._memory_bytes += image.nbytes
+            while self._memory_bytes > self.memory_budget:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+                self.stats["evicted"] += 1
+
+    def load(self, path, max_size=None):
+        """
+        Gibt das Vorschaubild zu 'path' zurück (BGR, längere Seite <= max_size).
+
+        Parameter:
+        -----------
+        path : str
+            Pfad zum Originalbild.
+        max_size : int
+            Länge der längeren Bildseite in Pixeln. Standard: config.preview_size
+        """
+        key = self._key(path, max_size or config.preview_size)
+
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory"] += 1
+                return image
+
+        if self.store is not None:
+            params = {"max_size": key[2]}
+            image = self.store.get(key[0], "preview", params)
+            if image is not None:
+                self.stats["disk"] += 1
+            else:
+                image = self._decode(key[0], key[2])
+                self.store.put(key[0], "preview", params, image, ".jpg")
+                self.stats["decoded"] += 1
+            image.setflags(write=False)
+            self._remember(key, image)
+            return image
+
+        disk_path = self._disk_path(key)
+        image = cv2.imread(disk_path) if os.path.isfile(disk_path) else None
+        if image is not None:
+            self.stats["disk"] += 1
+        else:
+            image = self._decode(key[0], key[2])
+            # Erst in eine temporäre Datei schreiben, damit parallele Reruns
+            # nie ein halb geschriebenes Vorschaubild lesen
+            tmp_path = f"{disk_path}.{threading.get_ident()}.tmp.jpg"
+            cv2.imwrite(tmp_path, image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            os.replace(tmp_path, disk_path)
+            self.stats["decoded"] += 1
+
+        image.setflags(write=False)
+        self._remember(key, image)
+        return image
+
+    @property
+    def memory_bytes(self):
+        """
+        Belegter Arbeitsspeicher aller Vorschaubilder in Bytes.
+        """
+        return self._memory_bytes
+
+    def clear_memory(self):
+        """
+        Leert den LRU-Speicher (die Vorschaubilder auf der Platte bleiben erhalten).
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+
+def resize_to_fit(image, max_size):
+    """
+    Verkleinert ein Bild (Seitenverhältnis bleibt erhalten), sodass die längere
+    Seite höchstens max_size Pixel hat. Kleinere Bilder bleiben unverändert.
+    """
+    height, width = image.shape[:2]
+    scale = max_size / max(height, width)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # INTER_AREA liefert beim Verkleinern die besten Ergebnisse (kein Aliasing)
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
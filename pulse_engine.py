@@ -0,0 +1,293 @@
+import os
+import time
+import heapq
+import threading
+import statistics
+from array import array
+
+
+class SimulatedLine:
+    """
+    GPIO-Ausgang ohne Hardware. Speichert jede Flanke mit Zeitstempel
+    (time.perf_counter_ns), sodass sich das Timing der Pulse auf einem
+    normalen Linux-Rechner überprüfen lässt.
+    """
+
+    def __init__(self, value=0):
+        self.value = value
+        self.edges = []
+
+    def set_value(self, value):
+        """
+        Setzt den Wert der Leitung und merkt sich den Zeitpunkt der Flanke.
+        """
+        self.edges.append((time.perf_counter_ns(), value))
+        self.value = value
+
+    def get_value(self):
+        """
+        Gibt den aktuellen Wert der Leitung zurück.
+        """
+        return self.value
+
+    def rising_edges(self):
+        """
+        Gibt die Zeitstempel (ns) aller steigenden Flanken zurück.
+        """
+        timestamps = []
+        previous = 0
+        for timestamp, value in self.edges:
+            if value and not previous:
+                timestamps.append(timestamp)
+            previous = value
+        return timestamps
+
+
+class PulseStats:
+    """
+    Auswertung einer Pulsfolge: erreichte Schrittrate und Jitter
+    (Abweichung der tatsächlichen von den geplanten Schrittzeitpunkten).
+    """
+
+    def __init__(self, steps_requested, actual_ns, jitter_ns, mode, realtime):
+        """
+        Parameter:
+        -----------
+        steps_requested : int
+            Geplante Anzahl Schritte (None bei offener Pulsfolge, z. B. Referenzfahrt).
+        actual_ns : sequence
+            Tatsächliche Zeitpunkte der Schritte in ns.
+        jitter_ns : sequence
+            Abweichung der tatsächlichen von den geplanten Zeitpunkten in ns.
+        mode : str
+            Verwendeter Wartemodus der PulseEngine.
+        realtime : bool
+            True, wenn die Pulsfolge in einem Echtzeit-Thread (SCHED_FIFO) lief.
+        """
+        self.steps_requested = steps_requested
+        self.steps_done = len(actual_ns)
+        self.mode = mode
+        self.realtime = realtime
+
+        if self.steps_done > 1:
+            self.duration = (actual_ns[-1] - actual_ns[0]) / 1e9
+            planned = ((actual_ns[-1] - jitter_ns[-1]) - (actual_ns[0] - jitter_ns[0])) / 1e9
+            self.step_rate = (self.steps_done - 1) / self.duration if self.duration > 0 else 0.0
+            self.target_rate = (self.steps_done - 1) / planned if planned > 0 else 0.0
+        else:
+            self.duration = 0.0
+            self.step_rate = 0.0
+            self.target_rate = 0.0
+
+        # Jitter in Mikrosekunden (ohne Kopie der Messwerte; für p99 genügen die größten 1 %)
+        count = len(jitter_ns)
+        self.jitter_mean = statistics.fmean(jitter_ns) / 1000.0 if count else 0.0
+        self.jitter_std = statistics.pstdev(jitter_ns) / 1000.0 if count > 1 else 0.0
+        self.jitter_max = max(jitter_ns) / 1000.0 if count else 0.0
+        self.jitter_p99 = heapq.nlargest(count - int(0.99 * (count - 1)), jitter_ns)[-1] / 1000.0 if count else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.steps_done} Schritte in {self.duration:.3f}s "
+            f"({self.step_rate:.0f} Schritte/s, Soll {self.target_rate:.0f}), "
+            f"Jitter mittel={self.jitter_mean:.1f}µs std={self.jitter_std:.1f}µs "
+            f"p99={self.jitter_p99:.1f}µs max={self.jitter_max:.1f}µs "
+            f"[Modus={self.mode}, Echtzeit={'ja' if self.realtime else 'nein'}]"
+        )
+
+
+class PulseEngine:
+    """
+    Erzeugt zeitgenaue Schrittfolgen für Schrittmotoren.
+
+    Die Schritte werden auf absolute Zeitpunkte (time.perf_counter_ns) geplant,
+    sodass sich Verzögerungen nicht aufsummieren. Wartemodi:
+      - 'sleep':  nur time.sleep() (wie bisher, ungenau bei kurzen Perioden)
+      - 'spin':   reines Busy-Waiting auf perf_counter_ns (genau, 100 % CPU)
+      - 'hybrid': schlafen bis kurz vor dem Zeitpunkt, den Rest per Busy-Waiting.
+                  Das Fenster wird mit calibrate() aus dem gemessenen
+                  Überschwingen von time.sleep() bestimmt.
+
+    Optional läuft die Pulsfolge in einem eigenen Thread mit Echtzeit-Priorität
+    (SCHED_FIFO, benötigt entsprechende Rechte).
+    """
+
+    MODES = ("sleep", "spin", "hybrid")
+
+    def __init__(self, mode="hybrid", spin_window=0.0005, realtime=False, realtime_priority=50):
+        """
+        Parameter:
+        -----------
+        mode : str
+            'sleep', 'spin' oder 'hybrid'.
+        spin_window : float
+            Zeit in Sekunden vor jedem Schritt, die im Modus 'hybrid' per Busy-Waiting
+            überbrückt wird.
+        realtime : bool
+            Pulsfolge in einem Thread mit SCHED_FIFO-Priorität ausführen.
+        realtime_priority : int
+            Priorität für SCHED_FIFO (1-99).
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modus muss einer von {self.MODES} sein.")
+        self.mode = mode
+        self.spin_window = spin_window
+        self.realtime = realtime
+        self.realtime_priority = realtime_priority
+        self._steps_done = 0
+
+    @property
+    def steps_done(self):
+        """
+        Anzahl der bereits ausgegebenen Schritte der laufenden (bzw. letzten) Pulsfolge.
+        Kann während einer Bewegung aus einem anderen Thread abgefragt werden.
+        """
+        return self._steps_done
+
+    def calibrate(self, samples=200, request=0.0001):
+        """
+        Misst, wie weit time.sleep() auf diesem System überschwingt, und setzt
+        das Busy-Wait-Fenster für den Modus 'hybrid' entsprechend.
+
+        Parameter:
+        -----------
+        samples : int
+            Anzahl der Messungen.
+        request : float
+            Angefragte Schlafdauer in Sekunden pro Messung.
+
+        Rückgabewert:
+        --------------
+        float
+            Das neue spin_window in Sekunden.
+        """
+        overshoot = []
+        for _ in range(samples):
+            start = time.perf_counter_ns()
+            time.sleep(request)
+            overshoot.append(time.perf_counter_ns() - start - request * 1e9)
+        overshoot.sort()
+        # 99. Perzentil plus Sicherheitsabstand
+        p99 = overshoot[int(0.99 * (len(overshoot) - 1))]
+        self.spin_window = max(p99, 0) / 1e9 + 0.00005
+        return self.spin_window
+
+    def run(self, step, periods, should_stop=None, steps_requested=None):
+        """
+        Führt 'step' zu den geplanten Zeitpunkten aus.
+
+        Parameter:
+        -----------
+        step : callable
+            Wird für jeden Schritt aufgerufen (z. B. Puls auf PUL ausgeben).
+        periods : iterable
+            Abstand in Sekunden vom jeweiligen Schritt zum nächsten. Die Anzahl der
+            Einträge bestimmt die Anzahl der Schritte (darf auch ein unendlicher
+            Iterator sein, z. B. für eine Referenzfahrt mit should_stop).
+        should_stop : callable
+            Optional. Wird vor jedem Schritt geprüft; gibt sie True zurück, endet die Pulsfolge.
+        steps_requested : int
+            Optional. Geplante Schrittzahl für die Statistik (Standard: len(periods)).
+
+        Rückgabewert:
+        --------------
+        PulseStats
+            Erreichte Schrittrate und Jitter-Statistik.
+        """
+        if steps_requested is None and hasattr(periods, "__len__"):
+            steps_requested = len(periods)
+
+        if not self.realtime:
+            return self._run(step, periods, should_stop, steps_requested, False)
+
+        # Pulsfolge in einem eigenen Thread mit Echtzeit-Priorität
+        result = {}
+
+        def target():
+            realtime = self._enable_realtime()
+            try:
+                result["stats"] = self._run(step, periods, should_stop, steps_requested, realtime)
+            except BaseException as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=target, name="pulse-engine")
+        thread.start()
+        thread.join()
+        if "error" in result:
+            raise result["error"]
+        return result["stats"]
+
+    def _enable_realtime(self):
+        """
+        Versucht, den aufrufenden Thread auf SCHED_FIFO umzustellen.
+        Gibt True zurück, wenn das gelungen ist.
+        """
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.realtime_priority))
+            return True
+        except (AttributeError, PermissionError, OSError) as e:
+            print(f"Echtzeit-Priorität nicht verfügbar ({e}), verwende normale Priorität.")
+            return False
+
+    def _run(self, step, periods, should_stop, steps_requested, realtime):
+        """
+        Zeitkritische Schleife. Alles, was nicht zwingend pro Schritt nötig ist,
+        wird vorher erledigt: Zeitpunkte und Jitter landen in vorab angelegten
+        Arrays (bei unbekannter Schrittzahl wachsen sie blockweise), der geplante
+        Zeitpunkt wird als float in ns fortgeschrieben.
+        """
+        perf = time.perf_counter_ns
+        sleep = time.sleep
+        mode = self.mode
+        spin_window_ns = int(self.spin_window * 1e9)
+
+        capacity = steps_requested or 1024
+        actual = array("q", bytes(8 * capacity))
+        jitter = array("d", bytes(8 * capacity))
+        index = 0
+        self._steps_done = 0
+
+        deadline = perf()
+        for period in periods:
+            if should_stop is not None and should_stop():
+                break
+
+            # Bis zum geplanten Zeitpunkt warten
+            if mode == "spin":
+                while perf() < deadline:
+                    pass
+            elif mode == "hybrid":
+                remaining = deadline - perf() - spin_window_ns
+                if remaining > 0:
+                    sleep(remaining / 1e9)
+                while perf() < deadline:
+                    pass
+            else:
+                remaining = deadline - perf()
+                if remaining > 0:
+                    sleep(remaining / 1e9)
+
+            now = perf()
+            if index == capacity:
+                # Mehr Schritte als geplant (z. B. Bremsrampe, offene Pulsfolge): Ablage verdoppeln
+                actual.frombytes(bytes(8 * capacity))
+                jitter.frombytes(bytes(8 * capacity))
+                capacity *= 2
+            actual[index] = now
+            jitter[index] = now - deadline
+            step()
+            index += 1
+            self._steps_done = index
+            deadline += period * 1e9
+
+        return PulseStats(steps_requested, memoryview(actual)[:index], memoryview(jitter)[:index], mode, realtime)
+
+
+def busy_wait(seconds):
+    """
+    Wartet aktiv (ohne den Thread schlafen zu legen) die angegebene Zeit.
+    Für sehr kurze Wartezeiten, z. B. die Pulsbreite am TB6600.
+    """
+    end = time.perf_counter_ns() + int(seconds * 1e9)
+    while time.perf_counter_ns() < end:
+        pass
@@ -0,0 +1,318 @@
+import os
+import mmap
+import time
+import struct
+import threading
+import collections
+
+import cv2
+import numpy as np
+
+import config
+
+try:
+    import rawpy
+except ImportError:  # optional: nur für read_linear() nötig
+    rawpy = None
+
+
+# RAW-Formate auf TIFF-Basis (Canon CR2, Nikon NEF, Sony ARW, DNG) mit eingebettetem JPEG
+RAW_EXTENSIONS = (".cr2", ".nef", ".arw", ".dng")
+
+# Dateiendungen, die als Bild gelten (RAW-Dateien werden über das eingebettete JPEG gelesen)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff") + RAW_EXTENSIONS
+
+# TIFF-Tags für eingebettete JPEG-Vorschauen und die Ausrichtung
+_TAG_STRIP_OFFSETS = 0x0111
+_TAG_STRIP_BYTE_COUNTS = 0x0117
+_TAG_JPEG_OFFSET = 0x0201
+_TAG_JPEG_LENGTH = 0x0202
+_TAG_SUB_IFDS = 0x014A
+_TAG_ORIENTATION = 0x0112
+# Canon CR2: Aufteilung der RAW-Sensordaten in Slices (nur im IFD mit den Rohdaten)
+_TAG_CANON_SLICES = 0xC5D8
+
+# JPEG-Marker: Start of Frame (verlustbehaftet bzw. verlustfrei) und Start of Scan
+_JPEG_SOF_LOSSY = (0xC0, 0xC1, 0xC2)
+_JPEG_SOF_LOSSLESS = 0xC3
+_JPEG_SOS = 0xDA
+
+# Drehung des Bildes je EXIF-Ausrichtung (nur die bei Kameras üblichen Werte)
+_ORIENTATION_ROTATION = {
+    3: cv2.ROTATE_180,
+    6: cv2.ROTATE_90_CLOCKWISE,
+    8: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+class DecodeLatency:
+    """
+    Sammelt die Dekodierzeiten pro Modus ('preview', 'linear', 'linear_cached', 'image'),
+    damit pro Verarbeitungsschritt zwischen Vorschau und voller RAW-Qualität
+    entschieden werden kann.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Pro Modus nur laufende Summen (Anzahl, Gesamtzeit, Maximum), kein Wachstum über die Laufzeit
+        self._totals = collections.defaultdict(lambda: [0, 0.0, 0.0])
+
+    def record(self, mode, seconds):
+        """
+        Speichert eine Dekodierzeit in Sekunden für den Modus 'mode'.
+        """
+        with self._lock:
+            totals = self._totals[mode]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def summary(self):
+        """
+        Gibt pro Modus (Anzahl, Mittelwert in ms, Maximum in ms) zurück.
+        """
+        with self._lock:
+            return {
+                mode: (count, 1000 * total / count, 1000 * maximum)
+                for mode, (count, total, maximum) in self._totals.items()
+            }
+
+    def __str__(self):
+        lines = [f"{'Modus':<14} {'Anzahl':>6} {'Mittel':>10} {'Maximum':>10}"]
+        for mode, (count, mean, maximum) in sorted(self.summary().items()):
+            lines.append(f"{mode:<14} {count:>6} {mean:>8.1f}ms {maximum:>8.1f}ms")
+        return "\n".join(lines)
+
+
+# Dekodierzeiten aller Aufrufe in diesem Prozess
+latency = DecodeLatency()
+
+
+def is_raw(path):
+    """
+    Gibt True zurück, wenn 'path' eine RAW-Datei ist (anhand der Dateiendung).
+    """
+    return os.path.splitext(path)[1].lower() in RAW_EXTENSIONS
+
+
+def _read_ifds(data):
+    """
+    Liest alle IFDs einer TIFF-Datei (Kette ab IFD0 und SubIFDs) und gibt sie als
+    Liste von Dictionaries {Tag: Liste der Werte} zurück.
+    """
+    if data[:2] == b"II":
+        order = "<"
+    elif data[:2] == b"MM":
+        order = ">"
+    else:
+        raise ValueError("Keine TIFF-basierte RAW-Datei")
+    if struct.unpack_from(order + "H", data, 2)[0] != 42:
+        raise ValueError("Ungültiger TIFF-Header")
+
+    # Größe der TIFF-Datentypen: BYTE, ASCII, SHORT, LONG, RATIONAL, ..., IFD (13)
+    type_sizes = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 13: 4}
+    type_formats = {3: "H", 4: "L", 13: "L"}
+
+    ifds = []
+    pending = [struct.unpack_from(order + "L", data, 4)[0]]
+    visited = set()
+    while pending:
+        offset = pending.pop(0)
+        if offset == 0 or offset in visited or offset + 2 > len(data):
+            continue
+        visited.add(offset)
+
+        entries = {}
+        count = struct.unpack_from(order + "H", data, offset)[0]
+        for i in range(count):
+            entry = offset + 2 + 12 * i
+            if entry + 12 > len(data):
+                break
+            tag, value_type, value_count = struct.unpack_from(order + "HHL", data, entry)
+            if value_type not in type_formats:
+                continue
+            size = type_sizes[value_type] * value_count
+            value_offset = entry + 8 if size <= 4 else struct.unpack_from(order + "L", data, entry + 8)[0]
+            if value_offset + size > len(data):
+                continue
+            entries[tag] = list(struct.unpack_from(
+                order + type_formats[value_type] * value_count, data, value_offset
+            ))
+        ifds.append(entries)
+
+        pending.extend(entries.get(_TAG_SUB_IFDS, []))
+        next_offset = offset + 2 + 12 * count
+        if next_offset + 4 <= len(data):
+            pending.append(struct.unpack_from(order + "L", data, next_offset)[0])
+    return ifds
+
+
+def _is_lossless_jpeg(data, offset, length, search_limit=65536):
+    """
+    True, wenn der JPEG-Strom ab 'offset' verlustfrei kodiert ist (SOF3). So sind bei
+    Canon CR2 die RAW-Sensordaten gespeichert; cv2.imdecode kann sie nicht dekodieren.
+    Es werden nur die Marker-Segmente bis zum ersten Start of Frame gelesen.
+    """
+    position = offset + 2
+    end = min(offset + length, offset + search_limit, len(data))
+    while position + 4 <= end:
+        if data[position] != 0xFF:
+            return False
+        marker = data[position + 1]
+        if marker == _JPEG_SOF_LOSSLESS:
+            return True
+        if marker in _JPEG_SOF_LOSSY or marker == _JPEG_SOS:
+            return False
+        position += 2 + struct.unpack_from(">H", data, position + 2)[0]
+    return False
+
+
+def extract_preview_jpeg(path):
+    """
+    Gibt das größte in der RAW-Datei eingebettete JPEG (bei Canon CR2 die Vorschau
+    in voller Auflösung) als Bytes zurück, ohne die RAW-Daten zu dekodieren.
+
+    Die Datei wird per Memory-Mapping gelesen: Von der Platte geladen werden nur
+    die IFDs und das gewählte JPEG, nicht die ganze RAW-Datei. Das IFD mit den
+    Sensordaten (Canon-Slices bzw. verlustfreies JPEG) wird übersprungen.
+
+    Rückgabewert:
+    --------------
+    jpeg, orientation : bytes, int
+        JPEG-Daten und EXIF-Ausrichtung (1 = nicht gedreht).
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        ifds = _read_ifds(data)
+        orientation = ifds[0].get(_TAG_ORIENTATION, [1])[0] if ifds else 1
+
+        candidates = []
+        for entries in ifds:
+            if _TAG_CANON_SLICES in entries:
+                continue
+            for offset_tag, length_tag in ((_TAG_JPEG_OFFSET, _TAG_JPEG_LENGTH),
+                                           (_TAG_STRIP_OFFSETS, _TAG_STRIP_BYTE_COUNTS)):
+                if offset_tag in entries and length_tag in entries:
+                    # Nur einteilige Vorschauen (eine Strip) sind vollständige JPEGs
+                    if len(entries[offset_tag]) == 1:
+                        candidates.append((entries[offset_tag][0], entries[length_tag][0]))
+
+        best = None
+        for offset, length in candidates:
+            if best is not None and length <= best[1]:
+                continue
+            if data[offset:offset + 2] == b"\xff\xd8" and not _is_lossless_jpeg(data, offset, length):
+                best = (offset, length)
+        if best is None:
+            raise ValueError(f"Kein eingebettetes JPEG gefunden: {path}")
+
+        offset, length = best
+        return data[offset:offset + length], orientation
+
+
+def read_preview(path, flags=cv2.IMREAD_COLOR):
+    """
+    Schneller Modus: dekodiert das eingebettete JPEG einer RAW-Datei (8 Bit, BGR,
+    bereits entwickelt). Für Anzeige und Kantendetektion in aller Regel ausreichend.
+
+    Parameter:
+    -----------
+    path : str
+        Pfad zur RAW-Datei.
+    flags : int
+        Flags für cv2.imdecode, z. B. cv2.IMREAD_GRAYSCALE oder cv2.IMREAD_REDUCED_COLOR_4.
+    """
+    start = time.perf_counter()
+    jpeg, orientation = extract_preview_jpeg(path)
+    image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError(f"Eingebettetes JPEG konnte nicht dekodiert werden: {path}")
+    if orientation in _ORIENTATION_ROTATION:
+        image = cv2.rotate(image, _ORIENTATION_ROTATION[orientation])
+    latency.record("preview", time.perf_counter() - start)
+    return image
+
+
+def read_linear(path, half_size=False, cache=True, store=None):
+    """
+    Analyse-Modus: volles Demosaicing der RAW-Daten mit rawpy (libraw) zu linearen
+    16-Bit-RGB-Werten (ohne Gamma, ohne automatische Helligkeit, Kamera-Weißabgleich).
+    Das ist um ein Vielfaches langsamer als read_preview() und daher nur für
+    Auswertungen gedacht, die lineare Sensordaten brauchen.
+
+    Das Ergebnis wird als .npy im Artefakt-Speicher abgelegt (Transformation 'linear',
+    in der Gesamtgröße begrenzt, siehe artifact_store.py) und bei späteren Aufrufen
+    per Memory-Mapping geladen.
+
+    Parameter:
+    -----------
+    path : str
+        Pfad zur RAW-Datei.
+    half_size : bool
+        True: halbe Auflösung ohne Interpolation (deutlich schneller).
+    cache : bool
+        False: immer neu dekodieren und nichts speichern.
+    store : artifact_store.ArtifactStore
+        Artefakt-Speicher für den Cache. Standard: artifact_store.default_store()
+
+    Rückgabewert:
+    --------------
+    rgb : np.ndarray
+        uint16-Array (Höhe, Breite, 3) in RGB-Reihenfolge.
+    """
+    if cache and store is None:
+        # Erst hier importieren: artifact_store importiert (über series_index) dieses Modul
+        from artifact_store import default_store
+        store = default_store()
+    params = {"half_size": bool(half_size)}
+
+    start = time.perf_counter()
+    if cache:
+        cache_path = store.path(path, "linear", params)
+        if cache_path is not None:
+            try:
+                rgb = np.load(cache_path, mmap_mode="r")
+                store.hits += 1
+                latency.record("linear_cached", time.perf_counter() - start)
+                return rgb
+            except OSError:
+                # Zwischenzeitlich verdrängt => neu dekodieren
+                pass
+
+    if rawpy is None:
+        raise ImportError("Für read_linear() wird das Paket 'rawpy' benötigt (pip install rawpy).")
+
+    with rawpy.imread(path) as raw:
+        rgb = raw.postprocess(
+            gamma=(1, 1),
+            no_auto_bright=True,
+            use_camera_wb=True,
+            output_bps=16,
+            half_size=half_size
+        )
+    latency.record("linear", time.perf_counter() - start)
+
+    if cache:
+        store.put(path, "linear", params, rgb, ".npy")
+    return rgb
+
+
+def imread(path, flags=cv2.IMREAD_COLOR):
+    """
+    Ersatz für cv2.imread, der auch RAW-Dateien liest (über das eingebettete JPEG).
+
+    Rückgabewert:
+    --------------
+    image : np.ndarray oder None
+        Wie cv2.imread: None, wenn die Datei nicht gelesen werden kann.
+    """
+    if is_raw(path):
+        try:
+            return read_preview(path, flags)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    start = time.perf_counter()
+    image = cv2.imread(path, flags)
+    if image is not None:
+        latency.record("image", time.perf_counter() - start)
+    return image
@@ -0,0 +1,223 @@
+import os
+import json
+import queue
+import threading
+import collections
+
+import cv2
+
+import config
+
+
+# Dateiendung und OpenCV-Parameter je Format
+FORMATS = ("png", "jpg", "webp")
+
+
+class ResultWriter:
+    """
+    Speichert Ergebnisbilder (z. B. Kantenbilder) asynchron in einem Hintergrund-Thread.
+
+    Die Berechnung wartet damit nicht mehr auf das Schreiben auf die SD-Karte.
+    Artefakte für den Artefakt-Speicher (submit_artifact()) werden im selben Thread
+    auch berechnet, die Oberfläche stellt sie also nur ein.
+    Identische Aufträge (gleicher Zielpfad und gleicher Schlüssel, z. B. Bild und
+    Parametersatz) werden nur einmal geschrieben; gemerkt werden die letzten
+    'max_seen' Aufträge. Schlägt das Schreiben fehl, wird der Auftrag vergessen und
+    kann erneut eingestellt werden.
+
+    Formate:
+      - 'png':  verlustfrei, png_compression 0 (schnell, groß) bis 9 (langsam, klein)
+      - 'jpg':  verlustbehaftet, jpeg_quality 0-100
+      - 'webp': verlustfrei (WebP lossless)
+    """
+
+    def __init__(self, format=None, png_compression=None, jpeg_quality=None, max_queue=8, max_seen=1024,
+                 max_errors=100):
+        """
+        Parameter:
+        -----------
+        format : str
+            'png', 'jpg' oder 'webp'. Standard: config.result_format
+        png_compression : int
+            PNG-Kompressionsstufe 0-9. Standard: config.result_png_compression
+        jpeg_quality : int
+            JPEG-Qualität 0-100. Standard: config.result_jpeg_quality
+        max_queue : int
+            Maximale Anzahl wartender Bilder. Ist die Warteschlange voll, blockiert
+            submit(), damit sich nicht beliebig viele Bilder im Speicher sammeln.
+        max_seen : int
+            Anzahl der zuletzt eingestellten Schlüssel, für die Duplikate erkannt werden.
+        max_errors : int
+            Anzahl der zuletzt aufgetretenen Fehler, die in 'errors' gemerkt werden.
+        """
+        self.format = (format or config.result_format).lower()
+        if self.format == "jpeg":
+            self.format = "jpg"
+        if self.format not in FORMATS:
+            raise ValueError(f"Unbekanntes Format '{self.format}'. Möglich: {', '.join(FORMATS)}")
+
+        if self.format == "png":
+            level = config.result_png_compression if png_compression is None else png_compression
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, int(level)]
+        elif self.format == "jpg":
+            quality = config.result_jpeg_quality if jpeg_quality is None else jpeg_quality
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        else:
+            # Qualität > 100 bedeutet bei OpenCV verlustfreies WebP
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, 101]
+        self.extension = "." + self.format
+
+        self.written = 0
+        self.skipped = 0
+        self.errors = collections.deque(maxlen=max_errors)
+
+        self.max_seen = max_seen
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._work, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def target_path(self, path):
+        """
+        Gibt 'path' mit der Dateiendung des eingestellten Formats zurück.
+        """
+        return os.path.splitext(path)[0] + self.extension
+
+    def submit(self, image, path, key=None):
+        """
+        Stellt ein Bild zum Speichern ein und kehrt sofort zurück.
+
+        Parameter:
+        -----------
+        image : np.ndarray
+            Zu speicherndes Bild (wird nicht kopiert, danach also nicht mehr verändern).
+        path : str
+            Zielpfad; die Endung wird durch die des Formats ersetzt.
+        key : hashable
+            Optional: beschreibt den Inhalt (z. B. Quelle + Parameter). Wurde derselbe
+            Schlüssel für denselben Pfad schon eingestellt, wird nichts geschrieben.
+
+        Rückgabewert:
+        --------------
+        target : str oder None
+            Pfad, unter dem das Bild gespeichert wird, None bei einem Duplikat.
+        """
+        target = self.target_path(path)
+        seen_key = None if key is None else (target, key)
+        if not self._claim(seen_key):
+            return None
+        self._queue.put((image, target, seen_key))
+        return target
+
+    def submit_artifact(self, store, source, transform, params, compute, extension=".png", callback=None):
+        """
+        Stellt ein Artefakt für den Artefakt-Speicher ein und kehrt sofort zurück.
+        Berechnen (compute()), Speichern (store.put) und 'callback' laufen im
+        Hintergrund-Thread; liegt das Artefakt schon im Speicher, wird nichts berechnet.
+
+        Parameter:
+        -----------
+        store : artifact_store.ArtifactStore
+            Ziel-Speicher.
+        source : str
+            Pfad der Quelldatei.
+        transform : str
+            Name der Transformation, z. B. 'canny'.
+        params : dict
+            Parameter der Transformation (Teil des Schlüssels im Speicher).
+        compute : callable
+            Ohne Argumente aufgerufen, liefert das Bild bzw. Array.
+        extension : str
+            Format im Speicher, z. B. '.png'.
+        callback : callable
+            Optional: wird mit dem Pfad im Speicher aufgerufen, sobald das Artefakt dort liegt.
+
+        Rückgabewert:
+        --------------
+        bool
+            True, wenn eingestellt; False, wenn dasselbe Artefakt schon eingestellt wurde.
+        """
+        source = os.path.abspath(source)
+        seen_key = (source, os.stat(source).st_mtime_ns, transform,
+                    json.dumps(params or {}, sort_keys=True, default=str))
+        if not self._claim(seen_key):
+            return False
+
+        def task():
+            path = store.path(source, transform, params)
+            if path is None:
+                path = store.put(source, transform, params, compute(), extension)
+            if callback is not None:
+                callback(path)
+
+        self._queue.put((task, source, seen_key))
+        return True
+
+    def _claim(self, seen_key):
+        """
+        Merkt sich einen Auftrag; False, wenn er schon eingestellt wurde (Duplikat).
+        """
+        if seen_key is None:
+            return True
+        with self._lock:
+            if seen_key in self._seen:
+                self._seen.move_to_end(seen_key)
+                self.skipped += 1
+                return False
+            self._seen[seen_key] = True
+            while len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+        return True
+
+    def _work(self):
+        """
+        Hintergrund-Thread: schreibt die Bilder der Warteschlange nacheinander.
+        """
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                image, target, seen_key = item
+                if callable(image):
+                    # Auftrag aus submit_artifact(): berechnet und speichert selbst
+                    image()
+                    self.written += 1
+                    continue
+                directory = os.path.dirname(target)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Erst vollständig schreiben, dann umbenennen (keine halben Dateien)
+                tmp_path = f"{os.path.splitext(target)[0]}.tmp{self.extension}"
+                if not cv2.imwrite(tmp_path, image, self.params):
+                    raise OSError(f"Bild konnte nicht gespeichert werden: {target}")
+                os.replace(tmp_path, target)
+                self.written += 1
+            except Exception as e:
+                self.errors.append((item[1], e))
+                # Fehlgeschlagene Aufträge nicht als erledigt merken, damit sie wiederholt werden können
+                if item[2] is not None:
+                    with self._lock:
+                        self._seen.pop(item[2], None)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Wartet, bis alle eingestellten Bilder geschrieben sind.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Schreibt alle ausstehenden Bilder und beendet den Hintergrund-Thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
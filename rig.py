@@ -0,0 +1,255 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import config
+import camera
+from hardware import HardwareManager
+from series import SeriesExecutor
+from series_index import SeriesIndex, SeriesRecorder
+
+
+# Eine fertig heruntergeladene Aufnahme
+Capture = collections.namedtuple("Capture", ["rig", "view", "degree", "path"])
+
+
+def create_rigs(rigs=None, camera_backend=None, motor_backend=None):
+    """
+    Erzeugt einen HardwareManager pro Aufnahmeplatz.
+
+    Parameter:
+    -----------
+    rigs : list
+        Beschreibung der Aufnahmeplätze wie in config.rigs (Standard):
+        {"name": ..., "motor_backend": ..., "motor_options": {...}, "cameras": {Ansicht: Port}}
+    camera_backend : str
+        Überschreibt das Kamera-Backend aller Plätze (z. B. 'fake' zum Testen).
+    motor_backend : str
+        Überschreibt das Motor-Backend aller Plätze (z. B. 'simulator' zum Testen).
+
+    Rückgabewert:
+    --------------
+    dict
+        Name -> HardwareManager (in der Reihenfolge der Beschreibung).
+    """
+    managers = {}
+    for number, rig in enumerate(config.rigs if rigs is None else rigs):
+        name = rig.get("name") or f"rig{number + 1}"
+        if name in managers:
+            raise ValueError(f"Der Aufnahmeplatz '{name}' ist mehrfach beschrieben.")
+        managers[name] = HardwareManager(
+            camera_backend=camera_backend or rig.get("camera_backend"),
+            motor_backend=motor_backend or rig.get("motor_backend"),
+            cameras=rig.get("cameras"),
+            motor_options=rig.get("motor_options"),
+            name=name,
+        )
+    return managers
+
+
+class RigScheduler:
+    """
+    Steuert mehrere Aufnahmeplätze (Drehteller mit einer oder mehreren Kameras) an
+    einem Rechner.
+
+    Jeder Drehteller hat eine eigene Warteschlange: Serien für denselben Platz laufen
+    nacheinander, Serien auf verschiedenen Plätzen gleichzeitig. Innerhalb einer Serie
+    hat jede Kamera ihren eigenen Thread (siehe series.SeriesExecutor), alle Ansichten
+    eines Winkels werden also gleichzeitig ausgelöst. Die Kameras werden über ihren
+    gphoto2-Port angesprochen und halten jeweils eine eigene Session offen.
+
+    Beispiel:
+        scheduler = RigScheduler(create_rigs())
+        for capture in scheduler.run(36, "captured_images/schraube"):
+            print(capture.rig, capture.view, capture.degree, capture.path)
+        scheduler.close()
+    """
+
+    def __init__(self, rigs, settle_time=0.5):
+        """
+        Parameter:
+        -----------
+        rigs : dict
+            Name -> hardware.HardwareManager (siehe create_rigs()). Die Hardware wird
+            mit close() freigegeben.
+        settle_time : float
+            Wartezeit in Sekunden nach jeder Bewegung (siehe SeriesExecutor).
+        """
+        self.rigs = dict(rigs)
+        self.settle_time = settle_time
+        self._queues = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"rig-{name}") for name in self.rigs
+        }
+
+    def folders(self, image_folder, rig, rigs=None):
+        """
+        Zielordner je Ansicht eines Platzes. Nimmt nur eine Kamera auf, bleibt es bei
+        'image_folder', sonst erhält jede Kombination aus Platz und Ansicht eine eigene
+        Serie '<image_folder>_<Platz>_<Ansicht>' (Dateinamen bleiben wie bei einer Kamera).
+        """
+        rigs = list(self.rigs) if rigs is None else rigs
+        if len(rigs) == 1 and len(self.rigs[rig].views) == 1:
+            return {self.rigs[rig].views[0]: image_folder}
+        return {view: f"{image_folder}_{rig}_{view}" for view in self.rigs[rig].views}
+
+    def _series(self, rig, number_of_images, folders, degree_step, on_capture, cancel):
+        """
+        Serie auf einem Platz (läuft in der Warteschlange des Drehtellers).
+        """
+        manager = self.rigs[rig]
+        captures = []
+        with manager.reserve():
+            stepper = manager.stepper
+            stepper.enable_motor()
+            try:
+                executor = SeriesExecutor(manager.cameras, stepper, self.settle_time)
+                for view, degree, path in executor.run_views(number_of_images, folders, degree_step, cancel):
+                    capture = Capture(rig, view, degree, path)
+                    captures.append(capture)
+                    if on_capture is not None:
+                        on_capture(capture)
+            finally:
+                # Motor ausschalten; Position und Kamera-Sessions bleiben erhalten
+                stepper.disable_motor()
+        return captures
+
+    def submit(self, rig, number_of_images, folders, degree_step=None, on_capture=None, cancel=None):
+        """
+        Stellt eine Serie in die Warteschlange eines Platzes und kehrt sofort zurück.
+
+        Parameter:
+        -----------
+        rig : str
+            Name des Aufnahmeplatzes.
+        number_of_images : int
+            Anzahl der Winkel.
+        folders : str oder dict
+            Zielordner, bzw. {Ansicht: Ordner} (siehe folders()).
+        degree_step : float
+            Winkel zwischen zwei Aufnahmen. Standard: 360 / number_of_images.
+        on_capture : callable
+            Optional. Wird im Thread des Platzes mit jeder fertigen Capture aufgerufen.
+        cancel : threading.Event
+            Optional. Gesetzt => die Serie endet vor dem nächsten Winkel (bzw. beginnt nicht).
+
+        Rückgabewert:
+        --------------
+        concurrent.futures.Future
+            Liefert die Liste aller Captures der Serie.
+        """
+        if isinstance(folders, str):
+            folders = self.folders(folders, rig, [rig])
+        return self._queues[rig].submit(
+            self._series, rig, number_of_images, folders, degree_step, on_capture, cancel
+        )
+
+    def run(self, number_of_images, image_folder, rigs=None, degree_step=None):
+        """
+        Nimmt auf allen (bzw. den angegebenen) Plätzen gleichzeitig eine Serie auf und
+        liefert die Aufnahmen, sobald sie heruntergeladen sind. Wird der Generator
+        vorzeitig verlassen, drehen die Drehteller nicht weiter.
+
+        Rückgabewert:
+        --------------
+        Generator von Capture
+            Platz, Ansicht, Winkel und Pfad (None bei Fehlern) jeder Aufnahme.
+        """
+        rigs = list(self.rigs) if rigs is None else list(rigs)
+        results = queue.Queue()
+        cancel = threading.Event()
+        futures = [
+            self.submit(rig, number_of_images, self.folders(image_folder, rig, rigs), degree_step, results.put, cancel)
+            for rig in rigs
+        ]
+
+        def finish():
+            # Sobald alle Serien fertig sind, endet der Generator
+            wait(futures)
+            results.put(None)
+
+        threading.Thread(target=finish, daemon=True).start()
+
+        try:
+            while True:
+                capture = results.get()
+                if capture is None:
+                    break
+                yield capture
+        finally:
+            # Auch wenn der Aufrufer den Generator verlässt (Rerun, Ausnahme): alle Serien beenden
+            cancel.set()
+
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+    def close(self):
+        """
+        Wartet auf die laufenden Serien und gibt die Hardware aller Plätze frei.
+        """
+        for worker in self._queues.values():
+            worker.shutdown(wait=True)
+        for manager in self.rigs.values():
+            manager.close()
+
+
+def main(argv=None):
+    """
+    Kommandozeile: angeschlossene Kameras auflisten bzw. eine Serie auf allen Plätzen aufnehmen.
+    """
+    parser = argparse.ArgumentParser(description="Bilderserie auf mehreren Drehtellern/Kameras gleichzeitig")
+    parser.add_argument("name", nargs="?", help="Name der Serie (Unterordner von config.output_directory)")
+    parser.add_argument("--images", type=int, default=36, help="Anzahl Winkel pro Serie")
+    parser.add_argument("--list", action="store_true", help="Angeschlossene Kameras mit gphoto2-Port auflisten")
+    parser.add_argument("--camera-backend", choices=("gphoto2", "fake"), help="Überschreibt config.rigs")
+    parser.add_argument("--motor-backend", help="Überschreibt config.rigs (z. B. 'simulator')")
+    parser.add_argument("--settle-time", type=float, default=0.5, help="Wartezeit nach jeder Bewegung (s)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for model, port in camera.detect_cameras():
+            print(f"{port:<20} {model}")
+        return 0
+    if not args.name:
+        parser.error("Name der Serie fehlt.")
+
+    scheduler = RigScheduler(create_rigs(None, args.camera_backend, args.motor_backend), args.settle_time)
+    image_folder = os.path.join(config.output_directory, args.name)
+
+    # Ein Manifest pro Platz und Ansicht, im globalen Index mitgeführt
+    index = SeriesIndex()
+    recorders = {}
+    for rig, manager in scheduler.rigs.items():
+        for view, folder in scheduler.folders(image_folder, rig).items():
+            recorders[rig, view] = SeriesRecorder(folder, index=index, settings={
+                "rig": rig,
+                "view": view,
+                "camera_port": manager.camera_ports[view],
+                "camera_backend": manager.camera_backend,
+                "motor_backend": manager.motor_backend,
+                "number_of_images": args.images,
+                "degree_step": 360 / args.images,
+            })
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for capture in scheduler.run(args.images, image_folder):
+            if capture.path is not None and os.path.isfile(capture.path):
+                recorders[capture.rig, capture.view].add_image(capture.path, capture.degree)
+                count += 1
+            print(f"{capture.rig}/{capture.view} {capture.degree:7.2f}° {capture.path}")
+    finally:
+        scheduler.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} Aufnahmen in {elapsed:.1f}s ({count / elapsed:.2f} Bilder/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import collections
+
+import cv2
+
+import config
+
+
+# Bildausschnitt in Pixeln (linke obere Ecke, Breite, Höhe)
+Roi = collections.namedtuple("Roi", ["x", "y", "width", "height"])
+
+
+def full_frame(shape):
+    """
+    ROI über das ganze Bild.
+    """
+    return Roi(0, 0, shape[1], shape[0])
+
+
+def fixed_roi(shape, region):
+    """
+    Rechnet einen festen Ausschnitt in Pixel um.
+
+    Parameter:
+    -----------
+    shape : tuple
+        Form des Bildes (Höhe, Breite[, Kanäle]).
+    region : tuple
+        (x, y, Breite, Höhe). Sind alle Werte <= 1 und mindestens einer davon ein
+        float, gilt der Ausschnitt relativ zur Bildgröße, z. B. (0.25, 0.1, 0.5, 0.8)
+        für die Bildmitte oder (0, 0, 0.5, 0.5) für das linke obere Viertel.
+    """
+    height, width = shape[:2]
+    x, y, w, h = region
+    if all(v <= 1 for v in region) and any(isinstance(v, float) for v in region):
+        x, w = x * width, w * width
+        y, h = y * height, h * height
+    x, y = max(0, int(round(x))), max(0, int(round(y)))
+    w, h = min(width - x, int(round(w))), min(height - y, int(round(h)))
+    if w <= 0 or h <= 0:
+        raise ValueError(f"ROI {region} liegt außerhalb des Bildes {width}x{height}.")
+    return Roi(x, y, w, h)
+
+
+def detect_turntable_roi(image, margin=0.05, detection_size=512):
+    """
+    Sucht den Drehteller (größter Kreis) im Bild und gibt das umschließende Quadrat
+    (plus Rand) als ROI zurück. Die Suche läuft auf einer verkleinerten Kopie und
+    dauert daher auch bei 20-MP-Bildern nur wenige Millisekunden.
+    Wird kein Kreis gefunden, wird das ganze Bild zurückgegeben.
+
+    Parameter:
+    -----------
+    image : np.ndarray
+        Graustufen- oder BGR-Bild.
+    margin : float
+        Zusätzlicher Rand relativ zum Durchmesser des Drehtellers.
+    detection_size : int
+        Längere Bildseite in Pixeln, auf der gesucht wird.
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, detection_size / max(height, width))
+    small = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        small = cv2.resize(small, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    small = cv2.medianBlur(small, 5)
+
+    min_side = min(small.shape)
+    circles = cv2.HoughCircles(
+        small, cv2.HOUGH_GRADIENT, dp=1.5, minDist=min_side,
+        param1=100, param2=40, minRadius=min_side // 6, maxRadius=min_side // 2
+    )
+    if circles is None:
+        return full_frame(image.shape)
+
+    # Größter gefundener Kreis = Drehteller
+    cx, cy, radius = max(circles[0], key=lambda c: c[2])
+    radius *= 1.0 + margin
+    return fixed_roi(image.shape, (
+        float(cx - radius) / scale, float(cy - radius) / scale,
+        float(2 * radius) / scale, float(2 * radius) / scale
+    ))
+
+
+def resolve_roi(image, roi=None):
+    """
+    Bestimmt die ROI für ein Bild.
+
+    Parameter:
+    -----------
+    image : np.ndarray
+        Das Bild.
+    roi : None, 'full', 'auto', tuple oder Roi
+        None => config.roi. 'full' => ganzes Bild. 'auto' => Drehteller suchen
+        (detect_turntable_roi). Tupel => fester Ausschnitt (siehe fixed_roi).
+    """
+    if roi is None:
+        roi = config.roi
+    if roi is None or roi == "full":
+        return full_frame(image.shape)
+    if roi == "auto":
+        return detect_turntable_roi(image)
+    if isinstance(roi, Roi):
+        return roi
+    return fixed_roi(image.shape, tuple(roi))
+
+
+def crop(image, roi):
+    """
+    Gibt den Ausschnitt als View zurück (ohne Kopie).
+    """
+    return image[roi.y:roi.y + roi.height, roi.x:roi.x + roi.width]
+
+
+def iter_tiles(shape, tile_size, overlap=0):
+    """
+    Zerlegt ein Bild in Kacheln.
+
+    Parameter:
+    -----------
+    shape : tuple
+        Form des Bildes (Höhe, Breite[, Kanäle]).
+    tile_size : int
+        Kantenlänge einer Kachel in Pixeln (ohne Überlappung).
+    overlap : int
+        Zusätzlicher Rand um jede Kachel, z. B. damit Filter an den Kachelgrenzen
+        dieselben Nachbarpixel sehen wie im ganzen Bild.
+
+    Rückgabewert (Generator):
+    --------------
+    outer, inner : tuple of slice
+        'outer': Ausschnitt inkl. Rand, der verarbeitet wird.
+        'inner': Lage der Kachel ohne Rand innerhalb von 'outer' (zum Zurückschreiben).
+    """
+    height, width = shape[:2]
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            y0, y1 = max(0, y - overlap), min(height, y + tile_size + overlap)
+            x0, x1 = max(0, x - overlap), min(width, x + tile_size + overlap)
+            inner = (
+                slice(y - y0, y - y0 + min(tile_size, height - y)),
+                slice(x - x0, x - x0 + min(tile_size, width - x))
+            )
+            yield (slice(y0, y1), slice(x0, x1)), inner
+
+
+def tile_origin(outer, inner):
+    """
+    Gibt die Lage der Kachel (ohne Rand) im Gesamtbild als Slices zurück.
+    """
+    return tuple(
+        slice(o.start + i.start, o.start + i.stop) for o, i in zip(outer, inner)
+    )
+
+
+if __name__ == "__main__":
+    # Selbsttest der Umrechnung fester Ausschnitte (python roi.py)
+    shape = (1000, 2000)
+    assert fixed_roi(shape, (0, 0, 0.5, 0.5)) == Roi(0, 0, 1000, 500)
+    assert fixed_roi(shape, (0, 0.1, 1, 0.8)) == Roi(0, 100, 2000, 800)
+    assert fixed_roi(shape, (0.0, 0.0, 1.0, 1.0)) == full_frame(shape)
+    assert fixed_roi(shape, (0, 0, 1, 1)) == Roi(0, 0, 1, 1)
+    assert fixed_roi(shape, (100, 50, 300, 200)) == Roi(100, 50, 300, 200)
+    print("roi: ok")
@@ -0,0 +1,634 @@
+import time
+import asyncio
+import importlib
+import itertools
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from pulse_engine import PulseEngine
+from motion_profile import plan_move, plan_stop, degree_to_steps
+
+
+# Verfügbare Backends: Name -> (Modul, Klasse)
+BACKENDS = {
+    "tb6600": ("schrittmotor_TB6600", "StepperMotor"),
+    "uln2003": ("schrittmotor_ULN2003_rp5", "StepperMotor"),
+    "uln2003_rpi": ("schrittmotor_ULN2003_rp3", "StepperMotor"),
+    "simulator": ("schrittmotor_simulator", "SimulatedStepper"),
+}
+
+
+def get_backend(name=None):
+    """
+    Gibt die Schrittmotor-Klasse für das angegebene Backend zurück.
+    Das zugehörige Modul (und damit gpiod bzw. RPi.GPIO) wird erst hier importiert.
+
+    Parameter:
+    -----------
+    name : str
+        'tb6600', 'uln2003' (gpiod, Raspberry Pi 5), 'uln2003_rpi' (RPi.GPIO,
+        Raspberry Pi 3) oder 'simulator'. Standard: config.motor_backend
+    """
+    name = name or config.motor_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes Motor-Backend '{name}'. Möglich: {', '.join(BACKENDS)}")
+    module_name, class_name = BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_stepper(name=None, **kwargs):
+    """
+    Erzeugt einen Schrittmotor des angegebenen Backends (siehe get_backend()).
+    Weitere Parameter werden an den Konstruktor weitergegeben.
+    """
+    return get_backend(name)(**kwargs)
+
+
+class StepperBase:
+    """
+    Gemeinsame Schnittstelle aller Schrittmotor-Backends.
+
+    Die Basisklasse übernimmt Positionsverfolgung, Rampenplanung, zeitgenaue
+    Pulserzeugung (PulseEngine), Referenzfahrt und Bewegungen im Hintergrund.
+    Ein Backend implementiert nur den Zugriff auf die Hardware:
+      - _step_function(): liefert eine Funktion, die genau einen Schritt ausführt
+      - _apply_direction(): Richtung an die Hardware übergeben (optional)
+      - _limit_triggered(): Zustand des Endschalters (optional)
+      - enable_motor(), disable_motor(), _close()
+
+    Position: Schritte relativ zum Nullpunkt, 'left' zählt positiv, 'right' negativ.
+    """
+
+    # True, wenn das Backend einen Endschalter für die Referenzfahrt hat
+    has_limit_switch = False
+
+    def __init__(self, steps_per_revolution, pulse_engine=None):
+        """
+        Parameter:
+        -----------
+        steps_per_revolution : int
+            Schritte pro Umdrehung (inkl. Mikroschritte bzw. Halbschritte).
+        pulse_engine : PulseEngine
+            Erzeugt die Schritte zeitgenau. Standard: Hybrid-Modus, auf dieses System kalibriert.
+        """
+        self.steps_per_revolution = steps_per_revolution
+        self.direction = 'left'
+
+        if pulse_engine is None:
+            pulse_engine = PulseEngine(mode="hybrid")
+            pulse_engine.calibrate()
+        self.pulse_engine = pulse_engine
+
+        # Statistik der letzten Bewegung (erreichte Schrittrate, Jitter)
+        self.last_stats = None
+        # Zeit in Sekunden von der Flanke am Endschalter bis zum letzten Schritt (falls messbar)
+        self.last_stop_latency = None
+
+        self._position = 0
+        self._moving = False
+        self._moving_sign = 1
+        self._current_period = None
+        # Abbruch-Signal der laufenden Bewegung; jede mit start() eingestellte Bewegung
+        # erhält ihr eigenes, damit ein stop() vor ihrem Beginn nicht verloren geht
+        self._stop_event = threading.Event()
+        self._move_events = set()
+        self._move_lock = threading.Lock()
+        self._thread_state = threading.local()
+        self._stop_immediately = False
+        self._executor = None
+        self._last_future = None
+
+        self.set_motion_limits(max_velocity=1000, acceleration=2000)
+
+    @staticmethod
+    def release():
+        """
+        Gibt ggf. noch belegte Hardware-Ressourcen frei. Für die meisten Backends nicht nötig.
+        """
+
+    # ------------------------------------------------------------------
+    # Hardware-Schnittstelle (wird von den Backends überschrieben)
+    # ------------------------------------------------------------------
+
+    def _step_function(self):
+        """
+        Gibt eine Funktion ohne Parameter zurück, die einen Schritt in der
+        aktuellen Richtung ausführt. Wird einmal pro Bewegung aufgerufen.
+        """
+        raise NotImplementedError
+
+    def _apply_direction(self, direction):
+        """
+        Übergibt die Richtung ('left'/'right') an die Hardware.
+        """
+
+    def _after_move(self, steps_done):
+        """
+        Wird nach jeder Bewegung mit der Anzahl der ausgeführten Schritte aufgerufen.
+        """
+
+    def _limit_triggered(self):
+        """
+        Gibt True zurück, wenn der Endschalter betätigt ist.
+        """
+        return False
+
+    def _limit_event_ns(self):
+        """
+        Zeitstempel (time.monotonic_ns) der letzten Flanke am Endschalter, falls das
+        Backend ihn kennt. Damit wird die Stopp-Latenz gemessen.
+        """
+        return None
+
+    def _fixed_period(self, delay):
+        """
+        Rechnet die feste Verzögerung 'delay' in die Periode zwischen zwei Schritten um.
+        """
+        return delay
+
+    def _close(self):
+        """
+        Gibt die Hardware-Ressourcen des Backends frei.
+        """
+
+    def enable_motor(self):
+        """
+        Schaltet den Motor ein (Haltemoment).
+        """
+
+    def disable_motor(self):
+        """
+        Schaltet den Motor stromlos. Danach sind weitere Bewegungen möglich.
+        """
+
+    # ------------------------------------------------------------------
+    # Gemeinsame API
+    # ------------------------------------------------------------------
+
+    @property
+    def position(self):
+        """
+        Aktuelle Position in Schritten relativ zum Nullpunkt. Während einer
+        Bewegung wird die Position live aus dem Fortschritt der Pulsfolge berechnet.
+        """
+        if self._moving:
+            return self._position + self._moving_sign * self.pulse_engine.steps_done
+        return self._position
+
+    @property
+    def position_degree(self):
+        """
+        Aktuelle Position in Grad relativ zum Nullpunkt.
+        """
+        return self.position * 360.0 / self.steps_per_revolution
+
+    @property
+    def velocity(self):
+        """
+        Aktuelle Geschwindigkeit in Schritten/s (mit Vorzeichen der Richtung), 0 im Stillstand.
+        """
+        period = self._current_period
+        if not self._moving or not period:
+            return 0.0
+        return self._moving_sign / period
+
+    def is_moving(self):
+        """
+        Gibt True zurück, solange eine Bewegung läuft.
+        """
+        return self._moving
+
+    def set_motion_limits(self, max_velocity, acceleration, jerk=None, start_velocity=0.0):
+        """
+        Legt die Grenzen für Bewegungen mit Rampe fest.
+
+        Parameter:
+        -----------
+        max_velocity : float
+            Maximale Geschwindigkeit in Schritten/s.
+        acceleration : float
+            Maximale Beschleunigung in Schritten/s².
+        jerk : float
+            Maximaler Ruck in Schritten/s³ (S-Kurve). None => Trapezprofil.
+        start_velocity : float
+            Geschwindigkeit in Schritten/s, mit der der Motor ohne Rampe anlaufen kann.
+        """
+        self.max_velocity = max_velocity
+        self.acceleration = acceleration
+        self.jerk = jerk
+        self.start_velocity = start_velocity
+
+    def set_direction(self, direction):
+        """
+        Setzt die Drehrichtung: 'left' (counter-clockwise) oder 'right' (clockwise).
+        """
+        direction_lower = direction.lower()
+        if direction_lower not in ('left', 'right'):
+            raise ValueError("Richtung muss entweder 'left' oder 'right' sein.")
+        self.direction = direction_lower
+        self._apply_direction(direction_lower)
+
+    def _plan_periods(self, steps, delay):
+        """
+        Gibt die Perioden zwischen den Schritten zurück: mit Rampe (delay=None)
+        oder mit fester Verzögerung.
+        """
+        if delay is None:
+            return plan_move(
+                steps, self.max_velocity, self.acceleration, self.jerk, self.start_velocity
+            ).tolist()
+        return [self._fixed_period(delay)] * steps
+
+    def _limit_watch(self):
+        """
+        Abbruchbedingung für normale Bewegungen: Die Bewegung endet, wenn der
+        Endschalter während der Fahrt betätigt wird. Steht der Motor beim Start
+        bereits auf dem Schalter (z. B. direkt nach der Referenzfahrt), wird erst
+        nach dem Loslassen wieder überwacht.
+        """
+        if not self.has_limit_switch:
+            return None
+
+        armed = [not self._limit_triggered()]
+
+        def should_stop():
+            pressed = self._limit_triggered()
+            if armed[0]:
+                return pressed
+            if not pressed:
+                armed[0] = True
+            return False
+
+        return should_stop
+
+    def _cancellable(self, periods):
+        """
+        Reicht die Perioden an die PulseEngine weiter, bis stop() aufgerufen wird.
+        Danach wird entweder sofort angehalten oder mit einer Bremsrampe aus der
+        aktuellen Geschwindigkeit abgebremst.
+        """
+        stop_event = self._stop_event
+        for period in periods:
+            if stop_event.is_set():
+                if not self._stop_immediately:
+                    for brake_period in plan_stop(1.0 / period, self.acceleration, self.start_velocity).tolist():
+                        self._current_period = brake_period
+                        yield brake_period
+                return
+            self._current_period = period
+            yield period
+
+    def _run(self, periods, should_stop=None, steps_requested=None):
+        """
+        Führt eine Pulsfolge in der aktuellen Richtung aus und führt die Position nach.
+        """
+        if steps_requested is None and hasattr(periods, "__len__"):
+            steps_requested = len(periods)
+
+        # Bewegung aus start(): deren Signal verwenden (ggf. schon gesetzt), sonst ein neues
+        self._stop_event = getattr(self._thread_state, "stop_event", None) or threading.Event()
+        self._moving_sign = 1 if self.direction == 'left' else -1
+        step = self._step_function()
+        self._moving = True
+        self.last_stop_latency = None
+        started_ns = time.monotonic_ns()
+        try:
+            self.last_stats = self.pulse_engine.run(
+                step, self._cancellable(periods),
+                should_stop=should_stop, steps_requested=steps_requested
+            )
+            stopped_ns = time.monotonic_ns()
+            edge_ns = self._limit_event_ns()
+            if (should_stop is not None and edge_ns is not None and edge_ns >= started_ns
+                    and not self._stop_event.is_set() and self._limit_triggered()):
+                self.last_stop_latency = (stopped_ns - edge_ns) / 1e9
+        finally:
+            steps_done = self.pulse_engine.steps_done
+            self._position += self._moving_sign * steps_done
+            self._moving = False
+            self._current_period = None
+            self._after_move(steps_done)
+        return self.last_stats
+
+    def stop(self, immediate=False):
+        """
+        Bricht die laufende Bewegung ab (auch aus einem anderen Thread), ebenso alle
+        mit start() eingestellten Bewegungen, die noch nicht begonnen haben.
+
+        Parameter:
+        -----------
+        immediate : bool
+            False (Standard): mit Bremsrampe anhalten. True: sofort anhalten.
+        """
+        self._stop_immediately = immediate
+        with self._move_lock:
+            self._stop_event.set()
+            for event in self._move_events:
+                event.set()
+
+    def move(self, steps, delay=None):
+        """
+        Bewegt den Motor 'steps' Schritte in der eingestellten Richtung.
+        Unterbricht die Bewegung, falls der Endschalter ausgelöst wird.
+
+        Parameter:
+        -----------
+        steps : int
+            Anzahl der Schritte.
+        delay : float
+            Feste Verzögerung (Bedeutung je nach Backend). None (Standard) => Rampe
+            gemäß set_motion_limits().
+
+        Rückgabewert:
+        --------------
+        PulseStats
+            Erreichte Schrittrate und Jitter der Bewegung.
+        """
+        stats = self._run(self._plan_periods(steps, delay), self._limit_watch())
+        if self._stop_event.is_set():
+            print("Bewegung abgebrochen.")
+        elif stats.steps_done < steps:
+            print("Schalter betätigt! Motor wird gestoppt.")
+            if self.last_stop_latency is not None:
+                print(f"Stopp-Latenz: {self.last_stop_latency * 1e6:.0f}µs")
+        print(stats)
+        return stats
+
+    def move_by_degree(self, degree, delay=None):
+        """
+        Bewegt den Motor um 'degree' Grad in der eingestellten Richtung.
+        Negative Winkel bewegen in die Gegenrichtung.
+        """
+        steps = degree_to_steps(abs(degree), self.steps_per_revolution)
+        print(f"Bewege um {degree}° => {steps} Schritte")
+        if degree >= 0:
+            return self.move(steps, delay)
+
+        original_direction = self.direction
+        self.set_direction('right' if original_direction == 'left' else 'left')
+        try:
+            return self.move(steps, delay)
+        finally:
+            self.set_direction(original_direction)
+
+    def move_to(self, position, delay=None):
+        """
+        Fährt auf die absolute Position 'position' (in Schritten) und stellt
+        danach die ursprüngliche Richtung wieder her.
+        """
+        delta = position - self._position
+        if delta == 0:
+            return None
+
+        original_direction = self.direction
+        self.set_direction('left' if delta > 0 else 'right')
+        try:
+            return self.move(abs(delta), delay)
+        finally:
+            self.set_direction(original_direction)
+
+    def move_to_degree(self, degree, delay=None):
+        """
+        Fährt auf den absoluten Winkel 'degree' relativ zum Nullpunkt.
+        """
+        return self.move_to(degree_to_steps(degree, self.steps_per_revolution), delay)
+
+    def move_to_original_position(self, delay=None):
+        """
+        Fährt den Motor zurück auf Position 0 (Nullpunkt bzw. Startposition).
+        """
+        return self.move_to(0, delay)
+
+    def move_to_zero_point(self, delay=0.001, max_revolutions=2):
+        """
+        Referenzfahrt: Bewegt den Motor nach links, bis der Endschalter betätigt ist,
+        und setzt dort die Position auf 0. Ohne Endschalter wird auf die
+        gespeicherte Position 0 zurückgefahren.
+
+        Parameter:
+        -----------
+        delay : float
+            Feste Verzögerung während der Referenzfahrt.
+        max_revolutions : float
+            Sicherheitsgrenze: Nach so vielen Umdrehungen ohne Schalter wird abgebrochen.
+        """
+        if not self.has_limit_switch:
+            print("Kein Endschalter vorhanden, fahre auf gespeicherte Position 0.")
+            return self.move_to_original_position()
+
+        print("Bewege Motor zum Nullpunkt (Nach links, bis der Schalter betätigt ist)...")
+        original_direction = self.direction
+        self.set_direction('left')
+        try:
+            max_steps = int(max_revolutions * self.steps_per_revolution)
+            stats = self._run(
+                itertools.repeat(self._fixed_period(delay), max_steps),
+                should_stop=self._limit_triggered
+            )
+        finally:
+            self.set_direction(original_direction)
+
+        if self._stop_event.is_set():
+            print("Referenzfahrt abgebrochen, Position bleibt unverändert.")
+            return stats
+        if not self._limit_triggered():
+            print("Endschalter wurde nicht erreicht, Position bleibt unverändert.")
+            return stats
+
+        self._position = 0
+        print("Nullpunkt erreicht.")
+        if self.last_stop_latency is not None:
+            print(f"Stopp-Latenz: {self.last_stop_latency * 1e6:.0f}µs")
+        return stats
+
+    # ------------------------------------------------------------------
+    # Bewegungen im Hintergrund
+    # ------------------------------------------------------------------
+
+    def start(self, method, *args, **kwargs):
+        """
+        Startet eine Bewegung im Hintergrund und gibt sofort ein Future zurück.
+        Bewegungen werden nacheinander in einem eigenen Thread ausgeführt. Das
+        Abbruch-Signal nur dieser Bewegung steht in future.stop_event (siehe cancel()).
+
+        Beispiel:
+            future = stepper.start(stepper.move_by_degree, 90)
+            ...  # andere Arbeit
+            future.result()
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stepper")
+        stop_event = threading.Event()
+        with self._move_lock:
+            self._move_events.add(stop_event)
+        future = self._executor.submit(self._started_move, stop_event, method, args, kwargs)
+        future.stop_event = stop_event
+        # Auch abgebrochene Bewegungen, die nie begonnen haben, wieder austragen
+        future.add_done_callback(lambda _: self._discard_move_event(stop_event))
+        self._last_future = future
+        return future
+
+    def _discard_move_event(self, stop_event):
+        with self._move_lock:
+            self._move_events.discard(stop_event)
+
+    def cancel(self, future):
+        """
+        Bricht eine mit start() eingestellte Bewegung ab, ohne andere Bewegungen zu
+        berühren: Hat sie noch nicht begonnen, wird sie aus der Warteschlange
+        genommen, sonst bremst der Motor mit Rampe ab.
+
+        Rückgabewert:
+        --------------
+        bool
+            True, wenn die Bewegung nicht begonnen hat (nichts angehalten).
+        """
+        if future.cancel() or future.cancelled():
+            return True
+        self._stop_immediately = False
+        future.stop_event.set()
+        return False
+
+    def _started_move(self, stop_event, method, args, kwargs):
+        """
+        Führt eine mit start() eingestellte Bewegung im Bewegungs-Thread mit ihrem eigenen Abbruch-Signal aus.
+        """
+        self._thread_state.stop_event = stop_event
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._thread_state.stop_event = None
+
+    def wait(self):
+        """
+        Wartet, bis die zuletzt mit start() gestartete Bewegung beendet ist.
+        """
+        if self._last_future is not None:
+            return self._last_future.result()
+        return None
+
+    def cleanup(self):
+        """
+        Wartet auf laufende Bewegungen und gibt alle Ressourcen frei.
+        Sollte am Ende der Anwendung aufgerufen werden.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._close()
+
+
+MotionSample = collections.namedtuple(
+    "MotionSample", ["timestamp", "position", "position_degree", "velocity", "moving"]
+)
+
+
+class AsyncStepper:
+    """
+    asyncio-Schnittstelle für einen Schrittmotor (beliebiges Backend).
+
+    Die Bewegungen laufen im Bewegungs-Thread des Motors (StepperBase.start()),
+    die Coroutinen blockieren den Event-Loop daher nicht. Wird eine Coroutine
+    abgebrochen (task.cancel(), asyncio.wait_for(...) mit Timeout), bremst der
+    Motor mit Rampe ab; die Coroutine endet erst, wenn er steht.
+
+    Beispiel:
+        motor = AsyncStepper(create_stepper("simulator"))
+        task = asyncio.create_task(motor.move_to_zero_point())
+        async for sample in motor.stream():
+            print(sample.position_degree, sample.velocity)
+    """
+
+    def __init__(self, stepper):
+        """
+        Parameter:
+        -----------
+        stepper : StepperBase
+            Schrittmotor, der gesteuert werden soll.
+        """
+        self.stepper = stepper
+
+    async def _run(self, method, *args, **kwargs):
+        """
+        Führt 'method' im Bewegungs-Thread aus und wartet asynchron auf das Ende.
+        """
+        future = self.stepper.start(method, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Nur diese Bewegung abbrechen: wartend => verwerfen, laufend => abbremsen
+            # und warten, bis der Motor steht
+            if not self.stepper.cancel(future):
+                try:
+                    await asyncio.wrap_future(future)
+                except Exception:
+                    pass
+            raise
+
+    async def move(self, steps, delay=None):
+        """
+        Coroutine zu StepperBase.move().
+        """
+        return await self._run(self.stepper.move, steps, delay)
+
+    async def move_by_degree(self, degree, delay=None):
+        """
+        Coroutine zu StepperBase.move_by_degree().
+        """
+        return await self._run(self.stepper.move_by_degree, degree, delay)
+
+    async def move_to_degree(self, degree, delay=None):
+        """
+        Coroutine zu StepperBase.move_to_degree().
+        """
+        return await self._run(self.stepper.move_to_degree, degree, delay)
+
+    async def move_to_original_position(self, delay=None):
+        """
+        Coroutine zu StepperBase.move_to_original_position().
+        """
+        return await self._run(self.stepper.move_to_original_position, delay)
+
+    async def move_to_zero_point(self, delay=0.001, max_revolutions=2):
+        """
+        Coroutine zu StepperBase.move_to_zero_point() (Referenzfahrt).
+        """
+        return await self._run(self.stepper.move_to_zero_point, delay, max_revolutions)
+
+    def sample(self):
+        """
+        Gibt den aktuellen Bewegungszustand als MotionSample zurück.
+        """
+        stepper = self.stepper
+        velocity = stepper.velocity
+        return MotionSample(
+            timestamp=time.monotonic(),
+            position=stepper.position,
+            position_degree=stepper.position_degree,
+            velocity=velocity * 360.0 / stepper.steps_per_revolution,
+            moving=stepper.is_moving()
+        )
+
+    async def stream(self, interval=0.05, until_idle=True):
+        """
+        Liefert fortlaufend Position (Schritte und Grad) und Geschwindigkeit (Grad/s).
+
+        Parameter:
+        -----------
+        interval : float
+            Abstand zwischen zwei Messwerten in Sekunden.
+        until_idle : bool
+            True: endet, sobald keine Bewegung mehr läuft oder ansteht.
+            False: läuft, bis der Aufrufer abbricht.
+        """
+        # Kurz warten, damit eine gerade gestartete Bewegung bereits läuft
+        await asyncio.sleep(0)
+        while True:
+            sample = self.sample()
+            yield sample
+            pending = self.stepper._last_future is not None and not self.stepper._last_future.done()
+            if until_idle and not sample.moving and not pending:
+                return
+            await asyncio.sleep(interval)
@@ -1,26 +1,39 @@
 import gpiod
 import time
+from gpiod.line import Direction, Value
 
-class StepperMotor:
+from pulse_engine import busy_wait
+from limit_switch import LimitSwitch
+from schrittmotor import StepperBase
+
+class StepperMotor(StepperBase):
     """
     Klasse zum Ansteuern eines Schrittmotors über drei GPIO-Ausgänge (DIR, PUL, ENA)
     und einen GPIO-Eingang (SWITCH = Mikroschalter).
-    
-    Nutzung von gpiod:
-      - 'chip_name': Name des GPIO-Chips, z. B. 'gpiochip0'
-      - get_line(X): holt die Leitung mit Offset X (nicht unbedingt identisch mit BCM-Nummern)
-      - request(...): legt fest, ob diese Line Eingang oder Ausgang ist.
+
+    Nutzung von gpiod (API ab Version 2, wie im ULN2003-Treiber für den Raspberry Pi 5):
+      - 'chip_name': Pfad des GPIO-Chips, z. B. '/dev/gpiochip0'
+      - request_lines(...): fordert DIR, PUL und ENA in einem Request als Ausgänge an.
+        Die Offsets sind nicht unbedingt identisch mit BCM-Nummern.
+      - Der Mikroschalter wird über Flanken-Ereignisse überwacht (limit_switch.LimitSwitch),
+        die Pulsschleife fragt den Eingang daher nicht bei jedem Schritt ab.
+
+    Positionsverfolgung, Rampen, Referenzfahrt und Bewegungen im Hintergrund
+    stellt die gemeinsame Basisklasse (schrittmotor.StepperBase) bereit.
     """
 
-    def __init__(self, chip_name='gpiochip0', DIR=17, PUL=27, ENA=22, SWITCH=12):
+    has_limit_switch = True
+
+    def __init__(self, chip_name='/dev/gpiochip0', DIR=17, PUL=27, ENA=22, SWITCH=12,
+                 microsteps=8, pulse_engine=None, pulse_width=0.00001, debounce=0.002):
         """
-        Initialisiert den Chip, richtet die Pinmodi (Eingang/Ausgang) ein 
+        Initialisiert den Chip, richtet die Pinmodi (Eingang/Ausgang) ein
         und deaktiviert den Motor standardmäßig.
-        
+
         Parameter:
         -----------
         chip_name : str
-            Name des GPIO-Chips, meist 'gpiochip0' auf einem System mit einem SoC.
+            Pfad des GPIO-Chips, meist '/dev/gpiochip0' auf einem System mit einem SoC.
         DIR : int
             GPIO-Offset für den DIR-Pin (Direction).
         PUL : int
@@ -29,37 +42,55 @@ class StepperMotor:
             GPIO-Offset für den ENA-Pin (Enable).
         SWITCH : int
             GPIO-Offset für den Mikroschalter, der z. B. den Nullpunkt erkennt.
-        """
+        microsteps : int
+            Am TB6600 eingestelltes Mikroschrittverhältnis (z. B. 8 => 1600 Schritte pro Umdrehung).
+        pulse_engine : PulseEngine
+            Erzeugt die Schrittpulse zeitgenau. Standard: Hybrid-Modus
+            (Schlafen + Busy-Waiting), auf dieses System kalibriert.
+        pulse_width : float
+            Dauer des HIGH-Pegels auf PUL in Sekunden (TB6600: mind. 2,5 µs).
+        debounce : float
+            Entprellzeit des Mikroschalters in Sekunden.
+        """
+        # Ein typischer Schrittmotor hat 200 Schritte/Umdrehung im Vollschritt
+        super().__init__(200 * microsteps, pulse_engine)
+        self.microsteps = microsteps
+        self.pulse_width = pulse_width
+
         print("Initialisiere GPIO...")
+        if not chip_name.startswith('/dev/'):
+            chip_name = '/dev/' + chip_name
         self.chip = gpiod.Chip(chip_name)
 
-        # Hole die GPIO-Lines
-        self.DIR = self.chip.get_line(DIR)
-        self.PUL = self.chip.get_line(PUL)
-        self.ENA = self.chip.get_line(ENA)
-        self.SWITCH = self.chip.get_line(SWITCH)
+        # GPIO-Offsets
+        self.DIR = DIR
+        self.PUL = PUL
+        self.ENA = ENA
+        self.SWITCH = SWITCH
 
         # Für die Richtungs- und Enable-Logik definieren wir Konstanten
-        self.DIR_Left = 0
-        self.DIR_Right = 1
-
-        self.ENA_Locked = 0     # Motor aktiv
-        self.ENA_Released = 1   # Motor deaktiviert
-
-        # GPIO-Linien für DIR, PUL, ENA als Ausgang
-        self.DIR.request(consumer='stepper-motor', type=gpiod.LINE_REQ_DIR_OUT)
-        self.PUL.request(consumer='stepper-motor', type=gpiod.LINE_REQ_DIR_OUT)
-        self.ENA.request(consumer='stepper-motor', type=gpiod.LINE_REQ_DIR_OUT)
-
-        # Mikroschalter als Eingang mit Pull-Up-Widerstand
-        # So liegt SWITCH im Ruhezustand auf HIGH (1).
-        # Wird der Schalter gedrückt, zieht er die Leitung auf LOW (0).
-        self.SWITCH.request(
-            consumer='stepper-motor', 
-            type=gpiod.LINE_REQ_DIR_IN,
-            flags=gpiod.LINE_REQ_FLAG_BIAS_PULL_UP
+        self.DIR_Left = Value.INACTIVE
+        self.DIR_Right = Value.ACTIVE
+
+        self.ENA_Locked = Value.INACTIVE     # Motor aktiv
+        self.ENA_Released = Value.ACTIVE     # Motor deaktiviert
+
+        # DIR, PUL, ENA als Ausgang
+        output_settings = gpiod.LineSettings(direction=Direction.OUTPUT)
+
+        self.lines = self.chip.request_lines(
+            consumer='stepper-motor',
+            config={(self.DIR, self.PUL, self.ENA): output_settings}
         )
 
+        # Mikroschalter als Eingang mit Pull-Up-Widerstand (Ruhezustand HIGH, gedrückt LOW),
+        # überwacht von einem Hintergrund-Thread mit Flankenerkennung und Entprellung
+        self.switch = LimitSwitch(chip_name, self.SWITCH, debounce=debounce)
+
+        # Bewegungsgrenzen für Rampen (in Mikroschritten): Ohne festes 'delay'
+        # wird jede Bewegung mit Beschleunigungs- und Bremsrampe gefahren.
+        self.set_motion_limits(max_velocity=3200, acceleration=6400, jerk=64000, start_velocity=200)
+
         # Motor standardmäßig deaktivieren
         self.disable_motor()
 
@@ -68,104 +99,67 @@ class StepperMotor:
         Schaltet den Motor ein, indem ENA auf das 'Locked'-Signal gesetzt wird (typischerweise LOW).
         """
         print("Motor wird aktiviert (Enable auf LOW)...")
-        self.ENA.set_value(self.ENA_Locked)
+        self.lines.set_value(self.ENA, self.ENA_Locked)
 
     def disable_motor(self):
         """
         Schaltet den Motor aus, indem ENA auf das 'Released'-Signal gesetzt wird (typischerweise HIGH).
         """
         print("Motor wird deaktiviert (Enable auf HIGH)...")
-        self.ENA.set_value(self.ENA_Released)
+        self.lines.set_value(self.ENA, self.ENA_Released)
 
-    def set_direction(self, direction):
+    def _apply_direction(self, direction):
         """
-        Setzt die Drehrichtung: 'left' oder 'right'.
-        
-        Parameter:
-        -----------
-        direction : str
-            'left' oder 'right'
+        Setzt die Drehrichtung über den DIR-Pin: 'left' => DIR=0, 'right' => DIR=1.
         """
-        direction_lower = direction.lower()
-        if direction_lower == 'left':
+        if direction == 'left':
             print("Setze Richtung auf: Links (DIR=0)")
-            self.DIR.set_value(self.DIR_Left)
-        elif direction_lower == 'right':
-            print("Setze Richtung auf: Rechts (DIR=1)")
-            self.DIR.set_value(self.DIR_Right)
+            self.lines.set_value(self.DIR, self.DIR_Left)
         else:
-            raise ValueError("Richtung muss entweder 'left' oder 'right' sein.")
+            print("Setze Richtung auf: Rechts (DIR=1)")
+            self.lines.set_value(self.DIR, self.DIR_Right)
 
-    def move(self, steps, delay=0.001):
+    def _step_function(self):
+        """
+        Gibt eine Funktion zurück, die einen einzelnen Schrittpuls auf PUL ausgibt.
         """
-        Bewegt den Motor eine bestimmte Anzahl von Schritten.
-        Unterbricht die Bewegung, falls der Mikroschalter ausgelöst wird.
+        set_value = self.lines.set_value
+        pul = self.PUL
+        pulse_width = self.pulse_width
 
-        Parameter:
-        -----------
-        steps : int
-            Anzahl der Schritte, die der Motor ausführen soll.
-        delay : float
-            Verzögerung zwischen den Pulsen in Sekunden (steuert die Geschwindigkeit).
-        """
-        print(f"Bewege Motor für {steps} Schritte mit delay={delay:.4f}s.")
-        for _ in range(steps):
-            # Prüfen, ob Schalter gedrückt ist (Wert = 0 => LOW)
-            if self.SWITCH.get_value() == 0:
-                print("Schalter betätigt! Motor wird gestoppt.")
-                break
-            
-            # Pulse erzeugen: 1 -> 0 oder 0 -> 1
-            self.PUL.set_value(1)
-            time.sleep(delay)
-            self.PUL.set_value(0)
-            time.sleep(delay)
-
-    def move_to_zero_point(self, delay=0.001):
-        """
-        Bewegt den Motor (in Richtung 'left') solange, bis der Mikroschalter gedrückt ist (SWITCH=0).
-        Beispiel: Endschalter-Mechanismus für Home-Position.
-        """
-        print("Bewege Motor zum Nullpunkt (Nach links, bis SWITCH=0)...")
-        self.set_direction('left')
-        
-        # Solange der Schalter nicht betätigt ist (SWITCH=1 = HIGH), Motor weiterbewegen
-        while self.SWITCH.get_value() == 1:
-            self.PUL.set_value(1)
-            time.sleep(delay)
-            self.PUL.set_value(0)
-            time.sleep(delay)
-        
-        print("Nullpunkt erreicht (SWITCH=0).")
-
-    def move_by_degree(self, degree, delay=0.001, microsteps=8):
-        """
-        Bewegt den Motor um 'degree' Grad, unter Berücksichtigung von Mikroschritten.
-        Eine Umdrehung = 360°, ein typischer Schrittmotor hat 200 Schritte/Umdrehung im Vollschritt.
-        
-        Parameter:
-        -----------
-        degree : float
-            Winkel in Grad, um den der Motor bewegt werden soll.
-        delay : float
-            Wartezeit zwischen Pulsen (steuert Geschwindigkeit).
-        microsteps : int
-            Gibt das Mikroschrittverhältnis an (z. B. 8 bedeutet 1600 Schritte pro Umdrehung).
-        
-        Beispiel:
-            move_by_degree(90, microsteps=8) => 1/4 Umdrehung im 1/8-Schritt-Modus = 200 * 8 * 90/360
+        def pulse():
+            set_value(pul, Value.ACTIVE)
+            busy_wait(pulse_width)
+            set_value(pul, Value.INACTIVE)
+
+        return pulse
+
+    def _limit_triggered(self):
+        """
+        Gibt True zurück, wenn der Mikroschalter betätigt ist (LOW).
+        Liest nur den vom Hintergrund-Thread gepflegten Zustand, kein Systemaufruf.
+        """
+        return self.switch.pressed
+
+    def _limit_event_ns(self):
+        """
+        Kernel-Zeitstempel der letzten Flanke am Mikroschalter.
+        """
+        return self.switch.last_event_ns
+
+    def _fixed_period(self, delay):
+        """
+        Wie bisher: 'delay' ist die Zeit zwischen zwei Flanken, eine Pulsperiode also 2 * delay.
         """
-        steps_per_revolution = 200 * microsteps
-        steps = int((degree / 360.0) * steps_per_revolution)
-        print(f"Bewege um {degree}° => {steps} Schritte (Mikrostepping={microsteps}, delay={delay:.4f}s)")
-        self.move(steps, delay)
+        return 2 * delay
 
-    def cleanup(self):
+    def _close(self):
         """
-        Schließt den Chip (gibt die Leitungen frei). 
-        Sollte am Ende der Anwendung aufgerufen werden.
+        Gibt die Leitungen frei und schließt den Chip.
         """
         print("GPIO-Ressourcen werden freigegeben...")
+        self.switch.close()
+        self.lines.release()
         self.chip.close()
 
 
@@ -179,7 +173,7 @@ if __name__ == "__main__":
 
     # 3. Richtung auf 'left' stellen und 90° drehen
     stepper.set_direction('left')
-    stepper.move_by_degree(90, delay=0.001)
+    stepper.move_by_degree(90)  # mit Beschleunigungs- und Bremsrampe
 
     # 4. Motor deaktivieren und ggf. eine Pause
     stepper.disable_motor()
@@ -190,4 +184,4 @@ if __name__ == "__main__":
     stepper.move_to_zero_point(delay=0.001)
 
     # 6. Aufräumen
-    stepper.cleanup()
\ No newline at end of file
+    stepper.cleanup()
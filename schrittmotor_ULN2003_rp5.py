@@ -1,12 +1,17 @@
 #!/usr/bin/python3
 import gpiod
-import time
+import itertools
 from gpiod.line import Direction, Value
 
-class StepperMotor:
+from schrittmotor import StepperBase
+
+class StepperMotor(StepperBase):
     """
     Klasse zur Ansteuerung eines Schrittmotors mit 4 Spulenleitungen
     (z. B. 28BYJ-48) über libgpiod. Nutzt Halbschrittmodus (8 Schritte/Zyklus).
+
+    Positionsverfolgung, Rampen und Bewegungen im Hintergrund stellt die
+    gemeinsame Basisklasse (schrittmotor.StepperBase) bereit.
     """
 
     @staticmethod
@@ -26,17 +31,22 @@ class StepperMotor:
         except Exception:
             pass
 
-    def __init__(self, in1=17, in2=18, in3=27, in4=22, chip_name='/dev/gpiochip4'):
+    def __init__(self, in1=17, in2=18, in3=27, in4=22, chip_name='/dev/gpiochip4', pulse_engine=None):
         """
         Initialisiert den Schrittmotor.
-        
+
         Parameter:
         -----------
         in1, in2, in3, in4 : int
             Die GPIO-Offsets für die 4 Spulenpins im Chip.
         chip_name : str
             Pfad zum GPIO-Chip (z. B. '/dev/gpiochip4').
+        pulse_engine : PulseEngine
+            Erzeugt die Schritte zeitgenau (siehe pulse_engine.py).
         """
+        # 4096 Halbschritte = 360° (bei 28BYJ-48 im Halbschritt-Modus)
+        self.step_count = 4096
+        super().__init__(self.step_count, pulse_engine)
 
         # Pin-Offsets
         self.in1 = in1
@@ -47,12 +57,6 @@ class StepperMotor:
         # Wartezeit zwischen zwei Halbschritten. Zu klein => Gefahr von Schrittverlusten.
         self.step_sleep = 0.002
 
-        # 4096 Halbschritte = 360° (bei 28BYJ-48 im Halbschritt-Modus)
-        self.step_count = 4096
-
-        # Richtung: True für CW (clockwise), False für CCW (counter-clockwise)
-        self.direction = False  
-
         # Halbschritt-Sequenz (8 Schritte pro Zyklus)
         # Quelle: http://www.4tronix.co.uk/arduino/Stepper-Motors.php
         self.step_sequence = [
@@ -82,11 +86,22 @@ class StepperMotor:
         # Pins in einer Liste -> leichteres Setzen
         self.motor_pins = [in1, in2, in3, in4]
 
+        # Schrittmuster einmalig als fertige Pin -> Value-Zuordnungen vorberechnen
+        self._build_phase_table()
+
         # Aktueller Index in der step_sequence
         self.motor_step_counter = 0
 
-        # Merker, wie viele Schritte bisher relativ zum „Nullpunkt“ gefahren wurden
-        self.steps_taken = 0
+        # Bewegungsgrenzen für Rampen in Halbschritten. Der 28BYJ-48 läuft aus dem
+        # Stand nur mit ca. 300 Halbschritten/s sicher an, mit Rampe deutlich schneller.
+        self.set_motion_limits(max_velocity=900, acceleration=1800, jerk=None, start_velocity=300)
+
+    @property
+    def steps_taken(self):
+        """
+        Schritte relativ zum Nullpunkt (früherer Name für 'position').
+        """
+        return self.position
 
     def enable_motor(self):
         """
@@ -98,109 +113,72 @@ class StepperMotor:
 
     def disable_motor(self):
         """
-        Deaktiviert den Motor, indem alle Ausgänge auf LOW gesetzt werden
-        und gibt die reservierten Leitungen frei.
-        Danach kann man keinen weiteren move() mehr machen, 
-        es sei denn, man initialisiert erneut.
+        Deaktiviert den Motor, indem alle Ausgänge auf LOW gesetzt werden.
+        Die Leitungen bleiben reserviert, weitere Bewegungen sind möglich.
+        Freigegeben werden sie erst mit cleanup().
         """
         # Alle Pins auf LOW
-        self.lines.set_values({
-            self.in1: Value(0),
-            self.in2: Value(0),
-            self.in3: Value(0),
-            self.in4: Value(0)
-        })
-        # Linien freigeben
-        self.lines.release()
-        # Chip selbst sollte offenbleiben, falls du ihn weiterverwenden willst
-        # self.chip.close() -> würde den Chip komplett schließen
+        self.lines.set_values(self.phase_off)
 
-    def set_direction(self, direction):
+    def _build_phase_table(self):
         """
-        Setzt die Drehrichtung. 'left' => CCW, 'right' => CW.
+        Berechnet die acht Halbschritt-Muster einmalig als fertige Zuordnungen
+        Pin -> gpiod.line.Value, die direkt an lines.set_values() gehen.
+        So wird in der zeitkritischen Schleife nichts mehr pro Schritt erzeugt.
         """
-        if direction == 'left':
-            self.direction = False
-        else:
-            self.direction = True
+        self.phase_values = [
+            {pin: Value(val) for pin, val in zip(self.motor_pins, pattern)}
+            for pattern in self.step_sequence
+        ]
+        self.phase_off = {pin: Value(0) for pin in self.motor_pins}
 
-    def move(self, steps):
+    def _phase_order(self):
         """
-        Führt 'steps' Halbschritte aus, je nach eingestellter direction.
-        steps : int
-            Anzahl der Halbschritte.
+        Gibt die Schrittmuster in Fahrtrichtung zurück, beginnend beim aktuellen Index.
+        'left' => CCW (Index aufwärts), 'right' => CW (Index abwärts).
         """
-        for _ in range(steps):
-            # Dictionary: Welcher Pin soll welchen Wert bekommen?
-            # Die step_sequence gibt an, welche Spulen aktiviert werden.
-            values = {
-                pin: Value(val)
-                for pin, val in zip(self.motor_pins, self.step_sequence[self.motor_step_counter])
-            }
+        n = len(self.phase_values)
+        step = -1 if self.direction == 'right' else 1
+        return [self.phase_values[(self.motor_step_counter + step * i) % n] for i in range(n)]
 
-            # Setzt die Ausgabe auf die Pins
-            self.lines.set_values(values)
-
-            # Warte kurz, damit der Motor Zeit hat, den Schritt zu vollziehen
-            time.sleep(self.step_sleep)
+    def _step_function(self):
+        """
+        Vorberechnete Muster zyklisch in Fahrtrichtung ausgeben: pro Schritt nur
+        ein next() und ein set_values(), ohne neue Objekte zu erzeugen.
+        """
+        phases = itertools.cycle(self._phase_order())
+        set_values = self.lines.set_values
 
-            # Inkrement / Dekrement des Schrittmusters
-            if self.direction:
-                self.motor_step_counter = (self.motor_step_counter - 1) % 8
-            else:
-                self.motor_step_counter = (self.motor_step_counter + 1) % 8
+        def step():
+            set_values(next(phases))
 
-        # Tracke die totalen Schritte, um "move_to_original_position" zu ermöglichen
-        if self.direction:
-            # CW => negative Steps, falls man "Nullpunkt" links vom Start hat
-            self.steps_taken -= steps
-        else:
-            # CCW => positive Steps
-            self.steps_taken += steps
+        return step
 
-    def move_by_degree(self, degree):
+    def _after_move(self, steps_done):
         """
-        Bewegt den Motor um einen Winkel 'degree' (0-360).
-        4096 Halbschritte entsprechen 360 Grad => 1 Halbschritt ~ 0.088°
+        Index im Schrittmuster um die ausgeführten Schritte nachführen.
         """
-        # Schrittberechnung für 28BYJ-48
-        steps = int(self.step_count * (degree / 360.0))
-        print(f"move_by_degree({degree}) => {steps} Halbschritte")
-        self.move(steps)
+        if self.direction == 'right':
+            self.motor_step_counter = (self.motor_step_counter - steps_done) % 8
+        else:
+            self.motor_step_counter = (self.motor_step_counter + steps_done) % 8
 
-    def move_to_original_position(self):
+    def _close(self):
         """
-        Fährt den Motor zurück auf Position 0,
-        basierend auf der kumulierten Schrittzahl in 'self.steps_taken'.
+        Setzt alle Pins auf LOW, gibt die Leitungen frei und schließt den Chip.
         """
-        # Merke aktuelle Richtung
-        original_direction = self.direction
-
-        # Wenn steps_taken > 0, bedeutet das, wir sind gegen den Uhrzeigersinn "rausgefahren".
-        # => zurückfahren = clockwise (right) -> self.direction = True
-        # (Oder umgekehrt)
-        if self.steps_taken > 0:
-            self.set_direction('right')
-        elif self.steps_taken < 0:
-            self.set_direction('left')
-
-        # Nun absolute Schrittzahl zurückfahren
-        self.move(abs(self.steps_taken))
-
-        # Schritte sind wieder 0 (Ausgangsposition)
-        self.steps_taken = 0
-
-        # Ursprüngliche Richtung wiederherstellen
-        self.direction = original_direction
+        self.lines.set_values(self.phase_off)
+        self.lines.release()
+        self.chip.close()
 
 
 if __name__ == "__main__":
     # Beispielhafter Test
     stepper = StepperMotor()
-    
+
     # Motor "aktivieren" (falls erforderlich)
     stepper.enable_motor()
-    
+
     # Richtung: links herum (CCW)
     stepper.set_direction('left')
 
@@ -210,5 +188,6 @@ if __name__ == "__main__":
     # Optional: zurück zum Ursprung
     # stepper.move_to_original_position()
 
-    # Motor deaktivieren
-    stepper.disable_motor()
\ No newline at end of file
+    # Motor deaktivieren und Ressourcen freigeben
+    stepper.disable_motor()
+    stepper.cleanup()
@@ -0,0 +1,129 @@
+from pulse_engine import SimulatedLine
+from schrittmotor import StepperBase
+
+
+class SimulatedStepper(StepperBase):
+    """
+    Schrittmotor-Simulator ohne GPIO, z. B. für Tests und Benchmarks ohne Raspberry Pi.
+
+    Der Simulator verhält sich wie ein TB6600-Treiber (DIR, PUL, ENA als simulierte
+    Leitungen) und nutzt dieselbe PulseEngine und Rampenplanung wie die echten
+    Backends. Bewegungen dauern daher genauso lange wie an der Hardware; mit
+    'time_scale' lassen sie sich für schnelle Testläufe verkürzen.
+
+    Optional wird ein Endschalter simuliert, der über einen Winkelbereich des
+    Drehtellers betätigt ist (z. B. durch einen Nocken).
+    """
+
+    def __init__(self, steps_per_revolution=1600, switch_position=None, switch_width=8,
+                 time_scale=1.0, pulse_engine=None):
+        """
+        Parameter:
+        -----------
+        steps_per_revolution : int
+            Schritte pro Umdrehung (Standard wie TB6600 mit 1/8-Mikroschritt).
+        switch_position : int
+            Physikalische Position (in Schritten) des Endschalters. None => kein Endschalter.
+        switch_width : int
+            Anzahl Schritte, über die der Endschalter betätigt bleibt.
+        time_scale : float
+            Faktor für alle Wartezeiten (1.0 = Echtzeit, 0.1 = zehnmal schneller).
+        pulse_engine : PulseEngine
+            Erzeugt die Schritte zeitgenau (siehe pulse_engine.py).
+        """
+        super().__init__(steps_per_revolution, pulse_engine)
+
+        self.DIR = SimulatedLine()
+        self.PUL = SimulatedLine()
+        self.ENA = SimulatedLine(value=1)
+
+        self.switch_position = switch_position
+        self.switch_width = switch_width
+        self.has_limit_switch = switch_position is not None
+        self.time_scale = time_scale
+
+        # Tatsächliche Stellung des Drehtellers (wird bei der Referenzfahrt nicht zurückgesetzt)
+        self.physical_position = 0
+
+        # Gleiche Grenzen wie beim TB6600-Treiber
+        self.set_motion_limits(max_velocity=3200, acceleration=6400, jerk=64000, start_velocity=200)
+
+    def enable_motor(self):
+        """
+        Simuliert ENA = LOW (Motor aktiv).
+        """
+        self.ENA.set_value(0)
+
+    def disable_motor(self):
+        """
+        Simuliert ENA = HIGH (Motor stromlos).
+        """
+        self.ENA.set_value(1)
+
+    def _apply_direction(self, direction):
+        """
+        Simuliert den DIR-Pin: 'left' => 0, 'right' => 1.
+        """
+        self.DIR.set_value(0 if direction == 'left' else 1)
+
+    def _plan_periods(self, steps, delay):
+        """
+        Wie in der Basisklasse, aber mit 'time_scale' skaliert.
+        """
+        periods = super()._plan_periods(steps, delay)
+        if self.time_scale != 1.0:
+            periods = [period * self.time_scale for period in periods]
+        return periods
+
+    def _fixed_period(self, delay):
+        """
+        Wie beim TB6600: eine Pulsperiode entspricht 2 * delay.
+        """
+        return 2 * delay * self.time_scale
+
+    def _step_function(self):
+        """
+        Gibt einen Puls auf der simulierten PUL-Leitung aus und führt die
+        physikalische Position des Drehtellers nach.
+        """
+        set_value = self.PUL.set_value
+        sign = 1 if self.direction == 'left' else -1
+
+        def pulse():
+            set_value(1)
+            set_value(0)
+            self.physical_position += sign
+
+        return pulse
+
+    def _limit_triggered(self):
+        """
+        Der simulierte Endschalter ist betätigt, solange sich der Drehteller im
+        Bereich [switch_position, switch_position + switch_width) befindet.
+        """
+        if self.switch_position is None:
+            return False
+        offset = (self.physical_position - self.switch_position) % self.steps_per_revolution
+        return offset < self.switch_width
+
+    def _close(self):
+        """
+        Verwirft die aufgezeichneten Flanken.
+        """
+        self.DIR.edges.clear()
+        self.PUL.edges.clear()
+        self.ENA.edges.clear()
+
+
+if __name__ == "__main__":
+    # Kurzer Durchlauf ohne Hardware: Referenzfahrt, 90° relativ, dann absolut auf 180°
+    stepper = SimulatedStepper(switch_position=400)
+    stepper.enable_motor()
+    stepper.move_to_zero_point(delay=0.0002)
+    stepper.set_direction('left')
+    stepper.move_by_degree(90)
+    print(f"Position: {stepper.position_degree:.1f}°")
+    stepper.move_to_degree(180)
+    print(f"Position: {stepper.position_degree:.1f}°")
+    stepper.disable_motor()
+    stepper.cleanup()
@@ -0,0 +1,184 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SeriesExecutor:
+    """
+    Nimmt eine Bilderserie auf dem Drehteller im Pipeline-Betrieb auf.
+
+    Statt Bewegen -> Warten -> Aufnehmen -> Download -> Anzeigen strikt nacheinander
+    auszuführen, laufen drei Stufen parallel:
+      - Bewegungs-Thread: fährt den Drehteller und löst die Kamera aus. Sobald die
+        Belichtung abgeschlossen ist, fährt er bereits den nächsten Winkel an.
+      - Kamera-Thread: führt die Aufnahme aus und lädt das Bild herunter.
+      - Aufrufer (z. B. Streamlit): erhält jedes fertig heruntergeladene Bild über
+        den Generator run() und kann die Vorschau anzeigen.
+
+    Pro Bild dauert eine Serie damit ungefähr max(Bewegung, Download) + Belichtung.
+
+    Mehrere Kameras auf denselben Drehteller (Ansichten) haben je einen eigenen
+    Kamera-Thread: Sie werden pro Winkel gleichzeitig ausgelöst, weitergedreht wird,
+    sobald alle belichtet haben (siehe run_views()).
+    """
+
+    def __init__(self, cam, stepper, settle_time=0.5):
+        """
+        Parameter:
+        -----------
+        cam : camera.Camera oder dict
+            Kamera-Objekt, das für die gesamte Serie verwendet wird, bzw.
+            mehrere Kameras als {Ansicht: camera.Camera}.
+        stepper : StepperMotor
+            Schrittmotor des Drehtellers (benötigt move_by_degree()).
+        settle_time : float
+            Wartezeit in Sekunden nach jeder Bewegung, damit der Drehteller ruhig steht.
+        """
+        self.cameras = dict(cam) if isinstance(cam, dict) else {None: cam}
+        self.cam = next(iter(self.cameras.values()))
+        self.stepper = stepper
+        self.settle_time = settle_time
+
+    def _capture(self, view, image_folder, file_name, degree, exposed, results):
+        """
+        Aufnahme im Kamera-Thread der Ansicht. Setzt 'exposed', sobald der Drehteller
+        weiterfahren darf, und legt das Ergebnis in 'results' ab.
+        """
+        try:
+            cam = self.cameras[view]
+            cam.set_file_path(image_folder)
+            cam.set_file_name(file_name)
+            captured_image = cam.capture_image(on_exposed=exposed.set)
+            results.put((view, degree, captured_image))
+        except Exception as e:
+            results.put(e)
+        finally:
+            # Auch im Fehlerfall darf der Bewegungs-Thread nicht hängen bleiben
+            exposed.set()
+
+    def _motion_loop(self, number_of_images, folders, degree_step, results, stop, cancel=None):
+        """
+        Bewegungs-Thread: Drehteller bewegen, Aufnahmen anstoßen und auf die Belichtung warten.
+        Endet vorzeitig, sobald 'stop' oder 'cancel' gesetzt ist.
+        """
+        # Eine Warteschlange (ein Thread) pro Kamera
+        camera_workers = {view: ThreadPoolExecutor(max_workers=1) for view in folders}
+        current_degree = 0
+        try:
+            for _ in range(number_of_images):
+                # Der Aufrufer liest keine Bilder mehr (z. B. Streamlit-Rerun) => nicht weiterdrehen
+                if stop.is_set() or (cancel is not None and cancel.is_set()):
+                    break
+
+                # Motor um den berechneten Winkel bewegen
+                self.stepper.move_by_degree(degree_step)
+                current_degree += degree_step
+
+                # Kurze Wartezeit, damit der Motor sich stabilisiert
+                if self.settle_time > 0:
+                    time.sleep(self.settle_time)
+
+                # Kamera-Dateiname (mit aktuellem Zeitstempel + Gradzahl)
+                file_name = f"{int(time.time())}_{int(current_degree)}_captured_image.CR2"
+
+                exposed = []
+                for view, image_folder in folders.items():
+                    exposed.append(threading.Event())
+                    camera_workers[view].submit(
+                        self._capture, view, image_folder, file_name, current_degree, exposed[-1], results
+                    )
+
+                # Erst nach der Belichtung aller Kameras weiterdrehen, die Downloads laufen parallel weiter
+                for event in exposed:
+                    event.wait()
+        except Exception as e:
+            results.put(e)
+        finally:
+            # Auf die noch laufenden Downloads warten
+            for camera_worker in camera_workers.values():
+                camera_worker.shutdown(wait=True)
+            results.put(None)
+
+    def run(self, number_of_images, image_folder, degree_step=None):
+        """
+        Startet die Serie und liefert die Bilder, sobald sie heruntergeladen sind
+        (in der Reihenfolge, in der die Downloads fertig werden).
+        Wird der Generator vorzeitig verlassen, dreht der Drehteller nicht weiter.
+
+        Parameter:
+        -----------
+        number_of_images : int
+            Anzahl der Aufnahmen.
+        image_folder : str
+            Zielordner der Serie (wird bei Bedarf angelegt).
+        degree_step : float
+            Winkel zwischen zwei Aufnahmen. Standard: 360 / number_of_images.
+
+        Rückgabewert:
+        --------------
+        Generator von (degree, path)
+            Winkel der Aufnahme und Pfad zur Bilddatei (None bei Fehlern).
+        """
+        if len(self.cameras) != 1:
+            raise ValueError("run() nimmt mit genau einer Kamera auf, für mehrere Ansichten run_views() verwenden.")
+        view = next(iter(self.cameras))
+        for _, degree, path in self.run_views(number_of_images, {view: image_folder}, degree_step):
+            yield degree, path
+
+    def run_views(self, number_of_images, folders, degree_step=None, cancel=None):
+        """
+        Wie run(), aber mit allen Kameras: Pro Winkel werden alle Kameras gleichzeitig ausgelöst.
+
+        Parameter:
+        -----------
+        number_of_images : int
+            Anzahl der Winkel.
+        folders : dict
+            Zielordner der Serie je Ansicht, {Ansicht: Ordner}.
+        degree_step : float
+            Winkel zwischen zwei Aufnahmen. Standard: 360 / number_of_images.
+        cancel : threading.Event
+            Optional: Wird es gesetzt (z. B. von RigScheduler.run()), endet die Serie
+            vor dem nächsten Winkel.
+
+        Rückgabewert:
+        --------------
+        Generator von (view, degree, path)
+            Ansicht, Winkel der Aufnahme und Pfad zur Bilddatei (None bei Fehlern),
+            in der Reihenfolge, in der die Downloads fertig werden.
+        """
+        if degree_step is None:
+            degree_step = 360 / number_of_images
+
+        for image_folder in folders.values():
+            if not os.path.exists(image_folder):
+                os.makedirs(image_folder)
+
+        results = queue.Queue()
+        stop = threading.Event()
+        motion_thread = threading.Thread(
+            target=self._motion_loop,
+            args=(number_of_images, folders, degree_step, results, stop, cancel),
+            daemon=True
+        )
+        motion_thread.start()
+
+        error = None
+        try:
+            while True:
+                item = results.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    error = error or item
+                    continue
+                yield item
+        finally:
+            # Auch wenn der Aufrufer den Generator verlässt (Rerun, Ausnahme): Bewegung beenden
+            stop.set()
+
+        motion_thread.join()
+        if error is not None:
+            raise error
@@ -0,0 +1,441 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import collections
+
+import config
+from raw_image import IMAGE_EXTENSIONS
+
+
+# Dateiname der Aufnahmen: <Zeitstempel>_<Winkel>_captured_image.<Endung> (siehe series.py)
+CAPTURE_PATTERN = re.compile(r"^(\d+)_(-?\d+)_captured_image\.", re.IGNORECASE)
+
+# Manifest im Ordner jeder Serie (eine JSON-Zeile pro Ereignis)
+MANIFEST_NAME = "manifest.jsonl"
+
+# Zeilen des globalen Index
+SeriesInfo = collections.namedtuple(
+    "SeriesInfo", ["name", "created", "comments", "settings", "image_count", "total_bytes"]
+)
+ImageInfo = collections.namedtuple("ImageInfo", ["file", "angle", "timestamp", "size", "sha1"])
+
+
+def parse_capture_name(file_name):
+    """
+    Liest Zeitstempel und Winkel aus dem Dateinamen einer Aufnahme.
+    Gibt (None, None) zurück, wenn der Name nicht dem Muster entspricht.
+    """
+    match = CAPTURE_PATTERN.match(file_name)
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """
+    SHA-1 des Dateiinhalts (blockweise gelesen, auch für große RAW-Dateien).
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SeriesManifest:
+    """
+    Manifest einer Bilderserie: 'manifest.jsonl' im Ordner der Serie.
+
+    Jede Zeile ist ein Ereignis, es wird nur angehängt (auch bei einem Abbruch
+    mitten in der Serie bleiben alle bisherigen Einträge lesbar):
+      - {"type": "series", ...}: Beginn der Serie mit Kommentar und Kameraeinstellungen
+      - {"type": "image", ...}: Aufnahme mit Winkel, Zeitstempel, Größe und SHA-1
+      - {"type": "derived", ...}: abgeleitete Datei (z. B. Kantenbild) zu einer Aufnahme
+    """
+
+    def __init__(self, folder):
+        """
+        Parameter:
+        -----------
+        folder : str
+            Ordner der Serie.
+        """
+        self.folder = folder
+        self.name = os.path.basename(os.path.normpath(folder))
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def _append(self, record):
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    def write_series(self, comments="", settings=None, created=None):
+        """
+        Vermerkt den Beginn der Serie mit Kommentar und Einstellungen (Kamera, Motor, Schrittweite).
+        """
+        return self._append({
+            "type": "series",
+            "name": self.name,
+            "created": time.time() if created is None else created,
+            "comments": comments,
+            "settings": settings or {},
+        })
+
+    def add_image(self, path, angle=None, timestamp=None):
+        """
+        Vermerkt eine Aufnahme. Winkel und Zeitstempel werden, falls nicht angegeben,
+        aus dem Dateinamen gelesen.
+        """
+        file_name = os.path.basename(path)
+        name_timestamp, name_angle = parse_capture_name(file_name)
+        return self._append({
+            "type": "image",
+            "file": file_name,
+            "angle": name_angle if angle is None else angle,
+            "timestamp": name_timestamp if timestamp is None else timestamp,
+            "size": os.path.getsize(path),
+            "sha1": file_hash(path),
+        })
+
+    def add_derived(self, source, kind, path):
+        """
+        Vermerkt eine aus der Aufnahme 'source' abgeleitete Datei (z. B. kind='canny').
+        """
+        return self._append({"type": "derived", "file": os.path.basename(source), "kind": kind, "path": path})
+
+    def read(self):
+        """
+        Liest das Manifest.
+
+        Rückgabewert:
+        --------------
+        series, images : dict, OrderedDict
+            Angaben zur Serie und Dateiname -> Eintrag der Aufnahme; abgeleitete
+            Dateien stehen im Eintrag unter 'derived' (Art -> Pfad).
+        """
+        series = {"name": self.name, "created": None, "comments": "", "settings": {}}
+        images = collections.OrderedDict()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Unvollständige letzte Zeile (z. B. nach einem Absturz) ignorieren
+                    continue
+                kind = record.pop("type", None)
+                if kind == "series":
+                    series.update(record)
+                elif kind == "image":
+                    record["derived"] = images.get(record["file"], {}).get("derived", {})
+                    images[record["file"]] = record
+                elif kind == "derived":
+                    images.setdefault(record["file"], {"file": record["file"], "derived": {}})
+                    images[record["file"]]["derived"][record["kind"]] = record["path"]
+        return series, images
+
+    def import_folder(self):
+        """
+        Legt das Manifest für einen bestehenden Ordner ohne Manifest an (ältere Serien):
+        Winkel und Zeitstempel aus den Dateinamen, Beginn der Serie = älteste
+        Änderungszeit der Bilder, Kommentar leer.
+        """
+        files = sorted(
+            (entry for entry in os.scandir(self.folder)
+             if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)),
+            key=lambda entry: entry.name
+        )
+        created = min((entry.stat().st_mtime for entry in files), default=time.time())
+        self.write_series(settings={"imported": True}, created=created)
+        for entry in files:
+            self.add_image(entry.path)
+
+
+class SeriesIndex:
+    """
+    Globaler Index aller Serien (SQLite), damit die Oberfläche Serien und Aufnahmen
+    auflisten und filtern kann, ohne die Verzeichnisse zu durchsuchen.
+
+    Der Index wird aus den Manifesten der Serien aufgebaut (refresh()) und beim
+    Aufnehmen laufend ergänzt (SeriesRecorder). Er lässt sich jederzeit aus den
+    Manifesten neu erzeugen.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS series (
+            name TEXT PRIMARY KEY, created REAL, comments TEXT, settings TEXT,
+            image_count INTEGER, total_bytes INTEGER, manifest_mtime_ns INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS images (
+            series TEXT, file TEXT, angle REAL, timestamp INTEGER, size INTEGER, sha1 TEXT,
+            PRIMARY KEY (series, file)
+        );
+        CREATE TABLE IF NOT EXISTS derived (
+            series TEXT, file TEXT, kind TEXT, path TEXT,
+            PRIMARY KEY (series, file, kind)
+        );
+        CREATE INDEX IF NOT EXISTS series_created ON series (created);
+    """
+
+    def __init__(self, path=None, output_directory=None):
+        """
+        Parameter:
+        -----------
+        path : str
+            SQLite-Datei des Index. Standard: config.series_index_path
+        output_directory : str
+            Verzeichnis mit einer Serie pro Unterordner. Standard: config.output_directory
+        """
+        self.path = path or config.series_index_path
+        self.output_directory = output_directory or config.output_directory
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Eine Verbindung für alle Threads (Streamlit-Sitzungen), geschützt durch einen Lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _store_series(self, series, images, manifest_mtime_ns):
+        """
+        Ersetzt alle Einträge einer Serie (in einer Transaktion).
+        """
+        name = series["name"]
+        real_images = [image for image in images.values() if "size" in image]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM images WHERE series = ?", (name,))
+            self._connection.execute("DELETE FROM derived WHERE series = ?", (name,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, series["created"], series["comments"], json.dumps(series["settings"]),
+                 len(real_images), sum(image["size"] for image in real_images), manifest_mtime_ns)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                [(name, image["file"], image["angle"], image["timestamp"], image["size"], image["sha1"])
+                 for image in real_images]
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO derived VALUES (?, ?, ?, ?)",
+                [(name, image["file"], kind, path)
+                 for image in images.values() for kind, path in image["derived"].items()]
+            )
+
+    def refresh(self, import_missing=False):
+        """
+        Gleicht den Index mit den Unterordnern von output_directory ab. Gelesen
+        werden nur Manifeste, die sich seit dem letzten Abgleich geändert haben;
+        Einträge gelöschter Serien werden entfernt. Ordner ohne Manifest werden
+        übersprungen, solange sie nicht ausdrücklich importiert werden.
+
+        Parameter:
+        -----------
+        import_missing : bool
+            True: für Ordner ohne Manifest (ältere Serien) eines anlegen. Schreibt
+            manifest.jsonl in diese Ordner und berechnet die SHA-1 aller Bilder.
+
+        Rückgabewert:
+        --------------
+        int
+            Anzahl neu eingelesener Serien.
+        """
+        with self._lock:
+            known = dict(self._connection.execute("SELECT name, manifest_mtime_ns FROM series"))
+
+        updated = 0
+        folders = set()
+        if os.path.isdir(self.output_directory):
+            for entry in os.scandir(self.output_directory):
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                manifest = SeriesManifest(entry.path)
+                if not manifest.exists():
+                    if not import_missing:
+                        continue
+                    manifest.import_folder()
+                folders.add(entry.name)
+                mtime_ns = os.stat(manifest.path).st_mtime_ns
+                if known.get(entry.name) == mtime_ns:
+                    continue
+                series, images = manifest.read()
+                series["name"] = entry.name
+                self._store_series(series, images, mtime_ns)
+                updated += 1
+
+        removed = set(known) - folders
+        if removed:
+            with self._lock, self._connection:
+                for table, column in (("series", "name"), ("images", "series"), ("derived", "series")):
+                    self._connection.executemany(
+                        f"DELETE FROM {table} WHERE {column} = ?", [(name,) for name in removed]
+                    )
+        return updated
+
+    def record(self, manifest, record):
+        """
+        Übernimmt einen gerade ins Manifest geschriebenen Eintrag in den Index
+        (ohne das Manifest neu zu lesen).
+        """
+        name = manifest.name
+        kind = record["type"]
+        with self._lock, self._connection:
+            if kind == "series":
+                # Weitere Aufnahmen in einen bestehenden Ordner: Zähler der Serie beibehalten
+                self._connection.execute(
+                    "INSERT INTO series VALUES (?, ?, ?, ?, 0, 0, NULL) ON CONFLICT (name) DO UPDATE SET "
+                    "created = excluded.created, comments = excluded.comments, settings = excluded.settings",
+                    (name, record["created"], record["comments"], json.dumps(record["settings"]))
+                )
+            elif kind == "image":
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, record["file"], record["angle"], record["timestamp"], record["size"], record["sha1"])
+                )
+                # Aus der Tabelle zählen: ein erneut aufgenommenes Bild ersetzt seine Zeile
+                self._connection.execute(
+                    "UPDATE series SET image_count = (SELECT COUNT(*) FROM images WHERE series = ?), "
+                    "total_bytes = (SELECT COALESCE(SUM(size), 0) FROM images WHERE series = ?) "
+                    "WHERE name = ?", (name, name, name)
+                )
+            elif kind == "derived":
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO derived VALUES (?, ?, ?, ?)",
+                    (name, record["file"], record["kind"], record["path"])
+                )
+            # Manifest hat sich geändert, ist aber vollständig übernommen
+            self._connection.execute(
+                "UPDATE series SET manifest_mtime_ns = ? WHERE name = ?",
+                (os.stat(manifest.path).st_mtime_ns, name)
+            )
+
+    def list_series(self, search=None, limit=None):
+        """
+        Serien, neueste zuerst.
+
+        Parameter:
+        -----------
+        search : str
+            Nur Serien, deren Name oder Kommentar diesen Text enthält.
+        limit : int
+            Höchstens so viele Serien.
+        """
+        query = "SELECT name, created, comments, settings, image_count, total_bytes FROM series"
+        params = []
+        if search:
+            query += " WHERE name LIKE ? OR comments LIKE ?"
+            params += [f"%{search}%", f"%{search}%"]
+        query += " ORDER BY created DESC, name"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [SeriesInfo(name, created, comments, json.loads(settings or "{}"), count, size)
+                for name, created, comments, settings, count, size in rows]
+
+    def images(self, series):
+        """
+        Aufnahmen einer Serie, sortiert nach Winkel bzw. Dateiname.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT file, angle, timestamp, size, sha1 FROM images WHERE series = ? "
+                "ORDER BY angle IS NULL, angle, file", (series,)
+            ).fetchall()
+        return [ImageInfo(*row) for row in rows]
+
+    def derived(self, series, file_name):
+        """
+        Abgeleitete Dateien einer Aufnahme als dict Art -> Pfad.
+        """
+        with self._lock:
+            return dict(self._connection.execute(
+                "SELECT kind, path FROM derived WHERE series = ? AND file = ?", (series, file_name)
+            ))
+
+
+class SeriesRecorder:
+    """
+    Schreibt beim Aufnehmen einer Serie Manifest und globalen Index gleichzeitig.
+
+    Beispiel:
+        recorder = SeriesRecorder("captured_images/schraube", comments="Kratzer oben", index=index)
+        for degree, path in executor.run(36, recorder.folder):
+            recorder.add_image(path, degree)
+    """
+
+    def __init__(self, folder, comments="", settings=None, index=None):
+        """
+        Parameter:
+        -----------
+        folder : str
+            Ordner der Serie.
+        comments : str
+            Freitext aus dem Aufnahmeformular.
+        settings : dict
+            Kamera- und Motoreinstellungen der Serie.
+        index : SeriesIndex
+            Optional: globaler Index, der mitgeführt wird.
+        """
+        self.folder = folder
+        self.manifest = SeriesManifest(folder)
+        self.index = index
+        self._record(self.manifest.write_series(comments, settings))
+
+    def _record(self, record):
+        if self.index is not None:
+            self.index.record(self.manifest, record)
+        return record
+
+    def add_image(self, path, angle=None, timestamp=None):
+        return self._record(self.manifest.add_image(path, angle, timestamp))
+
+    def add_derived(self, source, kind, path):
+        return self._record(self.manifest.add_derived(source, kind, path))
+
+
+def main(argv=None):
+    """
+    Kommandozeile: globalen Index aus den Manifesten der Serien aufbauen bzw. aktualisieren.
+    """
+    parser = argparse.ArgumentParser(description="Index aller Bilderserien aufbauen und durchsuchen")
+    parser.add_argument("directory", nargs="?", default=config.output_directory, help="Verzeichnis der Serien")
+    parser.add_argument("--index", default=None, help="SQLite-Datei (Standard: config.series_index_path)")
+    parser.add_argument("--search", help="Nur Serien, deren Name oder Kommentar diesen Text enthält")
+    parser.add_argument("--rebuild", action="store_true", help="Index löschen und neu aufbauen")
+    parser.add_argument("--import", dest="import_missing", action="store_true",
+                        help="Ältere Ordner ohne Manifest importieren (schreibt manifest.jsonl, SHA-1 aller Bilder)")
+    args = parser.parse_args(argv)
+
+    path = args.index or config.series_index_path
+    if args.rebuild and os.path.exists(path):
+        os.remove(path)
+
+    index = SeriesIndex(path, args.directory)
+    start = time.perf_counter()
+    updated = index.refresh(import_missing=args.import_missing)
+    print(f"{updated} Serien eingelesen in {time.perf_counter() - start:.2f}s")
+    for info in index.list_series(args.search):
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.created)) if info.created else "-"
+        print(f"{created}  {info.name:<30} {info.image_count:>4} Bilder {info.total_bytes / 1e6:>8.1f} MB  {info.comments}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,33 @@
-import gpiod
 import time
 
-# 1) Öffne den Chip (z. B. "gpiochip0")
-#    Auf vielen Systemen (insbesondere Raspberry Pi) ist /dev/gpiochip0 
-#    der erste Chip, der die meisten GPIO-Pins abbildet.
-chip = gpiod.Chip('gpiochip0')
+from limit_switch import LimitSwitch
 
-# 2) Hole eine bestimmte Linie (Pin), hier Offset 12
-#    (Achtung: Das ist nicht zwingend BCM12, sondern "Offset 12" im Chip gpiochip0).
-line = chip.get_line(12)
+# Mikroschalter an Offset 12 von /dev/gpiochip0 (nicht zwingend BCM12).
+# Statt die Leitung alle 100 ms abzufragen, meldet der Kernel jede Flanke als Ereignis:
+# Pull-Up => Ruhezustand HIGH, der geschlossene Schalter zieht die Leitung auf LOW.
+# Prellen unter 2 ms wird vom Kernel herausgefiltert (debounce).
 
-# 3) Konfiguriere die Linie als Eingang, mit internem Pull-Up-Widerstand
-#    -> gpiod.LINE_REQ_FLAG_BIAS_PULL_UP bedeutet, dass der Pin auf HIGH gezogen wird, 
-#       solange kein externer Schalter ihn auf LOW zieht.
-line.request(
-    consumer="switch",
-    type=gpiod.LINE_REQ_DIR_IN,
-    flags=gpiod.LINE_REQ_FLAG_BIAS_PULL_UP
-)
+
+def on_change(pressed, timestamp_ns):
+    # Verzögerung zwischen Flanke (Kernel-Zeitstempel) und Verarbeitung im Hintergrund-Thread
+    latency_us = (time.monotonic_ns() - timestamp_ns) / 1000
+    if pressed:
+        print(f"Schalter ist geschlossen (LOW), Latenz {latency_us:.0f}µs")
+    else:
+        print(f"Schalter ist geöffnet (HIGH), Latenz {latency_us:.0f}µs")
+
+
+switch = LimitSwitch('/dev/gpiochip0', 12, debounce=0.002, consumer="switch", callback=on_change)
+print("Schalter ist", "geschlossen (LOW)" if switch.is_pressed() else "geöffnet (HIGH)")
 
 try:
+    # Der Hauptthread schläft nur, die Ausgabe erfolgt im Callback
     while True:
-        # 4) Lese den Zustand der Linie
-        #    - get_value() liefert 1 (HIGH), wenn der Schalter "offen" ist 
-        #      (kein Kontakt gegen Masse).
-        #    - 0 (LOW), wenn der Schalter geschlossen ist (gegen Masse).
-        value = line.get_value()
-        
-        if value == 0:
-            print("Schalter ist geschlossen (LOW)")
-        else:
-            print("Schalter ist geöffnet (HIGH)")
-        
-        # 5) Warte ein wenig, um die Ausgabe zu begrenzen
-        time.sleep(0.1)
+        time.sleep(1)
 
 except KeyboardInterrupt:
-    print("Programm beendet")
+    print(f"Programm beendet ({switch.event_count} Flanken)")
 
 finally:
-    # 6) Schließe den Chip/Line, damit andere Prozesse darauf zugreifen können.
-    line.release()
-    chip.close()
\ No newline at end of file
+    # Leitung freigeben, damit andere Prozesse darauf zugreifen können.
+    switch.close()
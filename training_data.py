@@ -0,0 +1,280 @@
+import os
+import re
+import math
+import collections
+
+import cv2
+import numpy as np
+
+import config
+import raw_image
+from raw_image import IMAGE_EXTENSIONS, RAW_EXTENSIONS
+
+
+# Endungen, die nicht TensorFlow, sondern raw_image/OpenCV dekodiert
+OPENCV_ONLY_PATTERN = r".*(" + "|".join(re.escape(e) for e in RAW_EXTENSIONS + (".tif", ".tiff")) + ")"
+
+# Ergebnis von image_dataset(): tf.data.Dataset, Anzahl Bilder und Klassennamen (Index = Label)
+DirectoryDataset = collections.namedtuple("DirectoryDataset", ["dataset", "samples", "class_names"])
+
+
+def list_images(directory):
+    """
+    Listet die Bilder in den Klassen-Unterordnern von 'directory' wie flow_from_directory:
+    Klassen = Unterordner in alphabetischer Reihenfolge, Label = Index der Klasse.
+
+    Rückgabewert:
+    --------------
+    paths, labels, class_names : list, list, list
+    """
+    class_names = sorted(d.name for d in os.scandir(directory) if d.is_dir())
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        folder = os.path.join(directory, name)
+        for file_name in sorted(os.listdir(folder)):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(folder, file_name))
+                labels.append(label)
+    return paths, labels, class_names
+
+
+def _read_raw(path):
+    """
+    Liest ein Bild, das TensorFlow nicht dekodieren kann (RAW, TIFF), als RGB (uint8).
+    """
+    path = path.decode() if isinstance(path, bytes) else path
+    image = raw_image.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def random_affine(images, shear_range=0.2, zoom_range=0.2):
+    """
+    Zufällige Scherung und Zoom für einen ganzen Batch in einem einzigen Aufruf
+    (eine Transformationsmatrix pro Bild), wie ImageDataGenerator:
+    Scherwinkel gleichverteilt in [-shear_range, shear_range] Grad, Zoom je Achse
+    gleichverteilt in [1 - zoom_range, 1 + zoom_range], bilineare Interpolation,
+    Randpixel werden fortgesetzt (fill_mode='nearest').
+
+    Parameter:
+    -----------
+    images : tf.Tensor
+        Batch (N, Höhe, Breite, Kanäle), float32.
+    """
+    import tensorflow as tf
+
+    shape = tf.shape(images)
+    batch, height, width = shape[0], shape[1], shape[2]
+
+    shear = tf.random.uniform([batch], -shear_range, shear_range) * (math.pi / 180.0)
+    zoom = tf.random.uniform([batch, 2], 1.0 - zoom_range, 1.0 + zoom_range)
+    zoom_rows, zoom_cols = zoom[:, 0], zoom[:, 1]
+
+    # Matrix (Ausgabe -> Eingabe) in Zeilen/Spalten wie keras apply_affine_transform:
+    # [[zoom_rows, -sin(shear) * zoom_cols], [0, cos(shear) * zoom_cols]], um die Bildmitte
+    row_row, row_col = zoom_rows, -tf.sin(shear) * zoom_cols
+    col_col = tf.cos(shear) * zoom_cols
+    center_row = tf.cast(height, tf.float32) / 2 - 0.5
+    center_col = tf.cast(width, tf.float32) / 2 - 0.5
+    offset_row = center_row - row_row * center_row - row_col * center_col
+    offset_col = center_col - col_col * center_col
+
+    # ImageProjectiveTransform erwartet [a0, a1, a2, b0, b1, b2, c0, c1] mit x = Spalte, y = Zeile
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([
+        col_col, zeros, offset_col,
+        row_col, row_row, offset_row,
+        zeros, zeros
+    ], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3],
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST"
+    )
+
+
+def augment_batch(images, shear_range=0.2, zoom_range=0.2, horizontal_flip=True):
+    """
+    Augmentation wie ImageDataGenerator(shear_range, zoom_range, horizontal_flip)
+    für einen ganzen Batch (vektorisiert statt Bild für Bild in Python).
+    """
+    import tensorflow as tf
+
+    images = random_affine(images, shear_range, zoom_range)
+    if horizontal_flip:
+        flip = tf.random.uniform([tf.shape(images)[0], 1, 1, 1]) < 0.5
+        images = tf.where(flip, tf.reverse(images, axis=[2]), images)
+    return images
+
+
+def image_dataset(directory, image_size=None, batch_size=32, augment=False, shuffle=True,
+                  cache=True, seed=None):
+    """
+    tf.data-Pipeline als Ersatz für ImageDataGenerator(rescale=1./255, ...).flow_from_directory(
+    class_mode='binary'). Liefert dieselben Batches (RGB, Werte in [0, 1], Labels als float32),
+    aber:
+      - Bilder werden parallel dekodiert und skaliert (num_parallel_calls=AUTOTUNE),
+      - dekodierte und skalierte Bilder (uint8) werden zwischengespeichert, ab der zweiten
+        Epoche entfällt das Lesen und Dekodieren,
+      - die Augmentation läuft vektorisiert auf ganzen Batches,
+      - der nächste Batch wird vorbereitet, während das Modell rechnet (prefetch).
+
+    Parameter:
+    -----------
+    directory : str
+        Verzeichnis mit Klassen-Unterordnern, z. B. 'data/train'.
+    image_size : tuple
+        (Höhe, Breite). Standard: config.model_input_size
+    batch_size : int
+        Bilder pro Batch.
+    augment : bool
+        True: Scherung, Zoom und horizontales Spiegeln wie im Training bisher.
+    shuffle : bool
+        Reihenfolge in jeder Epoche neu mischen.
+    cache : bool oder str
+        True: im Arbeitsspeicher zwischenspeichern, str: in diese Datei (für große
+        Datensätze), False: nicht zwischenspeichern.
+    seed : int
+        Startwert für das Mischen (Augmentation: tf.random.set_seed()).
+
+    Rückgabewert:
+    --------------
+    DirectoryDataset
+        (dataset, samples, class_names)
+    """
+    import tensorflow as tf
+
+    height, width = image_size or config.model_input_size
+    paths, labels, class_names = list_images(directory)
+    if not paths:
+        raise FileNotFoundError(f"Keine Bilder in den Unterordnern von '{directory}' gefunden.")
+
+    def load(path, label):
+        # RAW und TIFF kann TensorFlow nicht dekodieren => OpenCV (gibt den GIL frei)
+        is_raw = tf.strings.regex_full_match(tf.strings.lower(path), OPENCV_ONLY_PATTERN)
+        image = tf.cond(
+            is_raw,
+            lambda: tf.numpy_function(_read_raw, [path], tf.uint8),
+            lambda: tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        )
+        image.set_shape([None, None, 3])
+        # Nächster Nachbar wie flow_from_directory (interpolation='nearest'), bleibt uint8
+        image = tf.image.resize(image, (height, width), method="nearest")
+        return image, tf.cast(label, tf.float32)
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    if cache:
+        dataset = dataset.cache("" if cache is True else cache)
+    if shuffle:
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    return DirectoryDataset(_batches(dataset, batch_size, augment), len(paths), class_names)
+
+
+def _batches(dataset, batch_size, augment):
+    """
+    Fasst uint8-Bilder zu Batches zusammen (batch_size=None: bereits in Batches),
+    skaliert auf [0, 1], augmentiert optional und stellt den nächsten Batch vorab bereit.
+    """
+    import tensorflow as tf
+
+    def finish(images, batch_labels):
+        images = tf.cast(images, tf.float32) * (1.0 / 255.0)
+        if augment:
+            images = augment_batch(images)
+        return images, batch_labels
+
+    if batch_size:
+        dataset = dataset.batch(batch_size)
+    dataset = dataset.map(finish, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def cached_image_dataset(directory, image_size=None, batch_size=32, augment=False, shuffle=True,
+                         seed=None, cache_directory=None):
+    """
+    Wie image_dataset(), liest die Bilder aber aus einem DecodedImageCache
+    (decoded_cache.py): Beim ersten Lauf werden alle Bilder einmal dekodiert und
+    skaliert, danach (auch in späteren Trainingsläufen) nur noch neue oder geänderte.
+    Pro Batch werden die Zeilen ohne Dekodieren direkt aus dem memory-mapped Array gelesen.
+
+    Rückgabewert:
+    --------------
+    DirectoryDataset
+        (dataset, samples, class_names)
+    """
+    import tensorflow as tf
+    from decoded_cache import DecodedImageCache
+
+    cache = DecodedImageCache(directory, image_size, cache_directory=cache_directory)
+    height, width = cache.image_size
+
+    def gather(indices):
+        # Sortiert lesen (vorwärts im Array), Reihenfolge im Batch ist ohnehin zufällig
+        indices = np.sort(indices)
+        return cache.images[indices], cache.labels[indices]
+
+    def load(indices):
+        images, labels = tf.numpy_function(gather, [indices], (tf.uint8, tf.float32))
+        images.set_shape([None, height, width, 3])
+        labels.set_shape([None])
+        return images, labels
+
+    dataset = tf.data.Dataset.range(len(cache))
+    if shuffle:
+        dataset = dataset.shuffle(len(cache), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    return DirectoryDataset(_batches(dataset, None, augment), len(cache), cache.class_names)
+
+
+def shard_dataset(directory, split="train", batch_size=32, augment=False, shuffle=True,
+                  shuffle_buffer=2048, seed=None):
+    """
+    tf.data-Pipeline über die Shards von dataset_ingest.py. Die Bilder liegen bereits
+    skaliert vor und werden als große Dateien sequenziell (memory-mapped) gelesen;
+    pro Epoche wird weder dekodiert noch skaliert.
+
+    Parameter:
+    -----------
+    directory : str
+        Shard-Verzeichnis mit manifest.json, z. B. 'data/shards'.
+    split : str
+        'train' oder 'test'.
+    shuffle : bool
+        Reihenfolge der Shards und (über einen Puffer) der Bilder je Epoche mischen.
+    shuffle_buffer : int
+        Anzahl Bilder im Mischpuffer.
+
+    Rückgabewert:
+    --------------
+    DirectoryDataset
+        (dataset, samples, class_names)
+    """
+    import random
+    import tensorflow as tf
+    from dataset_ingest import read_manifest, load_split
+
+    manifest = read_manifest(directory)
+    height, width = manifest["image_size"]
+    samples = sum(shard["count"] for shard in manifest["splits"][split]["shards"])
+    if not samples:
+        raise FileNotFoundError(f"Der Split '{split}' in '{directory}' enthält keine Bilder.")
+    rng = random.Random(seed)
+
+    def generate():
+        shards = list(load_split(directory, split))
+        if shuffle:
+            rng.shuffle(shards)
+        # Stückweise lesen: wenige große, sequenzielle Zugriffe statt einem pro Bild
+        for images, labels, _ in shards:
+            for start in range(0, len(images), 256):
+                yield np.asarray(images[start:start + 256]), labels[start:start + 256]
+
+    dataset = tf.data.Dataset.from_generator(generate, output_signature=(
+        tf.TensorSpec((None, height, width, 3), tf.uint8),
+        tf.TensorSpec((None,), tf.float32),
+    )).unbatch()
+    if shuffle:
+        dataset = dataset.shuffle(min(shuffle_buffer, samples), seed=seed, reshuffle_each_iteration=True)
+    return DirectoryDataset(_batches(dataset, batch_size, augment), samples, manifest["class_names"])
@@ -1,115 +1,355 @@
 import cv2
 import os
+import json
+import threading
+import collections
 import numpy as np
 import config
+import raw_image
+import roi as roi_module
 
 
-def canny_edge_detection(fitem, low_threshold, high_threshold, apertureSize=3):
+def edge_output_name(fitem):
     """
-    Führt eine Canny-Kantendetektion auf dem gegebenen Bild aus und speichert das
-    Ergebnis im config.output_directory unter dem Namen 'canny_<Dateiname>'.
-    Falls das Eingabebild die Endung .CR2 hat, wird es als .jpg gespeichert.
+    Dateiname des Kantenbilds zu 'fitem': 'canny_<Dateiname>', RAW-Dateien (.CR2) als .jpg.
+    """
+    root, ext = os.path.splitext("canny_" + os.path.basename(fitem))
+    if raw_image.is_raw(fitem):
+        ext = ".jpg"
+    return root + ext
+
+
+# Dekodier-Flags für Graustufen bei voller bzw. reduzierter Auflösung (Faktor 1, 2, 4, 8)
+_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def load_gray(fitem, reduce=1):
+    """
+    Gibt ein Graustufenbild (uint8, 2D) zurück, ohne Umweg über ein Farbbild.
+
+    Parameter:
+    -----------
+    fitem : str oder np.ndarray
+        Pfad zum Bild (RAW-Dateien über das eingebettete JPEG) oder bereits
+        dekodiertes Bild (Graustufen oder BGR, auch np.memmap). Graustufen-Arrays
+        werden ohne Kopie zurückgegeben.
+    reduce : int
+        Verkleinerungsfaktor beim Dekodieren (1, 2, 4 oder 8). Bei JPEG wird
+        direkt in der kleineren Auflösung dekodiert, das spart Zeit und Speicher.
+        Für Arrays wird mit INTER_AREA verkleinert.
+    """
+    if reduce not in _GRAYSCALE_FLAGS:
+        raise ValueError("reduce muss 1, 2, 4 oder 8 sein.")
+
+    if isinstance(fitem, np.ndarray):
+        gray = fitem if fitem.ndim == 2 else cv2.cvtColor(fitem, cv2.COLOR_BGR2GRAY)
+        if reduce > 1:
+            height, width = gray.shape
+            gray = cv2.resize(gray, (width // reduce, height // reduce), interpolation=cv2.INTER_AREA)
+        return gray
+
+    # Direkt als Graustufenbild dekodieren (ein Puffer statt BGR + Graustufen)
+    gray = raw_image.imread(fitem, _GRAYSCALE_FLAGS[reduce])
+    if gray is None:
+        raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {fitem}")
+    return gray
+
+
+def canny_tiled(gray, low_threshold, high_threshold, apertureSize=3, tile_size=1024, overlap=None):
+    """
+    Canny-Kantendetektion kachelweise: Die Zwischenergebnisse von cv2.Canny
+    (Gradienten in int16, ca. 5 Bytes pro Pixel) entstehen nur für eine Kachel,
+    der Speicherbedarf bleibt dadurch unabhängig von der Bildgröße begrenzt.
+
+    Jede Kachel wird mit einem Rand von 'overlap' Pixeln verarbeitet; Kanten,
+    deren Hysterese-Kette weiter als der Rand über eine Kachelgrenze reicht,
+    können minimal vom Ergebnis auf dem ganzen Bild abweichen.
 
     Parameter:
     -----------
-    fitem : str
-        Pfad zum Eingabebild.
+    gray : np.ndarray
+        Graustufenbild.
+    tile_size : int
+        Kantenlänge der Kacheln in Pixeln.
+    overlap : int
+        Rand um jede Kachel in Pixeln. Standard: config.tile_overlap
+    """
+    if overlap is None:
+        overlap = config.tile_overlap
+    edges = np.empty(gray.shape, dtype=np.uint8)
+    for outer, inner in roi_module.iter_tiles(gray.shape, tile_size, overlap):
+        tile_edges = cv2.Canny(gray[outer], low_threshold, high_threshold, apertureSize=apertureSize)
+        edges[roi_module.tile_origin(outer, inner)] = tile_edges[inner]
+    return edges
+
+
+def canny_store_params(low_threshold, high_threshold, apertureSize=3, reduce=1, roi=None, tile_size=None):
+    """
+    Parameter, unter denen ein Kantenbild im Artefakt-Speicher abgelegt wird
+    (siehe artifact_store.ArtifactStore). Kachelgröße und Rand gehören dazu, da
+    gekachelte Kantenbilder minimal vom Ergebnis am Stück abweichen können
+    (siehe canny_tiled()). Standard für tile_size: config.tile_size
+    """
+    if tile_size is None:
+        tile_size = config.tile_size
+    return {
+        "low_threshold": low_threshold, "high_threshold": high_threshold, "aperture_size": apertureSize,
+        "reduce": reduce, "roi": config.roi if roi is None else roi,
+        "tile_size": tile_size or None, "tile_overlap": config.tile_overlap if tile_size else None,
+    }
+
+
+def canny_edge_detection(fitem, low_threshold, high_threshold, apertureSize=3, fout=None, reduce=1,
+                         save=False, writer=None, roi=None, tile_size=None, store=None):
+    """
+    Führt eine Canny-Kantendetektion auf dem gegebenen Bild aus und gibt das Kantenbild zurück.
+
+    Gespeichert wird nur auf Anforderung:
+      - 'fout' angegeben: synchron unter diesem Pfad (z. B. in Batch-Prozessen)
+      - save=True: im config.output_directory unter dem Namen 'canny_<Dateiname>'
+        (bei .CR2 als .jpg bzw. im Format des Writers)
+      - 'writer' angegeben (result_writer.ResultWriter): asynchron im Hintergrund,
+        identische Parametersätze werden nur einmal geschrieben
+
+    Parameter:
+    -----------
+    fitem : str oder np.ndarray
+        Pfad zum Eingabebild oder bereits dekodiertes Bild (siehe load_gray()).
     low_threshold : int
         Untere Schwelle für die Canny-Detektion.
     high_threshold : int
         Obere Schwelle für die Canny-Detektion.
     apertureSize : int
         Aperture-Größe (3, 5 oder 7) für den Sobel-Operator in Canny.
+    fout : str
+        Optional: Pfad der Ausgabedatei.
+    reduce : int
+        Verkleinerungsfaktor beim Dekodieren (1, 2, 4 oder 8).
+    save : bool
+        True: Ergebnis im config.output_directory speichern.
+    writer : ResultWriter
+        Optional: speichert das Ergebnis asynchron statt mit cv2.imwrite.
+    roi : None, 'full', 'auto', tuple oder roi.Roi
+        Nur diesen Ausschnitt verarbeiten (siehe roi.resolve_roi). Standard: config.roi
+    tile_size : int
+        Kachelgröße für speicherschonende Verarbeitung (siehe canny_tiled()).
+        Standard: config.tile_size (None => ganzes Bild auf einmal)
+    store : artifact_store.ArtifactStore
+        Optional: Ergebnis für dieselbe Quelldatei und dieselben Parameter aus dem
+        Artefakt-Speicher holen bzw. dort ablegen, statt es neu zu berechnen.
 
     Rückgabewert:
     --------------
     edges : np.ndarray
-        Das Ergebnisbild (Kanten) als Numpy-Array im Grayscale.
+        Das Ergebnisbild (Kanten) als Numpy-Array im Grayscale, bei gesetzter ROI
+        in der Größe des Ausschnitts.
     """
-    # Bild einlesen
-    image = cv2.imread(fitem)
-    if image is None:
-        raise FileNotFoundError(f"Bild konnte nicht gelesen werden: {fitem}")
+    if tile_size is None:
+        tile_size = config.tile_size
+
+    def compute():
+        # Bild direkt als Graustufenbild einlesen (RAW-Dateien wie .CR2 über das eingebettete JPEG)
+        gray = load_gray(fitem, reduce)
+
+        # Nur den Ausschnitt mit dem Prüfteil verarbeiten (View, keine Kopie)
+        gray = roi_module.crop(gray, roi_module.resolve_roi(gray, roi))
+
+        # Canny-Kantendetektion (ggf. kachelweise, siehe canny_tiled())
+        if tile_size:
+            return canny_tiled(gray, low_threshold, high_threshold, apertureSize, tile_size)
+        return cv2.Canny(gray, low_threshold, high_threshold, apertureSize=apertureSize)
 
-    # In Graustufen konvertieren
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if store is not None and not isinstance(fitem, np.ndarray):
+        params = canny_store_params(low_threshold, high_threshold, apertureSize, reduce, roi, tile_size)
+        edges = store.cached(fitem, "canny", params, compute, ".png")
+    else:
+        edges = compute()
 
-    # Canny-Kantendetektion
-    edges = cv2.Canny(gray, low_threshold, high_threshold, apertureSize=apertureSize)
-    
-    # Definiere den Ausgabedateinamen, z. B. ./output/canny_Bild.jpg
-    base_name = os.path.basename(fitem)  # z. B. "bild.CR2"
-    out_name = "canny_" + base_name
-    fout = os.path.join(config.output_directory, out_name)
+    if fout is None and not (save or writer is not None):
+        return edges
 
-    # Falls .CR2 am Ende, ersetze durch .jpg
-    root, ext = os.path.splitext(fout)
-    if ext.lower() == ".cr2":
-        fout = root + ".jpg"
+    # Definiere den Ausgabedateinamen, z. B. ./output/canny_Bild.jpg (.CR2 => .jpg)
+    if fout is None:
+        if isinstance(fitem, np.ndarray):
+            raise ValueError("Für Arrays muss zum Speichern 'fout' angegeben werden.")
+        fout = os.path.join(config.output_directory, edge_output_name(fitem))
 
     # Kantenbild speichern
-    cv2.imwrite(fout, edges)
+    if writer is not None:
+        # Schlüssel für die Duplikaterkennung: Quelle (inkl. Änderungszeit) und die
+        # aufgelösten Parameter (wie im Artefakt-Speicher, auch bei ROI als Liste)
+        key = None
+        if not isinstance(fitem, np.ndarray):
+            params = canny_store_params(low_threshold, high_threshold, apertureSize, reduce, roi, tile_size)
+            key = (os.path.abspath(fitem), os.stat(fitem).st_mtime_ns,
+                   json.dumps(params, sort_keys=True, default=str))
+        writer.submit(edges, fout, key)
+    else:
+        cv2.imwrite(fout, edges)
     return edges
 
 
-if __name__ == "__main__":
+# Ergebnis eines Parametersatzes im Sweep: Anteil der Kantenpixel am Bild
+SweepResult = collections.namedtuple(
+    "SweepResult", ["low_threshold", "high_threshold", "aperture_size", "edge_pixels", "density"]
+)
+
+
+class CannySweep:
     """
-    Hauptteil (wenn das Skript direkt ausgeführt wird).
-    Beispiel:
-      1. Definiere ein Basisverzeichnis 'captured_images'
-      2. Nutze ein Unterverzeichnis für die Ausgabe 'captured_images/Output'
-      3. Durchlaufe alle Dateien und führe Canny-Kantendetektion durch.
+    Canny-Kantendetektion mit zwischengespeicherten Gradienten für Parameter-Sweeps.
+
+    cv2.Canny besteht aus Sobel-Filter (abhängig von der Aperture-Größe) und
+    Non-Maximum-Suppression mit Hysterese (abhängig von den Schwellen). Die
+    Sobel-Ableitungen dx, dy werden pro Bild und Aperture-Größe einmal berechnet
+    und in einem LRU-Speicher mit Byte-Budget gehalten; eine Änderung der
+    Schwellen rechnet danach nur noch die Hysterese neu (cv2.Canny(dx, dy, ...)).
+    Das Ergebnis ist identisch mit cv2.Canny auf dem Bild.
     """
-    # Lokal gesetzt – kann aber auch aus config oder CLI-Argumenten stammen.
-    path = "captured_images"
 
-    # Input-Verzeichnis
-    inputPar = os.path.join(path)
-    # Output-Verzeichnis (Unterordner "Output")
-    outPar = os.path.join(path, 'Output')
-    os.makedirs(outPar, exist_ok=True)
+    def __init__(self, memory_budget=None):
+        """
+        Parameter:
+        -----------
+        memory_budget : int
+            Maximale Größe aller Gradienten im Arbeitsspeicher in Bytes
+            (20-MP-Bild: ca. 80 MB pro Aperture-Größe). Standard: config.sweep_memory_budget
+        """
+        self.memory_budget = memory_budget if memory_budget is not None else config.sweep_memory_budget
+        self._gradients = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
 
-    # Liste aller Dateien im Input-Verzeichnis
-    files = os.listdir(inputPar)
+    @staticmethod
+    def _source_key(fitem, reduce):
+        """
+        Schlüssel des Eingabebilds: Pfad und Änderungszeit bzw. Identität des Arrays.
+        """
+        if isinstance(fitem, np.ndarray):
+            return ("array", id(fitem), fitem.shape, reduce)
+        path = os.path.abspath(fitem)
+        return (path, os.stat(path).st_mtime_ns, reduce)
+
+    def gradients(self, fitem, apertureSize=3, reduce=1, key=None):
+        """
+        Gibt die Sobel-Ableitungen (dx, dy, scale) für das Bild zurück (zwischengespeichert).
+
+        Bei Aperture-Größe 7 werden die Ableitungen wie in OpenCV mit 1/16
+        skaliert (sonst Überlauf in int16); die Schwellen müssen dann mit 'scale'
+        multipliziert werden.
 
-    # Schleife: Für jede Datei die Canny-Kantendetektion durchführen
-    for file in files:
-        fitem = os.path.join(inputPar, file)
+        Parameter:
+        -----------
+        fitem : str oder np.ndarray
+            Pfad oder bereits dekodiertes Bild (siehe load_gray()).
+        apertureSize : int
+            Aperture-Größe (3, 5 oder 7) für den Sobel-Operator.
+        reduce : int
+            Verkleinerungsfaktor beim Dekodieren (1, 2, 4 oder 8).
+        key : hashable
+            Optional: eigener Schlüssel für das Bild (z. B. Pfad und Änderungszeit
+            einer Vorschau). Standard: aus Pfad bzw. Array abgeleitet.
+        """
+        if key is None:
+            key = self._source_key(fitem, reduce)
+        cache_key = (key, apertureSize)
 
-        # Bild lesen (als Farb-Bild)
-        image = cv2.imread(fitem)
-        if image is None:
-            print(f"Überspringe ungültige Datei: {fitem}")
-            continue
+        with self._lock:
+            entry = self._gradients.get(cache_key)
+            if entry is not None:
+                self._gradients.move_to_end(cache_key)
+                return entry[:3]
 
-        # In Graustufen konvertieren
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = load_gray(fitem, reduce)
+        scale = 1.0 / 16.0 if apertureSize == 7 else 1.0
+        dx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=apertureSize, scale=scale, borderType=cv2.BORDER_REPLICATE)
+        dy = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=apertureSize, scale=scale, borderType=cv2.BORDER_REPLICATE)
 
-        # Canny-Kantendetektion mit beispielhaften Parametern
-        edges = cv2.Canny(gray, 150, 160, apertureSize=3)
+        # Das Array selbst mit ablegen, damit seine id() nicht neu vergeben wird
+        entry = (dx, dy, scale, fitem if isinstance(fitem, np.ndarray) else None)
+        size = dx.nbytes + dy.nbytes
+        with self._lock:
+            if size <= self.memory_budget and cache_key not in self._gradients:
+                self._gradients[cache_key] = entry
+                self._memory_bytes += size
+                while self._memory_bytes > self.memory_budget:
+                    _, (old_dx, old_dy, _, _) = self._gradients.popitem(last=False)
+                    self._memory_bytes -= old_dx.nbytes + old_dy.nbytes
+        return dx, dy, scale
 
-        # (Optional) Hough-Line-Transformation
+    def edges(self, fitem, low_threshold, high_threshold, apertureSize=3, reduce=1, key=None):
         """
-        lines = cv2.HoughLines(edges, 1.5, np.pi / 180, 200)
-        if lines is not None:
-            for line in lines:
-                rho, theta = line[0]
-                a = np.cos(theta)
-                b = np.sin(theta)
-                x0 = a * rho
-                y0 = b * rho
-                x1 = int(x0 + 1000 * (-b))
-                y1 = int(y0 + 1000 * (a))
-                x2 = int(x0 - 1000 * (-b))
-                y2 = int(y0 - 1000 * (a))
-
-                # Zeichne die Linie auf das Originalbild (im Farbraum BGR)
-                cv2.line(image, (x1, y1), (x2, y2), (255, 0, 0), 2)
+        Wie cv2.Canny, aber mit zwischengespeicherten Gradienten (siehe gradients()).
         """
+        dx, dy, scale = self.gradients(fitem, apertureSize, reduce, key)
+        return cv2.Canny(dx, dy, low_threshold * scale, high_threshold * scale)
 
-        # Definiere den Ausgabedateinamen (z. B. captured_images/Output/filename.jpg)
-        fout = os.path.join(outPar, file)
+    def grid(self, fitem, low_thresholds, high_thresholds, aperture_sizes=(3,), reduce=1, key=None):
+        """
+        Wertet alle Kombinationen (low < high) der Parameter aus. Die Gradienten
+        werden pro Aperture-Größe nur einmal berechnet.
 
-        # Speichere das Canny-Kantenbild (bzw. edges) ab
-        cv2.imwrite(fout, edges)
-        print(f"Kantenbild gespeichert unter: {fout}")
\ No newline at end of file
+        Rückgabewert:
+        --------------
+        results : list of SweepResult
+            Anzahl und Anteil der Kantenpixel für jeden Parametersatz.
+        """
+        results = []
+        for aperture_size in aperture_sizes:
+            dx, dy, scale = self.gradients(fitem, aperture_size, reduce, key)
+            for low_threshold in low_thresholds:
+                for high_threshold in high_thresholds:
+                    if high_threshold <= low_threshold:
+                        continue
+                    edges = cv2.Canny(dx, dy, low_threshold * scale, high_threshold * scale)
+                    edge_pixels = cv2.countNonZero(edges)
+                    results.append(SweepResult(
+                        low_threshold, high_threshold, aperture_size, edge_pixels, edge_pixels / edges.size
+                    ))
+        return results
+
+    def clear(self):
+        """
+        Verwirft alle zwischengespeicherten Gradienten.
+        """
+        with self._lock:
+            self._gradients.clear()
+            self._memory_bytes = 0
+
+
+def pick_parameters(results, target_density=None):
+    """
+    Wählt aus den Ergebnissen eines Sweeps den Parametersatz, dessen Kantenanteil
+    am nächsten an 'target_density' liegt. Bei gleichem Abstand wird die höhere
+    obere Schwelle bevorzugt (weniger Rauschkanten).
+
+    Parameter:
+    -----------
+    results : list of SweepResult
+        Ergebnis von CannySweep.grid().
+    target_density : float
+        Gewünschter Anteil der Kantenpixel (0-1). Standard: config.sweep_target_density
+    """
+    if not results:
+        raise ValueError("Keine Sweep-Ergebnisse vorhanden.")
+    if target_density is None:
+        target_density = config.sweep_target_density
+    return min(results, key=lambda r: (abs(r.density - target_density), -r.high_threshold, -r.low_threshold))
+
+
+if __name__ == "__main__":
+    """
+    Hauptteil (wenn das Skript direkt ausgeführt wird):
+    Canny-Kantendetektion für alle Bilder in 'captured_images' (inkl. Unterordnern),
+    Ausgabe im Unterordner 'captured_images/Output'. Die Verarbeitung läuft parallel,
+    siehe batch_edges.py für alle Optionen.
+    """
+    import batch_edges
+
+    path = "captured_images"
+    batch_edges.main([path, "--output", os.path.join(path, "Output"), "--low", "150", "--high", "160"])